@@ -1,33 +1,167 @@
-from flask import Flask
+"""The quiz API application factory.
+
+create_app() builds the one Flask app behind every endpoint the frontend
+uses: the quiz-taking routes (/register, /upload, /quizzes, ...) and the
+/api/pdf, /api/quiz and /api/user blueprints, all on the models in
+models/models.py. Startup does no schema work and imports nothing heavy:
+blueprints are named by import string (the BLUEPRINTS setting, which
+scripts set to () to get a bare app), PyPDF2 and the question generators
+load on the first request that needs the PDF service, and numpy on the
+first batch submission. Tables are created and migrated by the explicit
+`flask init-db` command (or `python migrations.py`).
+
+    FLASK_APP=app flask init-db      create and upgrade the database
+    FLASK_APP=app flask run          development server (serve.py for production)
+"""
+import os
+import threading
+from flask import Flask, current_app, has_app_context
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from dotenv import load_dotenv
-import os
+from werkzeug.utils import import_string
 
 # Load environment variables
 load_dotenv()
 
-# Initialize Flask app
-app = Flask(__name__)
+db = SQLAlchemy()
+
+DEFAULT_BLUEPRINTS = (
+    'app.routes.api_routes:bp',
+    'app.routes.pdf_routes:bp',
+    'app.routes.quiz_routes:bp',
+    'app.routes.user_routes:bp',
+)
+
+
+class Services:
+    """Queues, caches and the PDF service of one app, kept in
+    app.extensions['quizzo']; routes reach them through app_services()."""
+
+    def __init__(self, app, read_db, resumable_uploads):
+        from services.content_cache import ContentCache
+        from services.generation_cache import GenerationCache
+        from services.job_service import JobQueue, JobWorkerPool
+        from services.quiz_cache import QuizQuestionCache
+
+        self.read_db = read_db
+        self.resumable_uploads = resumable_uploads
+
+        # Background ingestion jobs (queue table lives next to the app database)
+        self.job_queue = JobQueue(os.getenv('JOBS_DB_PATH', os.path.join(app.instance_path, 'jobs.db')))
+        self.job_pool = JobWorkerPool(self.job_queue, max_workers=int(os.getenv('INGEST_WORKERS', '2')))
+
+        # Model-generated questions per chapter, keyed by normalized chapter text
+        self.generation_cache = GenerationCache(
+            os.getenv('GENERATION_CACHE_DIR', os.path.join(app.instance_path, 'generation_cache')),
+            max_bytes=int(os.getenv('GENERATION_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+        )
+
+        # Extracted pages and generated questions, keyed by upload SHA-256
+        self.content_cache = ContentCache(
+            os.getenv('CONTENT_CACHE_DIR', os.path.join(app.instance_path, 'content_cache')),
+            max_bytes=int(os.getenv('CONTENT_CACHE_MAX_BYTES', str(512 * 1024 * 1024)))
+        )
+
+        # Quiz questions never change after they are written, so reads and
+        # scoring share an in-process copy. reset_db.py clears it through the
+        # generation file.
+        self.quiz_cache = QuizQuestionCache(
+            self.load_quiz_questions,
+            max_entries=int(os.getenv('QUIZ_CACHE_MAX_ENTRIES', '256')),
+            ttl=float(os.getenv('QUIZ_CACHE_TTL', '300')),
+            generation_path=os.path.join(app.instance_path, 'quiz_cache.generation')
+        )
+
+        self._pdf_service = None
+        self._lock = threading.Lock()
+
+    def load_quiz_questions(self, quiz_id):
+        from models.models import Question, QuizQuestion
+        return self.read_db.session.query(Question).join(
+            QuizQuestion, QuizQuestion.question_id == Question.id
+        ).filter(QuizQuestion.quiz_id == quiz_id).order_by(QuizQuestion.order).all()
+
+    @property
+    def pdf_service(self):
+        # PyPDF2 and the question generators are imported on first use
+        if self._pdf_service is None:
+            with self._lock:
+                if self._pdf_service is None:
+                    from services.pdf_service import PDFService
+                    self._pdf_service = PDFService(generation_cache=self.generation_cache)
+        return self._pdf_service
+
+
+def app_services() -> Services:
+    return current_app.extensions['quizzo']
+
+
+def create_app(config=None):
+    """Build the app. config overrides settings, e.g. DATABASE_URL or
+    BLUEPRINTS (import strings of the blueprints to register)."""
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key')
+    app.config['UPLOAD_FOLDER'] = os.path.join(os.getcwd(), 'uploads')
+    app.config['BLUEPRINTS'] = DEFAULT_BLUEPRINTS
+    app.config.update(config or {})
+
+    CORS(app, resources={r"/*": {
+        "origins": "http://localhost:3000",
+        "methods": ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
+        "allow_headers": ["Content-Type", "Authorization", "Upload-Offset"],
+        "expose_headers": ["X-Next-After-Id", "X-Request-ID"]
+    }})
+
+    # Configure database (pool, SQLite pragmas, optional read-only pool)
+    from database import configure_database, ReadDatabase
+    configure_database(app, db)
+    read_db = ReadDatabase(db)
+    read_db.init_app(app)
+
+    # Structured JSON logs written off the request thread, tagged with X-Request-ID
+    from logging_config import configure_logging
+    configure_logging(app)
+
+    # Per-route latency, SQL and serialisation metrics at /metrics
+    from instrumentation import init_metrics
+    init_metrics(app)
+
+    # gzip/brotli for large JSON bodies
+    from http_cache import init_compression
+    init_compression(app)
+
+    # PDF uploads stream straight into uploads/ (capped at MAX_UPLOAD_MB), and
+    # large ones can be sent in resumable chunks
+    from streaming_upload import init_uploads
+    resumable_uploads = init_uploads(app, app.config['UPLOAD_FOLDER'])
+
+    app.extensions['quizzo'] = Services(app, read_db, resumable_uploads)
+
+    for blueprint in app.config['BLUEPRINTS']:
+        app.register_blueprint(import_string(blueprint))
 
-# Configure CORS
-CORS(app, resources={r"/*": {"origins": "http://localhost:3000"}})
+    @app.cli.command('init-db')
+    def init_db():
+        """Create missing tables and apply pending migrations."""
+        from migrations import init_schema
+        applied = init_schema(db)
+        print(f'applied migrations: {applied}' if applied else 'database is up to date')
 
-# Database configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'postgresql://localhost/quiz_maker')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key')
+    return app
 
-# Initialize database
-db = SQLAlchemy(app)
 
-# Import routes after app initialization to avoid circular imports
-from app.routes import pdf_routes, quiz_routes, user_routes
+_worker_app = None
+_worker_app_lock = threading.Lock()
 
-# Register blueprints
-app.register_blueprint(pdf_routes.bp)
-app.register_blueprint(quiz_routes.bp)
-app.register_blueprint(user_routes.bp)
 
-if __name__ == '__main__':
-    app.run(debug=True, port=8001) 
\ No newline at end of file
+def get_app():
+    """The current app, or outside one (job handlers in a worker process)
+    an app built from the environment, once per process."""
+    global _worker_app
+    if has_app_context():
+        return current_app._get_current_object()
+    with _worker_app_lock:
+        if _worker_app is None:
+            _worker_app = create_app({'BLUEPRINTS': ()})
+    return _worker_app
@@ -0,0 +1,557 @@
+from flask import Blueprint, request, jsonify, current_app
+import os
+from werkzeug.utils import secure_filename
+from services.content_cache import store_upload
+from services.pagination import parse_keyset_args, next_page_headers
+from services.ingestion_store import IngestionWriter
+from services.page_store import PageStore
+from services.pdf_structure import heading_chapters
+from services import analytics, quiz_assembly
+from models.models import Textbook, Chapter, Question, Quiz, QuizQuestion, QuizResult, Student, db
+from http_cache import conditional
+from app import app_services, get_app
+import hashlib
+import logging
+from sqlalchemy import func, insert, select
+from datetime import datetime
+
+# The quiz-taking API used by the frontend: registration, whole-book
+# uploads, quiz listing, submissions and results
+bp = Blueprint('api', __name__)
+logger = logging.getLogger('quizzo.api')
+
+MAX_BATCH_SUBMISSIONS = 1000
+
+ALLOWED_EXTENSIONS = {'pdf'}
+
+def allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+def student_ids_for(public_ids):
+    """Student.id for each public student id (the uuid /register hands out) that exists."""
+    return dict(db.session.query(Student.student_id, Student.id).filter(Student.student_id.in_(public_ids)).all())
+
+def valid_answers(answers):
+    """An answers object maps question ids to the chosen option, or null
+    for a skipped question."""
+    return isinstance(answers, dict) and all(
+        answer is None or isinstance(answer, str) for answer in answers.values())
+
+@bp.route('/')
+def home():
+    return jsonify({"message": "Welcome to Quiz Maker API"})
+
+@bp.route('/register', methods=['POST'])
+def register_student():
+    try:
+        if not request.is_json:
+            logger.debug("Registration rejected: not JSON", extra={"content_type": request.content_type})
+            return jsonify({"error": "Request must be JSON"}), 400
+
+        data = request.get_json()
+
+        name = data.get('name')
+        email = data.get('email')
+
+        if not name or not email:
+            logger.debug("Registration rejected: missing name or email")
+            return jsonify({"error": "Name and email are required"}), 400
+
+        # Validate email format
+        if '@' not in email or '.' not in email:
+            logger.debug("Registration rejected: invalid email format")
+            return jsonify({"error": "Invalid email format"}), 400
+
+        # Check if email already exists
+        existing_student = Student.query.filter_by(email=email).first()
+        if existing_student:
+            logger.debug("Registration rejected: email already registered")
+            return jsonify({"error": "Email already registered"}), 400
+
+        # Create new student; student_id defaults to a fresh uuid
+        student = Student(
+            name=name.strip(),
+            email=email.strip()
+        )
+        db.session.add(student)
+        db.session.commit()
+        logger.info("Student registered", extra={"student_id": student.student_id})
+
+        return jsonify({
+            "message": "Registration successful",
+            "student_id": student.student_id
+        })
+    except Exception as e:
+        logger.exception("Registration failed")
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/upload', methods=['POST'])
+def upload_file():
+    if 'file' not in request.files:
+        return jsonify({"error": "No file part"}), 400
+
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({"error": "No selected file"}), 400
+
+    if file and allowed_file(file.filename):
+        filename = secure_filename(file.filename)
+        # Files are stored under their content hash, so re-uploads of the
+        # same book share one file and different books never collide
+        sha256 = store_upload(file, current_app.config['UPLOAD_FOLDER'])
+        return ingest_upload(sha256, filename)
+
+    return jsonify({"error": "File type not allowed"}), 400
+
+@bp.route('/uploads', methods=['POST'])
+def start_upload():
+    """Start a resumable upload: {"filename", "size"} -> upload_id.
+
+    The client then PATCHes /uploads/<upload_id> with raw chunks of the file,
+    each with an Upload-Offset header, and POSTs /uploads/<upload_id>/complete.
+    After a dropped connection, GET /uploads/<upload_id> gives the offset to
+    resume from.
+    """
+    data = request.get_json(silent=True) or {}
+    filename = secure_filename(data.get('filename') or '')
+    if not filename or not allowed_file(filename):
+        return jsonify({"error": "File type not allowed"}), 400
+    upload = app_services().resumable_uploads.init(filename, data.get('size'))
+    return jsonify(upload), 201
+
+@bp.route('/uploads/<upload_id>', methods=['GET'])
+def get_upload(upload_id):
+    return jsonify(app_services().resumable_uploads.status(upload_id))
+
+@bp.route('/uploads/<upload_id>', methods=['PATCH'])
+def append_upload(upload_id):
+    offset = request.headers.get('Upload-Offset', type=int)
+    if offset is None:
+        return jsonify({"error": "Upload-Offset header is required"}), 400
+    offset = app_services().resumable_uploads.append(upload_id, offset, request.stream)
+    return jsonify({"upload_id": upload_id, "offset": offset})
+
+@bp.route('/uploads/<upload_id>/complete', methods=['POST'])
+def complete_upload(upload_id):
+    upload = app_services().resumable_uploads.complete(upload_id)
+    return ingest_upload(upload['sha256'], upload['filename'])
+
+def ingest_upload(sha256, filename):
+    """Build the quiz for a stored upload: straight from the content cache
+    when this file was processed before, otherwise in a background job."""
+    services = app_services()
+    filepath = os.path.abspath(os.path.join(current_app.config['UPLOAD_FOLDER'], sha256 + '.pdf'))
+    try:
+        cached_chapters = services.content_cache.get_questions(sha256, services.pdf_service.generator_version)
+        if cached_chapters is not None:
+            # The same file uploaded again gets the textbook and quiz built
+            # the first time rather than another copy of them
+            quiz = book_quiz(filepath) or write_book_quiz(filename, filepath, (
+                (chapter['title'], chapter['questions']) for chapter in cached_chapters
+            ))
+            db.session.commit()
+
+            return jsonify({
+                "message": "File uploaded and processed successfully",
+                "quiz_id": quiz.id,
+                "title": quiz.title,
+                "cached": True
+            }), 201
+
+        # Extraction and question generation run in the job workers
+        job_id = services.job_queue.enqueue('app.routes.api_routes:run_ingestion_job', {
+            "filepath": filepath,
+            "sha256": sha256,
+            "title": filename
+        })
+        services.job_pool.submit(job_id)
+
+        return jsonify({
+            "message": "File uploaded, processing started",
+            "job_id": job_id,
+            "status_url": f"/jobs/{job_id}"
+        }), 202
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+def question_rows(questions):
+    return [{
+        "text": q['text'],
+        "options": q['options'],
+        "correct_answer": q['correct_answer'],
+        "difficulty": q['difficulty']
+    } for q in questions]
+
+def book_quiz(file_path):
+    """The whole-book quiz of the uploaded textbook stored at file_path, if
+    one was built."""
+    return db.session.scalars(
+        select(Quiz)
+        .join(QuizQuestion, QuizQuestion.quiz_id == Quiz.id)
+        .join(Question, Question.id == QuizQuestion.question_id)
+        .join(Chapter, Chapter.id == Question.chapter_id)
+        .join(Textbook, Textbook.id == Chapter.textbook_id)
+        .where(Textbook.file_path == file_path, Quiz.chapter_id.is_(None))
+        .order_by(Quiz.id)
+        .limit(1)
+    ).first()
+
+def write_book_quiz(title, file_path, chapters, on_chapter=None):
+    """Write an uploaded book as a textbook with its chapters and questions,
+    plus one quiz over all of its questions, in the session's transaction.
+
+    chapters yields (chapter title, questions); on_chapter is called after
+    each one is queued.
+    """
+    textbook = Textbook(title=title, file_path=file_path)
+    db.session.add(textbook)
+    db.session.flush()
+
+    # Questions are written in multi-row INSERT chunks as chapters are parsed
+    writer = IngestionWriter(db.session, Question, chapter_model=Chapter)
+    for number, (chapter_title, questions) in enumerate(chapters, start=1):
+        writer.add_chapter(question_rows(questions), chapter={
+            "title": chapter_title,
+            "number": number,
+            "textbook_id": textbook.id
+        })
+        if on_chapter is not None:
+            on_chapter(chapter_title, questions)
+    writer.flush()
+
+    # A book quiz belongs to no single chapter
+    quiz = Quiz(title=title)
+    db.session.add(quiz)
+    db.session.flush()
+    if writer.question_ids:
+        db.session.execute(insert(QuizQuestion), [
+            {"quiz_id": quiz.id, "question_id": question_id, "order": order}
+            for order, question_id in enumerate(writer.question_ids, start=1)
+        ])
+    quiz_assembly.index_chapters(db.session, writer.chapter_ids)
+    return quiz
+
+def run_ingestion_job(payload, progress):
+    """Job handler: build a quiz from an uploaded PDF (runs in a worker process)."""
+    with get_app().app_context():
+        services = app_services()
+        pdf_service = services.pdf_service
+        content_cache = services.content_cache
+        pages = None
+        try:
+            # Re-use page text extracted from an earlier upload of the same file
+            sha256 = payload['sha256']
+            pages = content_cache.get_pages(sha256)
+            if pages is None:
+                pages = content_cache.record_pages(sha256, pdf_service.iter_pages(payload['filepath']))
+
+            # First pass: the book's term index for question selection. The
+            # second pass reads the page text back from the content cache's
+            # memory-mapped page store rather than extracting the PDF again.
+            term_index = pdf_service.build_term_index(pages)
+            if isinstance(pages, PageStore):
+                pages.close()
+            pages = content_cache.get_pages(sha256) or pdf_service.iter_pages(payload['filepath'])
+
+            # Chapters start where the PDF outline says, when it has one; off
+            # the page store they are found up front, so the total is known
+            # before generation starts
+            chapters = pdf_service.outline_chapters(payload['filepath']) or None
+            if isinstance(pages, PageStore):
+                chapters = chapters or heading_chapters(pages)
+                progress.set_total(len(chapters))
+            generated = []
+
+            def chapter_done(title, questions):
+                generated.append({"title": title, "questions": questions})
+                progress.chapter_done(title, len(questions))
+
+            quiz = write_book_quiz(payload['title'], payload['filepath'], pdf_service.generate_chapter_questions(
+                pdf_service.split_chapters(pages, chapters), term_index=term_index), chapter_done)
+            if progress.state["chapters_total"] is None:
+                progress.set_total(progress.state["chapters_done"])
+
+            # One commit: the quiz only becomes visible with all its questions
+            db.session.commit()
+            content_cache.put_questions(sha256, pdf_service.generator_version, generated)
+            return {"quiz_id": quiz.id, "title": quiz.title}
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            if isinstance(pages, PageStore):
+                pages.close()
+
+@bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    try:
+        job = app_services().job_queue.get(job_id)
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+
+        return jsonify({
+            "id": job["id"],
+            "status": job["status"],
+            "progress": job["progress"],
+            "result": job["result"],
+            "error": job["error"],
+            "created_at": job["created_at"],
+            "started_at": job["started_at"],
+            "finished_at": job["finished_at"]
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/cache/stats', methods=['GET'])
+def get_cache_stats():
+    services = app_services()
+    return jsonify({
+        "content": services.content_cache.stats(),
+        "generation": services.generation_cache.stats(),
+        "quiz_questions": services.quiz_cache.stats()
+    })
+
+def quiz_list_etag():
+    """Version of the quiz listing from a few index-only aggregates."""
+    services = app_services()
+    counts = services.read_db.session.execute(select(
+        select(func.max(Quiz.id)).scalar_subquery(),
+        select(func.count(Quiz.id)).scalar_subquery(),
+        select(func.max(QuizQuestion.id)).scalar_subquery(),
+        select(func.count(QuizQuestion.id)).scalar_subquery()
+    )).one()
+    version = f"{tuple(counts)}|{services.quiz_cache.generation}|{request.query_string.decode()}"
+    return hashlib.sha1(version.encode()).hexdigest()
+
+def quiz_questions_etag(quiz_id):
+    # Served from the question cache, so a revalidation usually skips the database
+    question_set = app_services().quiz_cache.get(quiz_id)
+    return question_set.version if question_set.questions else None
+
+@bp.route('/quizzes', methods=['GET'])
+@conditional(quiz_list_etag)
+def get_quizzes():
+    try:
+        after_id, limit = parse_keyset_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        # One statement: question counts come from a GROUP BY join instead of
+        # loading every quiz's questions
+        query = app_services().read_db.session.query(
+            Quiz.id, Quiz.title, Quiz.created_at,
+            func.count(QuizQuestion.id).label('question_count')
+        ).outerjoin(QuizQuestion, QuizQuestion.quiz_id == Quiz.id).group_by(Quiz.id)
+        if after_id is not None:
+            query = query.filter(Quiz.id > after_id)
+        quizzes = query.order_by(Quiz.id).limit(limit + 1).all()
+        headers = next_page_headers(quizzes, limit)
+
+        quiz_data = [{
+            "id": quiz.id,
+            "title": quiz.title,
+            "created_at": quiz.created_at.isoformat(),
+            "question_count": quiz.question_count
+        } for quiz in quizzes]
+        logger.debug("Quiz list served", extra={"count": len(quiz_data), "after_id": after_id})
+        return jsonify(quiz_data), 200, headers
+    except Exception as e:
+        logger.exception("Fetching quizzes failed")
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/quizzes/<int:quiz_id>/questions', methods=['GET'])
+@conditional(quiz_questions_etag, cache_control='private, max-age=60')
+def get_quiz_questions(quiz_id):
+    try:
+        questions = app_services().quiz_cache.get(quiz_id).questions
+        return jsonify([{
+            "id": q.id,
+            "text": q.text,
+            "options": q.options,
+            "correct_answer": q.correct_answer,
+            "difficulty": q.difficulty
+        } for q in questions])
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/submit-quiz', methods=['POST'])
+def submit_quiz():
+    data = request.get_json(silent=True) or {}
+    try:
+        quiz_id = int(data.get('quiz_id'))
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid quiz_id"}), 400
+    answers = data.get('answers')
+    question_times = data.get('question_times')
+    if not valid_answers(answers):
+        return jsonify({"error": "answers must map question ids to strings or null"}), 400
+    if question_times is not None and not isinstance(question_times, dict):
+        return jsonify({"error": "question_times must be an object"}), 400
+
+    try:
+        student_id = student_ids_for([data.get('student_id')]).get(data.get('student_id'))
+        if student_id is None:
+            return jsonify({"error": "Unknown student_id"}), 400
+
+        # Calculate score against the cached answer key
+        answer_key = app_services().quiz_cache.get(quiz_id).answer_key
+        if not answer_key:
+            return jsonify({"error": f"Quiz {quiz_id} has no questions"}), 400
+        answered_correctly = {
+            int(question_id): answers.get(question_id) == correct_answer
+            for question_id, correct_answer in answer_key.items()
+        }
+        score = (sum(answered_correctly.values()) / len(answer_key)) * 100
+        times = analytics.clean_times(question_times)
+
+        # Save result
+        result = QuizResult(
+            quiz_id=quiz_id,
+            student_id=student_id,
+            score=score,
+            time_taken=int(sum(times.values())),
+            answers=answers,
+            question_times=question_times
+        )
+        db.session.add(result)
+        db.session.flush()
+        result_id = result.id  # read before commit expires the instance
+        # Summary tables change in the same transaction as the result they count
+        analytics.record_result(db.session, quiz_id, student_id, score, answered_correctly,
+                                question_times, result.completed_at)
+        quiz_assembly.refresh_levels(db.session, list(answered_correctly))
+        db.session.commit()
+
+        return jsonify({
+            "message": "Quiz submitted successfully",
+            "result_id": result_id,
+            "score": score
+        })
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/submit-quiz/batch', methods=['POST'])
+def submit_quiz_batch():
+    data = request.get_json(silent=True) or {}
+    submissions = data.get('submissions')
+    if not isinstance(submissions, list) or not submissions:
+        return jsonify({"error": "submissions must be a non-empty list"}), 400
+    if len(submissions) > MAX_BATCH_SUBMISSIONS:
+        return jsonify({"error": f"At most {MAX_BATCH_SUBMISSIONS} submissions per batch"}), 400
+    for i, submission in enumerate(submissions):
+        if not isinstance(submission, dict) or not isinstance(submission.get('answers'), dict):
+            return jsonify({"error": f"Submission {i} must have an answers object"}), 400
+        if not valid_answers(submission['answers']):
+            return jsonify({"error": f"Submission {i} answers must be strings or null"}), 400
+        if not isinstance(submission.get('question_times') or {}, dict):
+            return jsonify({"error": f"Submission {i} question_times must be an object"}), 400
+        try:
+            submission['quiz_id'] = int(submission.get('quiz_id'))
+        except (TypeError, ValueError):
+            return jsonify({"error": f"Submission {i} has an invalid quiz_id"}), 400
+    student_ids = student_ids_for({submission.get('student_id') for submission in submissions})
+    for i, submission in enumerate(submissions):
+        if submission.get('student_id') not in student_ids:
+            return jsonify({"error": f"Submission {i} has an unknown student_id"}), 400
+
+    try:
+        # numpy is only needed here, so it is imported on the first batch
+        from services.scoring import correct_matrix, encode_answer_key
+
+        # Score each quiz's submissions together as one answer matrix
+        by_quiz = {}
+        for i, submission in enumerate(submissions):
+            by_quiz.setdefault(submission['quiz_id'], []).append(i)
+        scores = [None] * len(submissions)
+        answered_correctly = [None] * len(submissions)
+        for quiz_id, indexes in by_quiz.items():
+            question_set = app_services().quiz_cache.get(quiz_id)
+            if not question_set.questions:
+                return jsonify({"error": f"Quiz {quiz_id} has no questions"}), 400
+            question_ids = [q.id for q in question_set.questions]
+            hits = correct_matrix(encode_answer_key(question_set), [submissions[i]['answers'] for i in indexes])
+            quiz_scores = hits.sum(axis=1) / len(question_ids) * 100
+            for i, row, score in zip(indexes, hits.tolist(), quiz_scores.tolist()):
+                scores[i] = score
+                answered_correctly[i] = dict(zip(question_ids, row))
+
+        # One multi-row INSERT in one transaction; ids come back in input order
+        completed_at = datetime.utcnow()
+        rows = [{
+            "quiz_id": submission['quiz_id'],
+            "student_id": student_ids[submission['student_id']],
+            "score": score,
+            "time_taken": int(sum(analytics.clean_times(submission.get('question_times')).values())),
+            "answers": submission['answers'],
+            "question_times": submission.get('question_times'),
+            "completed_at": completed_at
+        } for submission, score in zip(submissions, scores)]
+        result_ids = db.session.scalars(
+            insert(QuizResult).returning(QuizResult.id, sort_by_parameter_order=True),
+            rows
+        ).all()
+        analytics.record_results(db.session, [
+            dict(row, correct=correct) for row, correct in zip(rows, answered_correctly)
+        ])
+        quiz_assembly.refresh_levels(db.session, sorted({
+            question_id for correct in answered_correctly for question_id in correct
+        }))
+        db.session.commit()
+
+        return jsonify({
+            "message": "Quizzes submitted successfully",
+            "results": [{
+                "result_id": result_id,
+                "quiz_id": submission['quiz_id'],
+                "student_id": submission.get('student_id'),
+                "score": score
+            } for result_id, submission, score in zip(result_ids, submissions, scores)]
+        })
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/results/<int:result_id>', methods=['GET'])
+def get_result(result_id):
+    try:
+        row = app_services().read_db.session.query(QuizResult, Student.student_id).join(
+            Student, Student.id == QuizResult.student_id
+        ).filter(QuizResult.id == result_id).first()
+        if not row:
+            return jsonify({"error": "Result not found"}), 404
+        result, public_student_id = row
+
+        return jsonify({
+            "id": result.id,
+            "quiz_id": result.quiz_id,
+            "student_id": public_student_id,
+            "score": result.score,
+            "answers": result.answers,
+            "question_times": result.question_times,
+            "completed_at": result.completed_at.isoformat()
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/check-registration', methods=['GET'])
+def check_registration():
+    try:
+        student_id = request.args.get('student_id')
+        if not student_id:
+            return jsonify({"registered": False}), 200
+
+        return jsonify({"registered": bool(student_ids_for([student_id]))}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/logout', methods=['POST'])
+def logout():
+    try:
+        # In a real application, you might want to invalidate tokens or sessions here
+        return jsonify({"message": "Logged out successfully"}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -1,11 +1,17 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from werkzeug.utils import secure_filename
 import os
-from services.pdf_service import PDFService
+from sqlalchemy import func
+from services.content_cache import store_upload
+from services.pagination import parse_keyset_args, next_page_headers
+from services.ingestion_store import IngestionWriter
+from services import quiz_assembly
+from services.page_store import open_page_store, page_store_path
+from services.pdf_structure import heading_chapters
 from models.models import Textbook, Chapter, Question, db
+from app import app_services, get_app
 
 bp = Blueprint('pdf', __name__, url_prefix='/api/pdf')
-pdf_service = PDFService()
 
 @bp.route('/upload', methods=['POST'])
 def upload_pdf():
@@ -20,8 +26,65 @@ def upload_pdf():
         return jsonify({'error': 'Only PDF files are allowed'}), 400
     
     filename = secure_filename(file.filename)
-    file_path = os.path.join(pdf_service.upload_dir, filename)
-    file.save(file_path)
+    try:
+        selected = parse_chapter_selection(request.form.get('chapters'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    # Stored under the content hash so same-named uploads don't overwrite each other
+    sha256 = store_upload(file, current_app.config['UPLOAD_FOLDER'])
+    return create_textbook(sha256, filename, selected)
+
+@bp.route('/uploads', methods=['POST'])
+def start_upload():
+    """Start a resumable upload: {"filename", "size"} -> upload_id; chunks
+    go to PATCH /uploads/<upload_id> with an Upload-Offset header."""
+    data = request.get_json(silent=True) or {}
+    filename = secure_filename(data.get('filename') or '')
+    if not filename.endswith('.pdf'):
+        return jsonify({'error': 'Only PDF files are allowed'}), 400
+    return jsonify(app_services().resumable_uploads.init(filename, data.get('size'))), 201
+
+@bp.route('/uploads/<upload_id>', methods=['GET'])
+def get_upload(upload_id):
+    return jsonify(app_services().resumable_uploads.status(upload_id))
+
+@bp.route('/uploads/<upload_id>', methods=['PATCH'])
+def append_upload(upload_id):
+    offset = request.headers.get('Upload-Offset', type=int)
+    if offset is None:
+        return jsonify({'error': 'Upload-Offset header is required'}), 400
+    offset = app_services().resumable_uploads.append(upload_id, offset, request.stream)
+    return jsonify({'upload_id': upload_id, 'offset': offset})
+
+@bp.route('/uploads/<upload_id>/complete', methods=['POST'])
+def complete_upload(upload_id):
+    data = request.get_json(silent=True) or {}
+    try:
+        selected = parse_chapter_selection(data.get('chapters'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    upload = app_services().resumable_uploads.complete(upload_id)
+    return create_textbook(upload['sha256'], upload['filename'], selected)
+
+def parse_chapter_selection(value):
+    """Chapter indexes (as listed by /textbooks/<id>/structure) to ingest:
+    a list or comma-separated string; None means every chapter."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = [part for part in value.split(',') if part.strip()]
+    if not isinstance(value, list):
+        raise ValueError('chapters must be a list of chapter indexes')
+    try:
+        selected = sorted({int(index) for index in value})
+    except (TypeError, ValueError):
+        raise ValueError('chapters must be a list of chapter indexes')
+    if selected and selected[0] < 0:
+        raise ValueError('chapter indexes must be >= 0')
+    return selected
+
+def create_textbook(sha256, filename, selected=None):
+    file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], sha256 + '.pdf')
     
     # Create textbook entry
     textbook = Textbook(
@@ -31,53 +94,218 @@ def upload_pdf():
     db.session.add(textbook)
     db.session.commit()
     
-    # Process PDF and create chapters
-    chapters = pdf_service.extract_text_from_pdf(file_path)
-    for chapter_title, chapter_text in chapters.items():
-        chapter = Chapter(
-            title=chapter_title,
-            number=len(textbook.chapters) + 1,
-            textbook_id=textbook.id
-        )
-        db.session.add(chapter)
-        db.session.commit()
-        
-        # Generate questions for chapter
-        questions = pdf_service.generate_questions(chapter_text)
-        for q in questions:
-            question = Question(
-                text=q['question'],
-                correct_answer=q['correct_answer'],
-                options=q['options'],
-                difficulty=q['difficulty'],
-                chapter_id=chapter.id
-            )
-            db.session.add(question)
-    
-    db.session.commit()
+    # Chapters and questions are created by a background job
+    job_id = enqueue_textbook_job(textbook.id, file_path, selected)
     
     return jsonify({
-        'message': 'PDF processed successfully',
+        'message': 'PDF uploaded, processing started',
         'textbook_id': textbook.id,
-        'chapters': len(chapters)
-    }), 201
+        'job_id': job_id,
+        'status_url': f'/api/pdf/jobs/{job_id}'
+    }), 202
+
+def enqueue_textbook_job(textbook_id, file_path, selected=None):
+    payload = {
+        'textbook_id': textbook_id,
+        'file_path': os.path.abspath(file_path)
+    }
+    if selected is not None:
+        payload['chapters'] = selected
+    services = app_services()
+    job_id = services.job_queue.enqueue('app.routes.pdf_routes:run_textbook_job', payload)
+    services.job_pool.submit(job_id)
+    return job_id
+
+def run_textbook_job(payload, progress):
+    """Job handler: extract chapters and generate questions (runs in a worker process)."""
+    with get_app().app_context():
+        pdf_service = app_services().pdf_service
+        textbook_id = payload['textbook_id']
+        file_path = payload['file_path']
+        # Chapters and their questions are persisted in chunked multi-row
+        # INSERTs as they are parsed, and committed once at the end
+        writer = IngestionWriter(db.session, Question, chapter_model=Chapter)
+        # Chapter page ranges come from the PDF outline when it has one,
+        # otherwise from a heading scan of the page store
+        chapters = pdf_service.discover_chapters(file_path)
+        selected = payload.get('chapters')
+        pages = None
+        try:
+            if selected is None:
+                # Whole book: page text goes to the memory-mapped page store, read
+                # once for the term index and then sliced into chapters
+                pages = pdf_service.load_page_store(file_path)
+                term_index = pdf_service.build_term_index(pages)
+                numbers = range(1, len(chapters) + 1)
+                texts = pdf_service.split_chapters(pages, chapters)
+            else:
+                # Only the chosen chapters' pages are extracted; chapters keep
+                # their number in the book
+                done = {number for number, in db.session.query(Chapter.number).filter_by(textbook_id=textbook_id)}
+                indexes = [i for i in selected if i < len(chapters) and i + 1 not in done]
+                texts = list(pdf_service.extract_chapters(file_path, chapters, selected=indexes))
+                term_index = pdf_service.build_term_index(text for _, text in texts)
+                numbers = [i + 1 for i in indexes]
+            progress.set_total(len(numbers))
+            for number, (chapter_title, questions) in zip(numbers, pdf_service.generate_chapter_questions(
+                    texts, term_index=term_index)):
+                writer.add_chapter([{
+                    'text': q['text'],
+                    'correct_answer': q['correct_answer'],
+                    'options': q['options'],
+                    'difficulty': q['difficulty']
+                } for q in questions], chapter={
+                    'title': chapter_title,
+                    'number': number,
+                    'textbook_id': textbook_id
+                })
+                progress.chapter_done(chapter_title, len(questions))
+            writer.flush()
+            quiz_assembly.index_chapters(db.session, writer.chapter_ids)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            if pages is not None:
+                pages.close()
+        return {'textbook_id': textbook_id, 'chapters': len(writer.chapter_ids)}
+
+@bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = app_services().job_queue.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    return jsonify({
+        'id': job['id'],
+        'status': job['status'],
+        'progress': job['progress'],
+        'result': job['result'],
+        'error': job['error'],
+        'created_at': job['created_at'],
+        'started_at': job['started_at'],
+        'finished_at': job['finished_at']
+    })
 
 @bp.route('/textbooks', methods=['GET'])
 def get_textbooks():
-    textbooks = Textbook.query.all()
+    try:
+        after_id, limit = parse_keyset_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    query = db.session.query(
+        Textbook.id, Textbook.title, Textbook.author,
+        func.count(Chapter.id).label('chapter_count')
+    ).outerjoin(Chapter, Chapter.textbook_id == Textbook.id).group_by(Textbook.id)
+    if after_id is not None:
+        query = query.filter(Textbook.id > after_id)
+    textbooks = query.order_by(Textbook.id).limit(limit + 1).all()
+    headers = next_page_headers(textbooks, limit)
+    
     return jsonify([{
         'id': t.id,
         'title': t.title,
         'author': t.author,
-        'chapters': len(t.chapters)
-    } for t in textbooks])
+        'chapters': t.chapter_count
+    } for t in textbooks]), 200, headers
 
 @bp.route('/textbooks/<int:textbook_id>/chapters', methods=['GET'])
 def get_chapters(textbook_id):
-    chapters = Chapter.query.filter_by(textbook_id=textbook_id).all()
+    try:
+        after_id, limit = parse_keyset_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    query = db.session.query(
+        Chapter.id, Chapter.title, Chapter.number,
+        func.count(Question.id).label('question_count')
+    ).outerjoin(Question, Question.chapter_id == Chapter.id).filter(
+        Chapter.textbook_id == textbook_id
+    ).group_by(Chapter.id)
+    if after_id is not None:
+        query = query.filter(Chapter.id > after_id)
+    chapters = query.order_by(Chapter.id).limit(limit + 1).all()
+    headers = next_page_headers(chapters, limit)
+    
     return jsonify([{
         'id': c.id,
         'title': c.title,
         'number': c.number,
-        'questions': len(c.questions)
-    } for c in chapters]) 
\ No newline at end of file
+        'questions': c.question_count
+    } for c in chapters]), 200, headers
+
+@bp.route('/textbooks/<int:textbook_id>/structure', methods=['GET'])
+def get_structure(textbook_id):
+    """The book's chapters as page ranges [start, stop) (0-based), read from
+    the PDF outline without extracting text; books without an outline are
+    scanned for headings once their text has been extracted."""
+    textbook = Textbook.query.get_or_404(textbook_id)
+    if not os.path.exists(textbook.file_path):
+        return jsonify({'error': 'PDF file is missing'}), 404
+    chapters = app_services().pdf_service.outline_chapters(textbook.file_path)
+    source = 'outline'
+    if not chapters:
+        store = open_page_store(page_store_path(textbook.file_path))
+        if store is None:
+            return jsonify({'error': 'The PDF has no outline and its text has not been extracted yet'}), 404
+        with store:
+            chapters = heading_chapters(store)
+        source = 'headings'
+    
+    return jsonify({
+        'textbook_id': textbook_id,
+        'source': source,
+        'chapters': [{
+            'index': i,
+            'title': c.title,
+            'start': c.start,
+            'stop': c.stop,
+            'label': c.label
+        } for i, c in enumerate(chapters)]
+    })
+
+@bp.route('/textbooks/<int:textbook_id>/chapters', methods=['POST'])
+def add_chapters(textbook_id):
+    """Ingest more chapters of a book uploaded with a chapter selection:
+    {"chapters": [index, ...]}; chapters already ingested are skipped."""
+    textbook = Textbook.query.get_or_404(textbook_id)
+    data = request.get_json(silent=True) or {}
+    try:
+        selected = parse_chapter_selection(data.get('chapters'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not selected:
+        return jsonify({'error': 'chapters is required'}), 400
+    
+    job_id = enqueue_textbook_job(textbook.id, textbook.file_path, selected)
+    return jsonify({
+        'message': 'Chapter processing started',
+        'textbook_id': textbook.id,
+        'job_id': job_id,
+        'status_url': f'/api/pdf/jobs/{job_id}'
+    }), 202
+
+MAX_PREVIEW_PAGES = 20
+
+@bp.route('/textbooks/<int:textbook_id>/pages', methods=['GET'])
+def get_pages(textbook_id):
+    """Text of pages [start, start + limit) (0-based), sliced from the
+    book's page store without parsing the PDF."""
+    start = request.args.get('start', 0, type=int)
+    limit = request.args.get('limit', 5, type=int)
+    if start < 0 or not 1 <= limit <= MAX_PREVIEW_PAGES:
+        return jsonify({'error': f'start must be >= 0 and limit between 1 and {MAX_PREVIEW_PAGES}'}), 400
+    
+    textbook = Textbook.query.get_or_404(textbook_id)
+    store = open_page_store(page_store_path(textbook.file_path))
+    if store is None:
+        return jsonify({'error': 'Text has not been extracted yet'}), 404
+    with store:
+        stop = min(start + limit, len(store))
+        return jsonify({
+            'textbook_id': textbook_id,
+            'page_count': len(store),
+            'pages': [{'index': i, 'text': store.page(i)} for i in range(start, stop)]
+        })
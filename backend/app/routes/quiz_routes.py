@@ -1,19 +1,56 @@
 from flask import Blueprint, request, jsonify
+from sqlalchemy.orm import joinedload
 from models.models import Quiz, QuizQuestion, Question, QuizResult, Student, db
 from datetime import datetime
+from http_cache import conditional
+from services import analytics, quiz_assembly
+from app.routes.api_routes import student_ids_for, valid_answers
 
 bp = Blueprint('quiz', __name__, url_prefix='/api/quiz')
 
+def find_student(student_id):
+    """Student.id for a student given by id or by the public id /register
+    hands out; None if there is no such student."""
+    if isinstance(student_id, str):
+        return student_ids_for([student_id]).get(student_id)
+    if isinstance(student_id, int) and db.session.get(Student, student_id) is not None:
+        return student_id
+    return None
+
+def load_quiz_questions(quiz_id):
+    """QuizQuestion rows with their Question rows loaded in the same SELECT."""
+    return QuizQuestion.query.options(
+        joinedload(QuizQuestion.question)
+    ).filter_by(quiz_id=quiz_id).order_by(QuizQuestion.order).all()
+
 @bp.route('/create', methods=['POST'])
 def create_quiz():
     data = request.json
     chapter_id = data.get('chapter_id')
     num_questions = data.get('num_questions', 10)
     time_limit = data.get('time_limit', 30)  # in minutes
+    student_id = data.get('student_id')
+    # 'adaptive' (the default for a known student) targets the student's
+    # record; a 'mix' of level weights overrides the difficulty
+    difficulty = data.get('difficulty', 'adaptive' if student_id else 'medium')
     
-    # Get questions for the chapter
-    questions = Question.query.filter_by(chapter_id=chapter_id).all()
-    if not questions:
+    if not isinstance(num_questions, int) or num_questions < 1:
+        return jsonify({'error': 'num_questions must be a positive integer'}), 400
+    if difficulty == 'adaptive':
+        difficulty = quiz_assembly.adaptive_difficulty(analytics.student_summary(db.session, student_id)) \
+            if student_id else 'medium'
+    try:
+        mix = quiz_assembly.target_mix(difficulty, data.get('mix'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Questions are drawn through the chapter's difficulty index; chapters
+    # ingested before the index existed are indexed on first use
+    picked = quiz_assembly.assemble(db.session, chapter_id, num_questions, mix)
+    if not picked and quiz_assembly.index_chapters(db.session, [chapter_id]):
+        picked = quiz_assembly.assemble(db.session, chapter_id, num_questions, mix)
+    if not picked:
+        db.session.rollback()
         return jsonify({'error': 'No questions found for this chapter'}), 404
     
     # Create quiz
@@ -23,30 +60,42 @@ def create_quiz():
         time_limit=time_limit
     )
     db.session.add(quiz)
-    db.session.commit()
+    db.session.flush()
     
-    # Add questions to quiz
-    for i, question in enumerate(questions[:num_questions]):
+    # Add questions to quiz (committed together with the quiz, since the
+    # quiz's ETag assumes its content is complete once visible)
+    for i, (question_id, _) in enumerate(picked):
         quiz_question = QuizQuestion(
             quiz_id=quiz.id,
-            question_id=question.id,
+            question_id=question_id,
             order=i + 1
         )
         db.session.add(quiz_question)
     
     db.session.commit()
     
+    levels = {level: 0 for level in quiz_assembly.LEVELS}
+    for _, level in picked:
+        levels[level] += 1
     return jsonify({
         'quiz_id': quiz.id,
         'title': quiz.title,
-        'num_questions': num_questions,
+        'num_questions': len(picked),
+        'difficulty': difficulty if data.get('mix') is None else 'custom',
+        'levels': levels,
         'time_limit': time_limit
     }), 201
 
+def quiz_etag(quiz_id):
+    # A quiz and its questions never change after create_quiz commits them
+    created_at = db.session.query(Quiz.created_at).filter_by(id=quiz_id).scalar()
+    return f"quiz-{quiz_id}-{created_at.timestamp()}" if created_at else None
+
 @bp.route('/<int:quiz_id>', methods=['GET'])
+@conditional(quiz_etag, cache_control='private, max-age=60')
 def get_quiz(quiz_id):
     quiz = Quiz.query.get_or_404(quiz_id)
-    questions = QuizQuestion.query.filter_by(quiz_id=quiz_id).order_by(QuizQuestion.order).all()
+    questions = load_quiz_questions(quiz_id)
     
     return jsonify({
         'id': quiz.id,
@@ -62,50 +111,71 @@ def get_quiz(quiz_id):
 
 @bp.route('/submit', methods=['POST'])
 def submit_quiz():
-    data = request.json
-    student_id = data.get('student_id')
+    data = request.get_json(silent=True) or {}
     quiz_id = data.get('quiz_id')
     answers = data.get('answers', {})
     question_times = data.get('question_times', {})
+    if not isinstance(quiz_id, int):
+        return jsonify({'error': 'quiz_id must be an integer'}), 400
+    if not valid_answers(answers):
+        return jsonify({'error': 'answers must map question ids to strings or null'}), 400
+    if not isinstance(question_times, dict):
+        return jsonify({'error': 'question_times must be an object'}), 400
+    student_id = find_student(data.get('student_id'))
+    if student_id is None:
+        return jsonify({'error': 'Unknown student_id'}), 400
     
     # Calculate score
     quiz = Quiz.query.get_or_404(quiz_id)
-    questions = QuizQuestion.query.filter_by(quiz_id=quiz_id).all()
+    questions = load_quiz_questions(quiz_id)
+    if not questions:
+        return jsonify({'error': f'Quiz {quiz_id} has no questions'}), 400
     
-    correct = 0
+    answered_correctly = {
+        q.question_id: answers.get(str(q.question_id)) == q.question.correct_answer
+        for q in questions
+    }
+    correct = sum(answered_correctly.values())
     total = len(questions)
     
-    for q in questions:
-        if str(q.question_id) in answers:
-            if answers[str(q.question_id)] == q.question.correct_answer:
-                correct += 1
-    
     score = (correct / total) * 100
+    times = analytics.clean_times(question_times)
     
     # Create quiz result
     result = QuizResult(
         student_id=student_id,
         quiz_id=quiz_id,
         score=score,
-        time_taken=sum(question_times.values()),
+        time_taken=int(sum(times.values())),
         question_times=question_times,
         answers=answers
     )
     db.session.add(result)
+    db.session.flush()
+    result_id = result.id  # read before commit expires the instance
+    # Summary tables change in the same transaction as the result they count
+    analytics.record_result(db.session, quiz_id, student_id, score, answered_correctly,
+                            question_times, result.completed_at)
+    quiz_assembly.refresh_levels(db.session, list(answered_correctly))
     db.session.commit()
     
     return jsonify({
         'score': score,
         'correct': correct,
         'total': total,
-        'result_id': result.id
+        'result_id': result_id
     })
 
+@bp.route('/<int:quiz_id>/stats', methods=['GET'])
+def get_quiz_stats(quiz_id):
+    if db.session.query(Quiz.id).filter_by(id=quiz_id).scalar() is None:
+        return jsonify({'error': 'Quiz not found'}), 404
+    return jsonify(analytics.quiz_summary(db.session, quiz_id))
+
 @bp.route('/results/<int:result_id>', methods=['GET'])
 def get_result(result_id):
     result = QuizResult.query.get_or_404(result_id)
-    quiz = Quiz.query.get(result.quiz_id)
-    questions = QuizQuestion.query.filter_by(quiz_id=quiz.id).all()
+    questions = load_quiz_questions(result.quiz_id)
     
     return jsonify({
         'score': result.score,
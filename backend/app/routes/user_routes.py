@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 from models.models import Student, QuizResult, db
 from datetime import datetime
+from services import analytics
+from services.pagination import parse_keyset_args, next_page_headers
 
 bp = Blueprint('user', __name__, url_prefix='/api/user')
 
@@ -30,33 +32,60 @@ def register_student():
         'email': student.email
     }), 201
 
+def student_results_page(student_id, after_id, limit, *columns):
+    # Only the requested columns, so the JSON columns stay in the database
+    # unless asked for
+    query = db.session.query(
+        QuizResult.id, QuizResult.quiz_id, QuizResult.score, QuizResult.time_taken,
+        QuizResult.completed_at, *columns
+    ).filter(QuizResult.student_id == student_id)
+    if after_id is not None:
+        query = query.filter(QuizResult.id > after_id)
+    results = query.order_by(QuizResult.id).limit(limit + 1).all()
+    return results, next_page_headers(results, limit)
+
+def result_dict(r):
+    return {
+        'id': r.id,
+        'quiz_id': r.quiz_id,
+        'score': r.score,
+        'time_taken': r.time_taken,
+        'completed_at': r.completed_at.isoformat()
+    }
+
 @bp.route('/<int:student_id>', methods=['GET'])
 def get_student(student_id):
+    try:
+        after_id, limit = parse_keyset_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     student = Student.query.get_or_404(student_id)
-    results = QuizResult.query.filter_by(student_id=student_id).all()
+    results, headers = student_results_page(student_id, after_id, limit)
     
     return jsonify({
         'id': student.id,
         'name': student.name,
         'email': student.email,
-        'quiz_results': [{
-            'id': r.id,
-            'quiz_id': r.quiz_id,
-            'score': r.score,
-            'time_taken': r.time_taken,
-            'completed_at': r.completed_at.isoformat()
-        } for r in results]
-    })
+        'stats': analytics.student_summary(db.session, student_id),
+        'quiz_results': [result_dict(r) for r in results]
+    }), 200, headers
+
+@bp.route('/<int:student_id>/stats', methods=['GET'])
+def get_student_stats(student_id):
+    if db.session.query(Student.id).filter_by(id=student_id).scalar() is None:
+        return jsonify({'error': 'Student not found'}), 404
+    return jsonify(analytics.student_summary(db.session, student_id))
 
 @bp.route('/results/<int:student_id>', methods=['GET'])
 def get_student_results(student_id):
-    results = QuizResult.query.filter_by(student_id=student_id).all()
+    try:
+        after_id, limit = parse_keyset_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    return jsonify([{
-        'id': r.id,
-        'quiz_id': r.quiz_id,
-        'score': r.score,
-        'time_taken': r.time_taken,
-        'question_times': r.question_times,
-        'completed_at': r.completed_at.isoformat()
-    } for r in results]) 
\ No newline at end of file
+    results, headers = student_results_page(student_id, after_id, limit, QuizResult.question_times)
+    
+    return jsonify([
+        dict(result_dict(r), question_times=r.question_times) for r in results
+    ]), 200, headers
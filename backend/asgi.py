@@ -0,0 +1,171 @@
+"""ASGI entry point for the quiz API, served by serve.py under uvicorn:
+
+    uvicorn asgi:app --workers 4
+
+The Flask routes stay synchronous; WSGIToASGI puts them behind an event
+loop. Request bodies are received on the loop, so a slow client or a
+large upload holds no thread while it trickles in. Each complete request
+is then handed to a bounded pool of WEB_THREADS threads (default 8) for
+its blocking SQLAlchemy work, and the response is streamed back from
+there. CPU-bound PDF ingestion runs on neither: uploads queue jobs for
+the job worker processes (services/job_service.py).
+
+Lifespan startup resumes jobs left waiting by an earlier run; shutdown
+stops the job pool and the request threads.
+"""
+import asyncio
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+
+# Request bodies up to this size stay in memory; larger ones (PDF uploads)
+# are spooled to a temporary file
+SPOOL_BYTES = 1024 * 1024
+
+
+def build_environ(scope, body, content_length):
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': 'HTTP/' + scope.get('http_version', '1.1'),
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin-1')
+        value = value.decode('latin-1')
+        if name == 'content-type':
+            environ['CONTENT_TYPE'] = value
+        elif name != 'content-length':
+            key = 'HTTP_' + name.upper().replace('-', '_')
+            environ[key] = f'{environ[key]},{value}' if key in environ else value
+    environ['CONTENT_LENGTH'] = str(content_length)
+    return environ
+
+
+class WSGIToASGI:
+    """Serve a WSGI app over ASGI, running it on a bounded thread pool.
+
+    Bodies larger than max_body are not read past the limit: the app sees a
+    Content-Length over its MAX_CONTENT_LENGTH and answers 413 itself.
+    """
+
+    def __init__(self, wsgi_app, threads: int = 8, max_body=None, on_startup=None, on_shutdown=None):
+        self.wsgi_app = wsgi_app
+        self.max_body = max_body
+        self.on_startup = on_startup
+        self.on_shutdown = on_shutdown
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='request')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        else:
+            raise ValueError(f"unsupported ASGI scope type {scope['type']!r}")
+
+    async def _lifespan(self, receive, send):
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                if self.on_startup:
+                    await loop.run_in_executor(self.executor, self.on_startup)
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.on_shutdown:
+                    await loop.run_in_executor(self.executor, self.on_shutdown)
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _http(self, scope, receive, send):
+        declared = next((int(value) for name, value in scope['headers'] if name == b'content-length'), None)
+        too_large = self.max_body is not None and declared is not None and declared > self.max_body
+        with SpooledTemporaryFile(max_size=SPOOL_BYTES) as body:
+            received = 0
+            more_body = not too_large
+            while more_body:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    return
+                chunk = message.get('body', b'')
+                body.write(chunk)
+                received += len(chunk)
+                more_body = message.get('more_body', False)
+                if self.max_body is not None and received > self.max_body:
+                    break
+            body.seek(0)
+            content_length = declared if too_large else received
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self.executor, self._respond, scope, body, content_length, send, loop)
+
+    def _respond(self, scope, body, content_length, send, loop):
+        """Run the WSGI app in a pool thread, sending its response through the loop."""
+        def emit(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        response_start = {}
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and response_start.get('sent'):
+                raise exc_info[1].with_traceback(exc_info[2])
+            response_start['message'] = {
+                'type': 'http.response.start',
+                'status': int(status.split(' ', 1)[0]),
+                'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+            }
+
+        response = self.wsgi_app(build_environ(scope, body, content_length), start_response)
+        try:
+            # Hold each chunk back until the next one arrives, so most
+            # responses go out as one start and one final body message
+            pending = None
+            for chunk in response:
+                if not chunk:
+                    continue
+                if pending is None:
+                    emit(response_start['message'])
+                    response_start['sent'] = True
+                else:
+                    emit({'type': 'http.response.body', 'body': pending, 'more_body': True})
+                pending = chunk
+            if pending is None:
+                emit(response_start['message'])
+            emit({'type': 'http.response.body', 'body': pending or b''})
+        finally:
+            if hasattr(response, 'close'):
+                response.close()
+
+
+def create_asgi_app():
+    """The quiz app behind WSGIToASGI, with its job pool tied to the lifespan."""
+    from app import app_services, create_app
+    flask_app = create_app()
+    with flask_app.app_context():
+        job_pool = app_services().job_pool
+    return WSGIToASGI(
+        flask_app,
+        threads=int(os.getenv('WEB_THREADS', '8')),
+        max_body=flask_app.config.get('MAX_CONTENT_LENGTH'),
+        on_startup=job_pool.resume,
+        on_shutdown=job_pool.shutdown
+    )
+
+
+app = create_asgi_app()
@@ -0,0 +1,91 @@
+"""Compare POST /submit-quiz (one request per student) with POST
+/submit-quiz/batch for a class submitting the same quiz at once.
+
+Run from backend/:  python -m benchmarks.bench_batch_scoring [students] [questions]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+DB_DIR = tempfile.mkdtemp(prefix='quizzo-batch-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(DB_DIR, 'quizzes.db')
+os.environ.setdefault('JOBS_DB_PATH', os.path.join(DB_DIR, 'jobs.db'))
+
+from app import app_services, create_app
+from app.routes.api_routes import MAX_BATCH_SUBMISSIONS
+from benchmarks.seed import OPTIONS, seed
+from models.models import QuizResult
+from services.scoring import encode_answer_key, score_submissions
+
+
+def make_submissions(quiz_id, student_ids, quiz_cache):
+    question_ids = [str(q.id) for q in quiz_cache.get(quiz_id).questions]
+    return [{
+        'quiz_id': quiz_id,
+        'student_id': student_id,
+        'answers': {qid: random.choice(OPTIONS) for qid in question_ids},
+        'question_times': {qid: random.randint(5, 60) for qid in question_ids}
+    } for student_id in student_ids]
+
+
+def python_scores(question_set, submissions):
+    scores = []
+    for submission in submissions:
+        correct = sum(1 for qid, answer in question_set.answer_key.items()
+                      if submission['answers'].get(qid) == answer)
+        scores.append(correct / len(question_set.answer_key) * 100)
+    return scores
+
+
+def main():
+    num_students = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    num_questions = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    random.seed(7)
+    app = create_app()
+    client = app.test_client()
+    seeded = seed(app, num_students, 1, num_questions, 0, rng_seed=7)
+
+    with app.app_context():
+        quiz_cache = app_services().quiz_cache
+        quiz_id = seeded['quiz_ids'][0]
+        submissions = make_submissions(quiz_id, seeded['student_ids'], quiz_cache)
+        question_set = quiz_cache.get(quiz_id)
+
+        started = time.perf_counter()
+        expected = python_scores(question_set, submissions)
+        loop_scoring = time.perf_counter() - started
+
+        started = time.perf_counter()
+        _, vector_scores = score_submissions(encode_answer_key(question_set),
+                                             [s['answers'] for s in submissions])
+        vector_scoring = time.perf_counter() - started
+        assert vector_scores.tolist() == expected
+
+        started = time.perf_counter()
+        for submission in submissions:
+            response = client.post('/submit-quiz', json=submission)
+            assert response.status_code == 200, response.json
+        per_request = time.perf_counter() - started
+
+        started = time.perf_counter()
+        batch_scores = []
+        for i in range(0, num_students, MAX_BATCH_SUBMISSIONS):
+            chunk = submissions[i:i + MAX_BATCH_SUBMISSIONS]
+            response = client.post('/submit-quiz/batch', json={'submissions': chunk})
+            assert response.status_code == 200, response.json
+            batch_scores += [r['score'] for r in response.json['results']]
+        batch = time.perf_counter() - started
+        assert batch_scores == expected
+
+        assert QuizResult.query.count() == 2 * num_students
+
+    print(f'{num_students} submissions x {num_questions} questions')
+    print(f'  scoring only   python loop {loop_scoring * 1000:9.1f} ms   numpy {vector_scoring * 1000:9.1f} ms')
+    print(f'  end to end     per request {per_request * 1000:9.1f} ms   batch {batch * 1000:9.1f} ms '
+          f'({per_request / batch:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Seconds to find a book's chapters and get their text, on a synthetic
+textbook with an outline: the old path (extract every page, scan each for a
+"Chapter" heading), reading the chapter ranges from the outline alone,
+extracting only one selected chapter, and extracting every chapter
+through the outline serially and on the process pool.
+
+Run from backend/:  python -m benchmarks.bench_chapter_detection [pages] [pages_per_chapter] [workers]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic_pdf import textbook_pdf
+from services.pdf_service import PDFService
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - started, result
+
+
+def main():
+    num_pages = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    per_chapter = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else (os.cpu_count() or 1)
+    work_dir = tempfile.mkdtemp(prefix='quizzo-chapters-')
+    path = os.path.join(work_dir, 'book.pdf')
+    with open(path, 'wb') as f:
+        f.write(textbook_pdf(num_pages, per_chapter, outline=True))
+
+    service = PDFService(extract_workers=workers, parallel_min_pages=1)
+    try:
+        # Start the pool up front so its spawn cost is not billed to one mode
+        service._get_executor().submit(len, '').result()
+        seconds, old = timed(lambda: dict(service.split_chapters(service.iter_pages(path, parallel=False))))
+        print(f"{num_pages} pages, {len(old)} chapters, {workers} workers")
+        print(f"  {'headings (old)':22} {seconds:8.3f} s")
+
+        seconds, chapters = timed(lambda: service.outline_chapters(path))
+        print(f"  {'outline only':22} {seconds:8.3f} s  ({len(chapters)} chapter ranges, no text)")
+
+        middle = len(chapters) // 2
+        seconds, selected = timed(lambda: list(service.extract_chapters(path, chapters, selected=[middle])))
+        assert selected[0][1] == old[selected[0][0]]
+        print(f"  {'one selected chapter':22} {seconds:8.3f} s")
+
+        for name, parallel in [('all chapters, serial', False), ('all chapters, parallel', True)]:
+            seconds, texts = timed(lambda: dict(service.extract_chapters(path, chapters, parallel=parallel)))
+            assert texts == old
+            print(f"  {name:22} {seconds:8.3f} s")
+    finally:
+        if service._executor is not None:
+            service._executor.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""Cold start of the API process: time from interpreter start to an app
+that can answer, and to its first requests, each measured in a fresh
+process against an already-initialised database.
+
+Modes:
+
+    lazy    create_app() as it ships: no schema work, PyPDF2 and numpy
+            loaded on first use
+    eager   the same app plus the startup work the separate apps used to
+            do: importing the PDF service and scoring modules and running
+            create_all() and the migrations on every start
+
+Run from backend/:  python -m benchmarks.bench_cold_start [runs]
+"""
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_child(mode):
+    started = time.perf_counter()
+    from app import create_app, db
+    imported = time.perf_counter()
+    app = create_app()
+    if mode == 'eager':
+        import services.pdf_service  # noqa: F401
+        import services.scoring  # noqa: F401
+        from migrations import init_schema
+        with app.app_context():
+            init_schema(db)
+    ready = time.perf_counter()
+    heavy = {name: name in sys.modules for name in ('PyPDF2', 'numpy')}
+
+    client = app.test_client()
+    timings = {}
+    for name, url in (('first /quizzes', '/quizzes'),
+                      ('first PDF request', '/api/pdf/textbooks/1/structure')):
+        request_started = time.perf_counter()
+        client.get(url)
+        timings[name] = (time.perf_counter() - request_started) * 1000
+    print(json.dumps({
+        'import': (imported - started) * 1000,
+        'create_app': (ready - imported) * 1000,
+        'ready': (ready - started) * 1000,
+        **timings,
+        'heavy': heavy,
+        'modules': len(sys.modules)
+    }))
+
+
+def measure(mode, env, work_dir, runs):
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_cold_start', '--child', mode],
+            cwd=work_dir, env=env, capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return samples
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    work_dir = tempfile.mkdtemp(prefix='quizzo-cold-start-')
+    env = dict(os.environ,
+               DATABASE_URL='sqlite:///' + os.path.join(work_dir, 'quizzes.db'),
+               JOBS_DB_PATH=os.path.join(work_dir, 'jobs.db'),
+               CONTENT_CACHE_DIR=os.path.join(work_dir, 'content_cache'),
+               GENERATION_CACHE_DIR=os.path.join(work_dir, 'generation_cache'),
+               LOG_LEVEL='WARNING',
+               PYTHONPATH=BACKEND_DIR)
+    os.environ.update(env)
+    # uploads/ is relative to the working directory
+    os.chdir(work_dir)
+
+    from app import create_app
+    from benchmarks.seed import seed
+    seed(create_app({'BLUEPRINTS': ()}), 20, 5, 10, 5)
+    # The structure endpoint needs a PDF on disk for its textbook
+    from benchmarks.synthetic_pdf import textbook_pdf
+    from models.models import Textbook
+    from app import db
+    app = create_app({'BLUEPRINTS': ()})
+    with app.app_context():
+        textbook = db.session.get(Textbook, 1)
+        textbook.file_path = os.path.join(work_dir, 'book.pdf')
+        with open(textbook.file_path, 'wb') as f:
+            f.write(textbook_pdf(20, 5, outline=True))
+        db.session.commit()
+
+    print(f'median of {runs} fresh processes per mode, {os.cpu_count()} CPUs')
+    columns = ['import', 'create_app', 'ready', 'first /quizzes', 'first PDF request']
+    print(f"  {'mode':6s}" + ''.join(f'{c:>19s}' for c in columns) + '   loaded at ready')
+    try:
+        for mode in ('eager', 'lazy'):
+            samples = measure(mode, env, work_dir, runs)
+            medians = [statistics.median(s[c] for s in samples) for c in columns]
+            loaded = ', '.join(name for name, present in samples[0]['heavy'].items() if present) or 'neither'
+            print(f'  {mode:6s}' + ''.join(f'{m:16.1f} ms' for m in medians) +
+                  f'   {loaded} ({samples[0]["modules"]} modules)')
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 2 and sys.argv[1] == '--child':
+        run_child(sys.argv[2])
+    else:
+        main()
@@ -0,0 +1,62 @@
+"""Bytes on the wire and p50 latency for the quiz content endpoints, for a
+client that neither compresses nor revalidates (the old behaviour) versus one
+sending Accept-Encoding and If-None-Match.
+
+Run from backend/:  python -m benchmarks.bench_http_cache [quizzes] [questions_per_quiz] [requests]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+DB_DIR = tempfile.mkdtemp(prefix='quizzo-http-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(DB_DIR, 'quizzes.db')
+os.environ.setdefault('JOBS_DB_PATH', os.path.join(DB_DIR, 'jobs.db'))
+
+from app import create_app
+from benchmarks.seed import seed
+
+
+def measure(client, url, requests, revalidate):
+    headers = {'Accept-Encoding': 'gzip, br'} if revalidate else {}
+    if revalidate:
+        etag = client.get(url, headers=headers).headers.get('ETag')
+        headers['If-None-Match'] = etag
+    latencies, sizes, statuses = [], [], set()
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = client.get(url, headers=headers)
+        latencies.append(time.perf_counter() - started)
+        sizes.append(len(response.get_data()))
+        statuses.add(response.status_code)
+    return statistics.median(latencies) * 1000, statistics.mean(sizes), statuses
+
+
+def measure_compressed(client, url):
+    response = client.get(url, headers={'Accept-Encoding': 'gzip, br'})
+    return len(response.get_data()), response.headers.get('Content-Encoding')
+
+
+def main_():
+    num_quizzes = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    per_quiz = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    requests = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    app = create_app()
+    quiz_id = seed(app, 1, num_quizzes, per_quiz, 0)['quiz_ids'][0]
+
+    endpoints = ['/quizzes?limit=200', f'/quizzes/{quiz_id}/questions', f'/api/quiz/{quiz_id}']
+    print(f'{num_quizzes} quizzes x {per_quiz} questions, {requests} requests per case')
+    client = app.test_client()
+    for url in endpoints:
+        plain_p50, plain_bytes, _ = measure(client, url, requests, revalidate=False)
+        compressed_bytes, encoding = measure_compressed(client, url)
+        cond_p50, cond_bytes, statuses = measure(client, url, requests, revalidate=True)
+        print(f'  {url}')
+        print(f'    plain 200        p50 {plain_p50:7.2f} ms   body {plain_bytes:9.0f} B')
+        print(f'    compressed 200   {"":17s}body {compressed_bytes:9.0f} B ({encoding})')
+        print(f'    revalidated {sorted(statuses)} p50 {cond_p50:7.2f} ms   body {cond_bytes:9.0f} B')
+
+
+if __name__ == '__main__':
+    main_()
@@ -0,0 +1,78 @@
+"""Rows/sec for persisting an ingested book: the old per-row session.add loop
+(one commit per chapter) versus IngestionWriter's chunked bulk inserts.
+
+Run from backend/:  python -m benchmarks.bench_ingestion_writes [chapters] [questions_per_chapter]
+"""
+import os
+import sys
+import tempfile
+import time
+
+DB_DIR = tempfile.mkdtemp(prefix='quizzo-ingest-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(DB_DIR, 'textbooks.db')
+os.environ.setdefault('JOBS_DB_PATH', os.path.join(DB_DIR, 'jobs.db'))
+
+from app import create_app, db
+from migrations import init_schema
+from models.models import Textbook, Chapter, Question
+from services.ingestion_store import IngestionWriter
+
+
+def generated_book(num_chapters, per_chapter):
+    return [(f'Chapter {c + 1}', [{
+        'text': f'What is the main topic of sentence {c}-{q}?',
+        'options': ['Topic A', 'Topic B', 'Topic C', 'Topic D'],
+        'correct_answer': 'Topic A',
+        'difficulty': 'medium'
+    } for q in range(per_chapter)]) for c in range(num_chapters)]
+
+
+def new_textbook():
+    textbook = Textbook(title='Benchmark', file_path='unused.pdf')
+    db.session.add(textbook)
+    db.session.commit()
+    return textbook
+
+
+def loop_insert(book):
+    """The ingestion loop as it was before IngestionWriter."""
+    textbook = new_textbook()
+    for chapter_title, questions in book:
+        chapter = Chapter(title=chapter_title, number=len(textbook.chapters) + 1, textbook_id=textbook.id)
+        db.session.add(chapter)
+        db.session.commit()
+        for q in questions:
+            db.session.add(Question(text=q['text'], correct_answer=q['correct_answer'],
+                                    options=q['options'], difficulty=q['difficulty'], chapter_id=chapter.id))
+    db.session.commit()
+
+
+def bulk_insert(book):
+    textbook_id = new_textbook().id
+    writer = IngestionWriter(db.session, Question, chapter_model=Chapter)
+    for number, (chapter_title, questions) in enumerate(book, start=1):
+        writer.add_chapter([dict(q) for q in questions],
+                           chapter={'title': chapter_title, 'number': number, 'textbook_id': textbook_id})
+    writer.flush()
+    db.session.commit()
+    assert len(writer.question_ids) == sum(len(q) for _, q in book)
+
+
+def main():
+    num_chapters = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    per_chapter = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    book = generated_book(num_chapters, per_chapter)
+    rows = num_chapters * (per_chapter + 1)
+    print(f'{num_chapters} chapters x {per_chapter} questions ({rows} rows)')
+    app = create_app({'BLUEPRINTS': ()})
+    with app.app_context():
+        init_schema(db)
+        for name, insert_book in [('per-row loop', loop_insert), ('IngestionWriter', bulk_insert)]:
+            started = time.perf_counter()
+            insert_book(book)
+            elapsed = time.perf_counter() - started
+            print(f'  {name:16s} {elapsed * 1000:9.1f} ms   {rows / elapsed:10.0f} rows/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Chapters/sec through LLMGenerator against the local stub: one chapter per
+request with one request in flight (a naive sequential client) versus
+batched, concurrent requests.
+
+Run from backend/:  python -m benchmarks.bench_llm_generation [chapters] [stub_latency] [fail_rate]
+"""
+import sys
+import time
+
+from benchmarks.llm_stub import start_stub
+from benchmarks.synthetic_pdf import SENTENCE, TOPICS
+from services.pdf_service import PDFService
+from services.question_generator import LLMGenerator
+from services.metrics import REGISTRY
+
+
+def chapter_text(number, sentences=60):
+    return ' '.join(SENTENCE.format(page=number, line=i, topic=TOPICS[(number + i) % len(TOPICS)]) + '.'
+                    for i in range(sentences))
+
+
+def run(service, chapters, concurrency, batch_chapters, port):
+    service.generator = LLMGenerator(
+        f'http://127.0.0.1:{port}/v1', 'stub-model', service._parse_questions_from_text,
+        concurrency=concurrency, batch_chapters=batch_chapters, backoff=0.05
+    )
+    started = time.perf_counter()
+    generated = list(service.generate_chapter_questions(chapters))
+    elapsed = time.perf_counter() - started
+    questions = sum(len(q) for _, q in generated)
+    return elapsed, questions
+
+
+if __name__ == '__main__':
+    num_chapters = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    fail_rate = float(sys.argv[3]) if len(sys.argv) > 3 else 0.0
+    chapters = [(f'Chapter {i + 1}', chapter_text(i)) for i in range(num_chapters)]
+    stub = start_stub(latency=latency, fail_rate=fail_rate)
+    service = PDFService(extract_workers=1)
+
+    print(f"{num_chapters} chapters, stub latency {latency}s, fail rate {fail_rate}")
+    for concurrency, batch in [(1, 1), (4, 1), (4, 2), (8, 4)]:
+        requests_before = stub.requests
+        fallbacks = REGISTRY.get('pdf_fallback_chapters_total')
+        fallbacks_before = fallbacks.value() if fallbacks else 0
+        stub.max_in_flight = 0
+        elapsed, questions = run(service, chapters, concurrency, batch, stub.server_port)
+        fallbacks = REGISTRY.get('pdf_fallback_chapters_total')
+        print(f"  concurrency {concurrency} x {batch} chapters/request: {elapsed:6.2f} s, "
+              f"{num_chapters / elapsed:6.1f} chapters/s, {stub.requests - requests_before} requests "
+              f"(max {stub.max_in_flight} in flight), {questions} questions, "
+              f"{(fallbacks.value() if fallbacks else 0) - fallbacks_before:.0f} fallbacks")
+    stub.shutdown()
@@ -0,0 +1,110 @@
+"""Milliseconds per quiz for assembling a quiz from one large chapter: the
+old create_quiz (load every question, take the first n), a difficulty-aware
+version that loads every question and its statistics and samples in Python,
+and quiz_assembly.assemble drawing through the chapter's difficulty index.
+
+Run from backend/:  python -m benchmarks.bench_quiz_assembly [questions] [quizzes] [num_questions]
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+DB_DIR = tempfile.mkdtemp(prefix='quizzo-assembly-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(DB_DIR, 'textbooks.db')
+os.environ.setdefault('JOBS_DB_PATH', os.path.join(DB_DIR, 'jobs.db'))
+
+from sqlalchemy import insert
+from app import create_app, db
+from migrations import init_schema
+from models.models import Textbook, Chapter, Question, QuestionStats
+from services import analytics, quiz_assembly
+from services.ingestion_store import IngestionWriter
+
+
+def seed_chapter(num_questions, rng):
+    """One chapter of num_questions, half of them with answer statistics."""
+    textbook = Textbook(title='Benchmark', file_path='unused.pdf')
+    db.session.add(textbook)
+    db.session.commit()
+    writer = IngestionWriter(db.session, Question, chapter_model=Chapter)
+    writer.add_chapter([{
+        'text': f'What is the main topic of sentence {i}?',
+        'options': ['Topic A', 'Topic B', 'Topic C', 'Topic D'],
+        'correct_answer': 'Topic A',
+        'difficulty': rng.choice(quiz_assembly.LEVELS)
+    } for i in range(num_questions)], chapter={'title': 'Chapter 1', 'number': 1, 'textbook_id': textbook.id})
+    writer.flush()
+    stats = []
+    for question_id in writer.question_ids[::2]:
+        attempts = rng.randint(quiz_assembly.MIN_ATTEMPTS, 200)
+        stats.append({'question_id': question_id, 'attempts': attempts, 'correct': rng.randint(0, attempts),
+                      'timed': attempts, 'time_sum': attempts * rng.uniform(5, 90), 'time_sq_sum': 0})
+    for start in range(0, len(stats), 1000):
+        db.session.execute(insert(QuestionStats), stats[start:start + 1000])
+    started = time.perf_counter()
+    quiz_assembly.index_chapters(db.session, writer.chapter_ids)
+    db.session.commit()
+    return writer.chapter_ids[0], time.perf_counter() - started
+
+
+def first_n(chapter_id, num_questions, rng):
+    """create_quiz before the difficulty index."""
+    return [q.id for q in Question.query.filter_by(chapter_id=chapter_id).all()[:num_questions]]
+
+
+def load_and_sample(chapter_id, num_questions, rng):
+    """Difficulty-aware without the index: classify every question per request."""
+    questions = Question.query.filter_by(chapter_id=chapter_id).all()
+    summaries = {}
+    ids = [q.id for q in questions]
+    for start in range(0, len(ids), quiz_assembly.CHUNK_SIZE):
+        summaries.update(analytics.question_summaries(db.session, ids[start:start + quiz_assembly.CHUNK_SIZE]))
+    by_level = {level: [] for level in quiz_assembly.LEVELS}
+    for q in questions:
+        by_level[quiz_assembly.question_level(q.difficulty, summaries[q.id])].append(q.id)
+    wanted = quiz_assembly.allocate(num_questions, quiz_assembly.MIXES['medium'])
+    return [qid for level in quiz_assembly.LEVELS
+            for qid in rng.sample(by_level[level], min(wanted[level], len(by_level[level])))]
+
+
+def indexed(chapter_id, num_questions, rng):
+    picked = quiz_assembly.assemble(db.session, chapter_id, num_questions, quiz_assembly.MIXES['medium'], rng)
+    db.session.commit()
+    return [question_id for question_id, _ in picked]
+
+
+def measure(assemble, chapter_id, quizzes, num_questions):
+    rng = random.Random(7)
+    timings = []
+    served = set()
+    for _ in range(quizzes):
+        started = time.perf_counter()
+        served.update(assemble(chapter_id, num_questions, rng))
+        timings.append((time.perf_counter() - started) * 1000)
+        db.session.expunge_all()
+    return statistics.median(timings), sorted(timings)[int(len(timings) * 0.95) - 1], len(served)
+
+
+def main():
+    num_questions = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    quizzes = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    per_quiz = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    app = create_app({'BLUEPRINTS': ()})
+    with app.app_context():
+        init_schema(db)
+        chapter_id, index_seconds = seed_chapter(num_questions, random.Random(42))
+        print(f"{num_questions} questions in one chapter, indexed in {index_seconds:.2f} s; "
+              f"{quizzes} quizzes of {per_quiz}")
+        for name, assemble in [('first n (old)', first_n), ('load + sample', load_and_sample),
+                               ('indexed draw', indexed)]:
+            rounds = quizzes if assemble is indexed else max(3, quizzes // 10)
+            p50, p95, distinct = measure(assemble, chapter_id, rounds, per_quiz)
+            print(f"  {name:15} p50 {p50:8.2f} ms  p95 {p95:8.2f} ms  "
+                  f"{distinct} distinct questions over {rounds} quizzes")
+
+
+if __name__ == '__main__':
+    main()
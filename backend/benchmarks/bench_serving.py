@@ -0,0 +1,96 @@
+"""Concurrency of the quiz app under Flask's development server and under
+serve.py's ASGI mode (uvicorn workers): concurrent virtual students (register, list
+quizzes, fetch questions, submit, view result) while PDFs are uploaded
+alongside them, each server started with serve.py on a seeded database.
+
+Run from backend/:  python -m benchmarks.bench_serving [students] [flows] [workers] [threads]
+"""
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.loadtest import HTTPTransport, print_table, run_students, run_uploads
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for(port: int, process, seconds: float = 60):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'server exited with {process.returncode}')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'server did not listen on {port}')
+
+
+def run_mode(name, server_args, env, work_dir, students, flows, rng_seed):
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(BACKEND_DIR, 'serve.py'), '--bind', f'127.0.0.1:{port}'] + server_args,
+        cwd=work_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_for(port, process)
+        transport = HTTPTransport('127.0.0.1', port)
+        uploads = threading.Thread(target=run_uploads, args=(HTTPTransport('127.0.0.1', port), 5, 200))
+        uploads.start()
+        result = run_students(transport, students, flows, rng_seed)
+        uploads.join()
+    finally:
+        process.terminate()
+        process.wait(30)
+    endpoints = result['endpoints']
+    p95 = max(row['p95_ms'] for row in endpoints.values())
+    print(f"\n{name}: {result['flows_per_sec']} flows/s, worst endpoint p95 {p95:.1f} ms")
+    print_table(name, endpoints)
+    return result
+
+
+def main():
+    students = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    flows = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    workers = sys.argv[3] if len(sys.argv) > 3 else str(os.cpu_count() or 1)
+    threads = sys.argv[4] if len(sys.argv) > 4 else '8'
+    work_dir = tempfile.mkdtemp(prefix='quizzo-serving-')
+    env = dict(os.environ,
+               DATABASE_URL='sqlite:///' + os.path.join(work_dir, 'quizzes.db'),
+               JOBS_DB_PATH=os.path.join(work_dir, 'jobs.db'),
+               CONTENT_CACHE_DIR=os.path.join(work_dir, 'content_cache'),
+               # uploads are ingested in the background, one job process at a time
+               INGEST_WORKERS='1',
+               LOG_LEVEL='WARNING',
+               PYTHONPATH=BACKEND_DIR)
+    os.environ.update(env)
+    os.chdir(work_dir)
+
+    from app import create_app
+    from benchmarks.seed import seed
+    seed(create_app({'BLUEPRINTS': ()}), 200, 50, 10, 20, 1)
+    print(f"{students} students x {flows} flows with 5 concurrent 200-page uploads, {os.cpu_count()} CPUs")
+
+    try:
+        # Separate seeds, so the second run registers new students
+        run_mode('dev server', ['--server', 'dev'], env, work_dir, students, flows, 1)
+        run_mode(f'asgi {workers}x{threads}', ['--workers', workers, '--threads', threads],
+                 env, work_dir, students, flows, 1000)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Submit throughput under concurrency with the default SQLite settings
+versus the tuned configuration from database.py.
+
+Run from backend/:  python -m benchmarks.bench_sqlite_concurrency [threads] [seconds]
+
+Each configuration runs in its own process (settings are read at import)
+against a fresh database file. Half the threads submit quizzes, the other
+half read results and the quiz list, as a class taking an exam would.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+CONFIGS = {
+    'rollback journal (old defaults)': {
+        'SQLITE_WAL': '0', 'SQLITE_SYNCHRONOUS': 'FULL', 'SQLITE_CACHE_SIZE_KB': '2000',
+        'SQLITE_MMAP_SIZE': '0', 'SQLITE_READ_POOL': '0',
+    },
+    'WAL + pragmas': {'SQLITE_READ_POOL': '0'},
+    'WAL + pragmas + read pool': {'SQLITE_READ_POOL': '1'},
+}
+
+
+def run_worker(threads, seconds):
+    from app import create_app
+    from benchmarks.seed import seed
+
+    app = create_app()
+    seeded = seed(app, 1, 1, 20, 0)
+    quiz_id = seeded['quiz_ids'][0]
+    question_ids = [str(q['id']) for q in app.test_client().get(f'/quizzes/{quiz_id}/questions').json]
+
+    counts = {'submits': 0, 'reads': 0, 'errors': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+    submission = {'quiz_id': quiz_id, 'student_id': seeded['student_ids'][0],
+                  'answers': {qid: 'Topic A' for qid in question_ids},
+                  'question_times': {qid: 10 for qid in question_ids}}
+
+    def submitter():
+        client = app.test_client()
+        while time.perf_counter() < deadline:
+            ok = client.post('/submit-quiz', json=submission).status_code == 200
+            with lock:
+                counts['submits' if ok else 'errors'] += 1
+
+    def reader():
+        client = app.test_client()
+        while time.perf_counter() < deadline:
+            ok = client.get('/results/1').status_code in (200, 404) and \
+                client.get('/quizzes').status_code == 200
+            with lock:
+                counts['reads' if ok else 'errors'] += 1
+
+    workers = [threading.Thread(target=submitter if i % 2 == 0 else reader) for i in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    print(json.dumps(counts))
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    print(f'{threads} threads, {seconds:.0f}s per configuration')
+    for name, env in CONFIGS.items():
+        db_dir = tempfile.mkdtemp(prefix='quizzo-concurrency-')
+        proc_env = {**os.environ, **env,
+                    'DATABASE_URL': 'sqlite:///' + os.path.join(db_dir, 'quizzes.db'),
+                    'JOBS_DB_PATH': os.path.join(db_dir, 'jobs.db')}
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_sqlite_concurrency', '--worker', str(threads), str(seconds)],
+            env=proc_env, capture_output=True, text=True, check=True
+        ).stdout
+        counts = json.loads(output.strip().splitlines()[-1])
+        print(f"  {name:32s} submits/s {counts['submits'] / seconds:8.1f}   "
+              f"reads/s {counts['reads'] / seconds:8.1f}   errors {counts['errors']}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--worker':
+        run_worker(int(sys.argv[2]), float(sys.argv[3]))
+    else:
+        main()
@@ -0,0 +1,132 @@
+"""Offline stand-in for an OpenAI-compatible /v1/chat/completions endpoint.
+
+Answers the prompts LLMGenerator sends with questions built from the
+chapter's own sentences, after a configurable delay, and can inject
+retryable failures, so ingestion and generation throughput can be
+exercised without a model:
+
+    python -m benchmarks.llm_stub --port 8089 --latency 0.5 --fail-rate 0.05
+    QUESTION_GENERATOR=llm LLM_BASE_URL=http://127.0.0.1:8089/v1 python main.py
+
+Run from backend/.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CHAPTER_RE = re.compile(r'^### Chapter (\d+)\n(.*?)(?=^### Chapter \d+\n|\Z)', re.MULTILINE | re.DOTALL)
+COUNT_RE = re.compile(r'Write (\d+) multiple-choice questions')
+
+
+def fake_questions(chapter_text: str, count: int, rng: random.Random) -> str:
+    sentences = [s.strip().replace('\n', ' ') for s in chapter_text.split('.') if len(s.strip()) > 40]
+    lines = []
+    for i in range(count):
+        sentence = sentences[i % len(sentences)] if sentences else f'Fact number {i}'
+        words = sentence.split()
+        lines.append(f'{i + 1}. Which statement is supported by the text about "{" ".join(words[:4])}"?')
+        lines.append(f'a) {sentence[:90]}')
+        for letter in 'bcd':
+            distractor = words[:]
+            rng.shuffle(distractor)
+            lines.append(f'{letter}) {" ".join(distractor)[:90]}')
+    return '\n'.join(lines)
+
+
+def completion(body: dict, rng: random.Random) -> dict:
+    prompt = body['messages'][-1]['content']
+    count_match = COUNT_RE.search(prompt)
+    count = int(count_match.group(1)) if count_match else 5
+    sections = [f'### Chapter {number}\n{fake_questions(text, count, rng)}'
+                for number, text in CHAPTER_RE.findall(prompt)]
+    content = '\n\n'.join(sections)
+    prompt_tokens = sum(len(m['content']) for m in body['messages']) // 4
+    completion_tokens = len(content) // 4
+    return {
+        "id": f"stub-{rng.getrandbits(32):08x}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get('model', 'stub'),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                  "total_tokens": prompt_tokens + completion_tokens}
+    }
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency: float = 0.2, fail_rate: float = 0.0, seed: int = 0):
+        super().__init__(address, StubHandler)
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+        self.max_in_flight = 0
+        self._in_flight = 0
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status: int, payload: dict, headers=()):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            return self._reply(404, {"error": {"message": "not found"}})
+        with server.lock:
+            server.requests += 1
+            server._in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server._in_flight)
+            fail = server.rng.random() < server.fail_rate
+            rng = random.Random(server.rng.getrandbits(64))
+        try:
+            time.sleep(server.latency)
+            if fail:
+                with server.lock:
+                    server.failures += 1
+                return self._reply(503, {"error": {"message": "stub overloaded"}}, [('Retry-After', '0')])
+            self._reply(200, completion(body, rng))
+        finally:
+            with server.lock:
+                server._in_flight -= 1
+
+
+def start_stub(port: int = 0, latency: float = 0.2, fail_rate: float = 0.0) -> StubServer:
+    """Serve in a background thread; the bound port is server.server_port."""
+    server = StubServer(('127.0.0.1', port), latency, fail_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Offline OpenAI-compatible stub for question generation')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.5, help='seconds per request')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='fraction of requests answered 503')
+    args = parser.parse_args()
+    server = StubServer(('127.0.0.1', args.port), args.latency, args.fail_rate)
+    print(f'LLM stub on http://127.0.0.1:{args.port}/v1 (latency {args.latency}s, fail rate {args.fail_rate})')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
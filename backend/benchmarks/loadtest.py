@@ -0,0 +1,366 @@
+"""Load test for the quiz API: concurrent virtual students running
+register -> list quizzes -> fetch questions -> submit -> view result against a
+seeded database, plus /upload and PDFService timings on synthetic PDFs.
+
+Reports throughput and latency percentiles per endpoint and writes the
+numbers to a JSON file, so runs can be compared across commits:
+
+    python -m benchmarks.loadtest --transport client --students 20 --flows 10
+    python -m benchmarks.loadtest --transport http --compare benchmarks/results/<earlier>.json
+
+--transport client drives app.test_client() in-process (no network, shows
+the application's own cost); http serves the app with a threaded Werkzeug
+WSGI server on localhost and talks to it over keep-alive connections.
+Everything (database, job queue, uploads, content cache) lives in a
+temporary directory; queued ingestion jobs are never run.
+
+Run from backend/.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, 'benchmarks', 'results')
+
+
+class ClientTransport:
+    """Flask test client, one per thread."""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method: str, path: str, body=None, headers=None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        if isinstance(body, (bytes, bytearray)):
+            response = client.open(path, method=method, data=body, headers=headers)
+        else:
+            response = client.open(path, method=method, json=body, headers=headers)
+        return response.status_code, response.get_data()
+
+
+class HTTPTransport:
+    """Keep-alive HTTP connection per thread to a live server."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._local = threading.local()
+
+    def request(self, method: str, path: str, body=None, headers=None):
+        headers = dict(headers or {})
+        if body is not None and not isinstance(body, (bytes, bytearray)):
+            body = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+        for attempt in range(2):
+            conn = getattr(self._local, 'conn', None)
+            if conn is None:
+                conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                return response.status, response.read()
+            except (http.client.HTTPException, ConnectionError):
+                # the server closed an idle keep-alive connection; retry once on a new one
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+
+
+def serve(app):
+    """Start a threaded Werkzeug server on a free port; returns (server, port)."""
+    from werkzeug.serving import make_server
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.server_port
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def call(self, transport, endpoint: str, method: str, path: str, body=None, headers=None, ok=(200,)):
+        started = time.perf_counter()
+        try:
+            status, data = transport.request(method, path, body, headers)
+        except Exception:
+            status, data = None, b''
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.latencies[endpoint].append(elapsed)
+            if status not in ok:
+                self.errors[endpoint] += 1
+        return status, data
+
+    def summary(self, wall_seconds: float) -> Dict:
+        return {endpoint: summarise(samples, self.errors[endpoint], wall_seconds)
+                for endpoint, samples in sorted(self.latencies.items())}
+
+
+def percentile(sorted_samples: List[float], pct: float) -> float:
+    index = min(len(sorted_samples) - 1, max(0, round(pct / 100 * len(sorted_samples)) - 1))
+    return sorted_samples[index]
+
+
+def summarise(samples: List[float], errors: int, wall_seconds: float) -> Dict:
+    ordered = sorted(samples)
+    ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "throughput_rps": round(len(samples) / wall_seconds, 1) if wall_seconds else None,
+        "mean_ms": ms(statistics.fmean(ordered)),
+        "p50_ms": ms(percentile(ordered, 50)),
+        "p90_ms": ms(percentile(ordered, 90)),
+        "p95_ms": ms(percentile(ordered, 95)),
+        "p99_ms": ms(percentile(ordered, 99)),
+        "max_ms": ms(ordered[-1])
+    }
+
+
+def student_flow(transport, recorder: Recorder, rng: random.Random, student_no: int, flows: int):
+    status, data = recorder.call(transport, 'POST /register', 'POST', '/register', {
+        "name": f"Virtual Student {student_no}",
+        "email": f"virtual-{student_no}-{rng.getrandbits(32)}@example.com"
+    })
+    if status != 200:
+        return
+    student_id = json.loads(data)["student_id"]
+
+    for _ in range(flows):
+        status, data = recorder.call(transport, 'GET /quizzes', 'GET', '/quizzes?limit=50')
+        if status != 200 or not json.loads(data):
+            continue
+        quiz_id = rng.choice(json.loads(data))["id"]
+
+        status, data = recorder.call(transport, 'GET /quizzes/<id>/questions', 'GET',
+                                     f'/quizzes/{quiz_id}/questions')
+        if status != 200:
+            continue
+        questions = json.loads(data)
+        answers = {str(q["id"]): rng.choice(q["options"]) for q in questions}
+        question_times = {str(q["id"]): rng.randint(2, 60) for q in questions}
+
+        status, data = recorder.call(transport, 'POST /submit-quiz', 'POST', '/submit-quiz', {
+            "quiz_id": quiz_id,
+            "student_id": student_id,
+            "answers": answers,
+            "question_times": question_times
+        })
+        if status != 200:
+            continue
+        result_id = json.loads(data)["result_id"]
+        recorder.call(transport, 'GET /results/<id>', 'GET', f'/results/{result_id}')
+
+
+def run_students(transport, students: int, flows: int, rng_seed: int) -> Dict:
+    recorder = Recorder()
+    threads = [
+        threading.Thread(target=student_flow,
+                         args=(transport, recorder, random.Random(rng_seed + i), i, flows))
+        for i in range(students)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    return {
+        "wall_seconds": round(wall, 3),
+        "flows_per_sec": round(students * flows / wall, 1),
+        "endpoints": recorder.summary(wall)
+    }
+
+
+def run_uploads(transport, uploads: int, pages: int) -> Dict:
+    """POST distinct synthetic PDFs to /upload (each a cache miss that enqueues a job)."""
+    from benchmarks.synthetic_pdf import textbook_pdf
+    boundary = 'quizzo-loadtest-boundary'
+    bodies = []
+    for i in range(uploads):
+        pdf = textbook_pdf(pages, seed=i)
+        bodies.append(
+            (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="book{i}.pdf"\r\n'
+             'Content-Type: application/pdf\r\n\r\n').encode() + pdf + f'\r\n--{boundary}--\r\n'.encode()
+        )
+    headers = {'Content-Type': f'multipart/form-data; boundary={boundary}'}
+    recorder = Recorder()
+    started = time.perf_counter()
+    for body in bodies:
+        recorder.call(transport, 'POST /upload', 'POST', '/upload', body, headers, ok=(201, 202))
+    wall = time.perf_counter() - started
+    return {"pages_per_pdf": pages, "endpoints": recorder.summary(wall)}
+
+
+def run_pdf_service(page_counts: List[int], work_dir: str) -> List[Dict]:
+    """Time PDFService's stages on synthetic PDFs of increasing size."""
+    from benchmarks.synthetic_pdf import textbook_pdf
+    from services.pdf_service import PDFService
+    service = PDFService(extract_workers=1)
+    timings = []
+    for pages in page_counts:
+        path = os.path.join(work_dir, f'synthetic-{pages}.pdf')
+        with open(path, 'wb') as f:
+            f.write(textbook_pdf(pages))
+        started = time.perf_counter()
+        page_texts = list(service.iter_pages(path))
+        extracted = time.perf_counter()
+        chapters = list(service.split_chapters(page_texts))
+        split = time.perf_counter()
+        questions = sum(len(service.generate_questions(text)) for _, text in chapters)
+        generated = time.perf_counter()
+        timings.append({
+            "pages": pages,
+            "chapters": len(chapters),
+            "questions": questions,
+            "extract_ms": round((extracted - started) * 1000, 1),
+            "split_ms": round((split - extracted) * 1000, 1),
+            "generate_ms": round((generated - split) * 1000, 1),
+            "pages_per_sec": round(pages / (extracted - started), 1)
+        })
+    return timings
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict, previous: Dict):
+    print(f"\nCompared with {previous['meta'].get('commit')} ({previous['meta'].get('timestamp')}):")
+    for endpoint, stats in current["students"]["endpoints"].items():
+        before = previous.get("students", {}).get("endpoints", {}).get(endpoint)
+        if not before:
+            continue
+        print(f"  {endpoint:32} p50 {before['p50_ms']:8.2f} -> {stats['p50_ms']:8.2f} ms   "
+              f"p95 {before['p95_ms']:8.2f} -> {stats['p95_ms']:8.2f} ms   "
+              f"{before['throughput_rps']:8.1f} -> {stats['throughput_rps']:8.1f} req/s")
+
+
+def print_table(title: str, endpoints: Dict):
+    print(f"\n{title}")
+    print(f"  {'endpoint':32} {'reqs':>6} {'err':>4} {'req/s':>8} {'p50':>8} {'p90':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for endpoint, s in endpoints.items():
+        print(f"  {endpoint:32} {s['requests']:6d} {s['errors']:4d} {s['throughput_rps']:8.1f} "
+              f"{s['p50_ms']:8.2f} {s['p90_ms']:8.2f} {s['p95_ms']:8.2f} {s['p99_ms']:8.2f} {s['max_ms']:8.2f}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--transport', choices=['client', 'http'], default='client')
+    parser.add_argument('--students', type=int, default=20, help='concurrent virtual students')
+    parser.add_argument('--flows', type=int, default=10, help='quiz attempts per student')
+    parser.add_argument('--seed-students', type=int, default=200)
+    parser.add_argument('--seed-quizzes', type=int, default=50)
+    parser.add_argument('--seed-questions', type=int, default=10, help='questions per quiz')
+    parser.add_argument('--seed-results', type=int, default=20, help='results per quiz')
+    parser.add_argument('--uploads', type=int, default=5, help='synthetic PDFs to POST to /upload')
+    parser.add_argument('--upload-pages', type=int, default=20)
+    parser.add_argument('--pdf-pages', default='10,50,200',
+                        help='comma-separated page counts for the PDFService timings ("" to skip)')
+    parser.add_argument('--rng-seed', type=int, default=1)
+    parser.add_argument('--output', help='JSON results path (default benchmarks/results/...)')
+    parser.add_argument('--compare', help='earlier JSON results to print deltas against')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    for name in ('output', 'compare'):
+        if getattr(args, name):
+            setattr(args, name, os.path.abspath(getattr(args, name)))
+    work_dir = tempfile.mkdtemp(prefix='quizzo-load-')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(work_dir, 'quizzes.db')
+    os.environ['JOBS_DB_PATH'] = os.path.join(work_dir, 'jobs.db')
+    os.environ['CONTENT_CACHE_DIR'] = os.path.join(work_dir, 'content_cache')
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    # uploads/ is relative to the working directory
+    sys.path.insert(0, BACKEND_DIR)
+    os.chdir(work_dir)
+
+    from app import create_app
+    from benchmarks.seed import seed
+
+    app = create_app()
+    seeded = seed(app, args.seed_students, args.seed_quizzes, args.seed_questions,
+                  args.seed_results, args.rng_seed)
+    print(f"Seeded {len(seeded['quiz_ids'])} quizzes, {seeded['questions']} questions, "
+          f"{seeded['results']} results in {work_dir}")
+
+    server = None
+    if args.transport == 'http':
+        server, port = serve(app)
+        transport = HTTPTransport('127.0.0.1', port)
+    else:
+        transport = ClientTransport(app)
+
+    try:
+        students = run_students(transport, args.students, args.flows, args.rng_seed)
+        uploads = run_uploads(transport, args.uploads, args.upload_pages) if args.uploads else None
+    finally:
+        if server is not None:
+            server.shutdown()
+    page_counts = [int(p) for p in args.pdf_pages.split(',') if p.strip()]
+    pdf = run_pdf_service(page_counts, work_dir) if page_counts else []
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.utcnow().isoformat(timespec='seconds'),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": vars(args)
+        },
+        "students": students,
+        "uploads": uploads,
+        "pdf_service": pdf
+    }
+
+    print(f"\n{args.students} students x {args.flows} flows over {args.transport}: "
+          f"{students['flows_per_sec']} flows/s in {students['wall_seconds']} s")
+    print_table('Student flow', students["endpoints"])
+    if uploads:
+        print_table(f"Uploads ({args.upload_pages}-page PDFs)", uploads["endpoints"])
+    for row in pdf:
+        print(f"  PDFService {row['pages']:5d} pages: extract {row['extract_ms']:8.1f} ms "
+              f"({row['pages_per_sec']} pages/s), split {row['split_ms']:6.1f} ms, "
+              f"generate {row['generate_ms']:6.1f} ms for {row['questions']} questions")
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"loadtest-{args.transport}-{results['meta']['commit'] or 'nogit'}-"
+                     f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Fill the quiz database with synthetic students, quizzes, questions and
+results, using multi-row inserts so large datasets seed in seconds. Each
+quiz is a whole-book quiz over a one-chapter textbook, as /upload creates.
+
+Run from backend/:  python -m benchmarks.seed sqlite:////tmp/quizzes.db [students] [quizzes] [questions] [results]
+
+The first argument is the DATABASE_URL; the schema is created if missing.
+"""
+import os
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict
+from sqlalchemy import insert
+from services.ingestion_store import bulk_insert
+
+OPTIONS = ['Topic A', 'Topic B', 'Topic C', 'Topic D']
+DIFFICULTIES = ['easy', 'medium', 'hard']
+CHUNK_SIZE = 1000
+
+
+def _insert_chunked(session, model, rows):
+    for start in range(0, len(rows), CHUNK_SIZE):
+        session.execute(insert(model), rows[start:start + CHUNK_SIZE])
+
+
+def seed(app, students: int = 100, quizzes: int = 20, questions_per_quiz: int = 10,
+         results_per_quiz: int = 50, rng_seed: int = 42) -> Dict:
+    """Seed app's database; returns the ids the load generator needs."""
+    from app import db
+    from migrations import init_schema
+    from models.models import Chapter, Question, Quiz, QuizQuestion, QuizResult, Student, Textbook
+    from services import analytics, quiz_assembly
+
+    rng = random.Random(rng_seed)
+    with app.app_context():
+        init_schema(db)
+        student_ids = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(students)]
+        student_keys = bulk_insert(db.session, Student, [{
+            "name": f"Seeded Student {i}",
+            "email": f"seeded-{student_id}@example.com",
+            "student_id": student_id
+        } for i, student_id in enumerate(student_ids)])
+
+        titles = [f"Seeded textbook {i}.pdf" for i in range(quizzes)]
+        textbook_ids = bulk_insert(db.session, Textbook, [
+            {"title": title, "file_path": ""} for title in titles
+        ]) if quizzes else []
+        chapter_ids = bulk_insert(db.session, Chapter, [
+            {"title": "Chapter 1", "number": 1, "textbook_id": textbook_id} for textbook_id in textbook_ids
+        ]) if quizzes else []
+        quiz_ids = bulk_insert(db.session, Quiz, [{"title": title} for title in titles]) if quizzes else []
+
+        question_rows = [{
+            "chapter_id": chapter_id,
+            "text": f"What is the main topic of sentence {q} in seeded chapter {chapter_id}?",
+            "options": OPTIONS,
+            "correct_answer": rng.choice(OPTIONS),
+            "difficulty": rng.choice(DIFFICULTIES)
+        } for chapter_id in chapter_ids for q in range(questions_per_quiz)]
+        question_ids = bulk_insert(db.session, Question, question_rows)
+
+        quiz_for_chapter = dict(zip(chapter_ids, quiz_ids))
+        by_quiz = {}
+        for question_id, row in zip(question_ids, question_rows):
+            by_quiz.setdefault(quiz_for_chapter[row["chapter_id"]], []).append(question_id)
+        _insert_chunked(db.session, QuizQuestion, [
+            {"quiz_id": quiz_id, "question_id": question_id, "order": order}
+            for quiz_id, ids in by_quiz.items() for order, question_id in enumerate(ids, start=1)
+        ])
+
+        now = datetime.utcnow()
+        result_rows = []
+        for quiz_id, ids in by_quiz.items():
+            if not student_keys:
+                break
+            for _ in range(results_per_quiz):
+                answers = {str(question_id): rng.choice(OPTIONS) for question_id in ids}
+                question_times = {question_id: rng.randint(2, 60) for question_id in answers}
+                result_rows.append({
+                    "quiz_id": quiz_id,
+                    "student_id": rng.choice(student_keys),
+                    "score": round(rng.uniform(0, 100), 1),
+                    "time_taken": sum(question_times.values()),
+                    "answers": answers,
+                    "question_times": question_times,
+                    "completed_at": now - timedelta(minutes=rng.randint(0, 60 * 24 * 30))
+                })
+        _insert_chunked(db.session, QuizResult, result_rows)
+
+        # Summary tables and the difficulty index, as submissions and
+        # ingestion would have kept them
+        analytics.rebuild(db.session)
+        quiz_assembly.index_chapters(db.session, chapter_ids)
+        db.session.commit()
+    return {
+        "student_ids": student_ids,
+        "quiz_ids": quiz_ids,
+        "questions": len(question_ids),
+        "results": len(result_rows)
+    }
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    os.environ['DATABASE_URL'] = sys.argv[1]
+    from app import create_app
+    counts = [int(arg) for arg in sys.argv[2:6]]
+    seeded = seed(create_app({'BLUEPRINTS': ()}), *counts)
+    print(f"Seeded {len(seeded['student_ids'])} students, {len(seeded['quiz_ids'])} quizzes, "
+          f"{seeded['questions']} questions and {seeded['results']} results into {sys.argv[1]}")
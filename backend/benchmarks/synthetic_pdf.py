@@ -0,0 +1,97 @@
+"""Minimal synthetic PDFs for benchmarks: text-only pages with a "Chapter N"
+heading every few pages, readable by PyPDF2 and PDFService, optionally with
+an outline (bookmarks) and page labels.
+
+Run from backend/:  python -m benchmarks.synthetic_pdf out.pdf [pages] [pages_per_chapter] [--outline]
+"""
+import sys
+from typing import List, Optional, Tuple
+
+LINES_PER_PAGE = 30
+SENTENCE = ("Sentence {page}-{line} explains how the {topic} of the cell depends on "
+            "the surrounding membrane and the energy it receives")
+TOPICS = ['mitochondria', 'nucleus', 'ribosome', 'cytoplasm', 'vacuole', 'chloroplast']
+
+
+def _escape(text: str) -> str:
+    return text.replace('\\', r'\\').replace('(', r'\(').replace(')', r'\)')
+
+
+def build_pdf(pages: List[List[str]], outline: Optional[List[Tuple[str, int]]] = None,
+              page_labels: Optional[str] = None) -> bytes:
+    """Serialise pages (each a list of text lines) as a PDF 1.4 document.
+
+    outline is a flat list of (title, page_index) bookmarks; page_labels is
+    the raw /Nums array of the catalog's /PageLabels (e.g. "0 << /S /r >>").
+    """
+    count = len(pages)
+    kids = ' '.join(f'{4 + 2 * i} 0 R' for i in range(count))
+    outlines_ref = 4 + 2 * count
+    catalog = '/Type /Catalog /Pages 2 0 R'
+    if outline:
+        catalog += f' /Outlines {outlines_ref} 0 R'
+    if page_labels:
+        catalog += f' /PageLabels << /Nums [{page_labels}] >>'
+    objects = [
+        f'<< {catalog} >>',
+        f'<< /Type /Pages /Kids [{kids}] /Count {count} >>',
+        '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    ]
+    for i, lines in enumerate(pages):
+        objects.append(f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+                       f'/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>')
+        body = 'BT /F1 9 Tf 12 TL 40 760 Td ' + ' '.join(f'({_escape(line)}) Tj T*' for line in lines) + ' ET'
+        objects.append(f'<< /Length {len(body)} >>\nstream\n{body}\nendstream')
+    if outline:
+        first, last = outlines_ref + 1, outlines_ref + len(outline)
+        objects.append(f'<< /Type /Outlines /First {first} 0 R /Last {last} 0 R /Count {len(outline)} >>')
+        for n, (title, page) in enumerate(outline):
+            ref = first + n
+            links = (f' /Prev {ref - 1} 0 R' if ref > first else '') + (f' /Next {ref + 1} 0 R' if ref < last else '')
+            objects.append(f'<< /Title ({_escape(title)}) /Parent {outlines_ref} 0 R{links} '
+                           f'/Dest [{4 + 2 * page} 0 R /Fit] >>')
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f'{number} 0 obj\n{obj}\nendobj\n'.encode('latin-1')
+    xref = len(out)
+    out += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode()
+    for offset in offsets:
+        out += f'{offset:010d} 00000 n \n'.encode()
+    out += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode()
+    return bytes(out)
+
+
+def textbook_pdf(num_pages: int, pages_per_chapter: int = 10, seed: int = 0, outline: bool = False) -> bytes:
+    """A textbook-like PDF; seed varies the text so each call can hash differently.
+
+    With outline, every chapter also gets a bookmark and pages are labelled
+    1, 2, ... as printed page numbers.
+    """
+    pages = []
+    bookmarks = []
+    for page in range(num_pages):
+        lines = []
+        if page % pages_per_chapter == 0:
+            lines.append(f'Chapter {page // pages_per_chapter + 1} Cell biology part {seed}')
+            bookmarks.append((lines[0], page))
+        for line in range(LINES_PER_PAGE - len(lines)):
+            topic = TOPICS[(page + line + seed) % len(TOPICS)]
+            lines.append(SENTENCE.format(page=page, line=line, topic=topic) + '.')
+        pages.append(lines)
+    if outline:
+        return build_pdf(pages, bookmarks, '0 << /S /D >>')
+    return build_pdf(pages)
+
+
+if __name__ == '__main__':
+    with_outline = '--outline' in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != '--outline']
+    path = args[0]
+    num_pages = int(args[1]) if len(args) > 1 else 20
+    per_chapter = int(args[2]) if len(args) > 2 else 10
+    with open(path, 'wb') as f:
+        f.write(textbook_pdf(num_pages, per_chapter, outline=with_outline))
+    print(f'Wrote {num_pages} pages to {path}')
@@ -1,4 +1,7 @@
-from main import app, db, Student, Quiz, Question, QuizResult
+from app import create_app
+from models.models import Student, Quiz, Question, QuizResult
+
+app = create_app({'BLUEPRINTS': ()})
 
 with app.app_context():
     print("\n=== Students ===")
@@ -23,7 +26,7 @@ with app.app_context():
     questions = Question.query.all()
     for question in questions:
         print(f"ID: {question.id}")
-        print(f"Quiz ID: {question.quiz_id}")
+        print(f"Chapter ID: {question.chapter_id}")
         print(f"Text: {question.text}")
         print("---")
 
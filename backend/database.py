@@ -0,0 +1,126 @@
+"""Database configuration: connection pooling, SQLite pragmas and an optional
+read-only connection pool for read-heavy endpoints.
+
+Settings come from the environment:
+
+    DATABASE_URL           database URL (default sqlite:///quizzes.db, in instance/);
+                           the app's DATABASE_URL setting takes precedence
+    QUIZZES_DATABASE_URL   read when DATABASE_URL is unset, as older deployments set it
+    DB_POOL_SIZE           pooled connections per engine (default 10)
+    DB_MAX_OVERFLOW        extra connections allowed under burst (default 20)
+    DB_POOL_TIMEOUT        seconds to wait for a pooled connection (default 30)
+    SQLITE_BUSY_TIMEOUT_MS how long a writer waits on a locked database (default 5000)
+    SQLITE_CACHE_SIZE_KB   page cache per connection (default 65536)
+    SQLITE_MMAP_SIZE       bytes of the file to memory-map (default 268435456)
+    SQLITE_SYNCHRONOUS     NORMAL (default, safe with WAL) or FULL
+    SQLITE_WAL             set to 0 to keep the rollback journal
+    SQLITE_READ_POOL       set to 1 to serve reads from a separate read-only pool
+"""
+import os
+from flask.globals import app_ctx
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+DEFAULT_DATABASE_URL = 'sqlite:///quizzes.db'
+
+
+def _is_sqlite(url) -> bool:
+    return url.drivername in {'sqlite', 'sqlite+pysqlite'} and url.database not in (None, '', ':memory:')
+
+
+def sqlite_settings() -> dict:
+    return {
+        'wal': os.getenv('SQLITE_WAL', '1') != '0',
+        'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL').upper(),
+        'busy_timeout_ms': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000')),
+        'cache_size_kb': int(os.getenv('SQLITE_CACHE_SIZE_KB', '65536')),
+        'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+    }
+
+
+def configure_database(app, db, default_url: str = DEFAULT_DATABASE_URL):
+    """Configure app for db and initialise it. Call instead of db.init_app(app)."""
+    url = make_url(app.config.get('DATABASE_URL') or os.getenv('DATABASE_URL')
+                   or os.getenv('QUIZZES_DATABASE_URL', default_url))
+    app.config['SQLALCHEMY_DATABASE_URI'] = url.render_as_string(hide_password=False)
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    engine_options = {}
+    sqlite = _is_sqlite(url)
+    if sqlite or url.drivername.startswith('postgresql'):
+        engine_options.update(
+            pool_size=int(os.getenv('DB_POOL_SIZE', '10')),
+            max_overflow=int(os.getenv('DB_MAX_OVERFLOW', '20')),
+            pool_timeout=float(os.getenv('DB_POOL_TIMEOUT', '30')),
+        )
+    if sqlite:
+        settings = sqlite_settings()
+        # the driver-level timeout is what makes a writer wait instead of
+        # failing immediately with "database is locked"
+        engine_options['connect_args'] = {
+            'timeout': settings['busy_timeout_ms'] / 1000,
+            'check_same_thread': False,
+        }
+        app.config['SQLITE_SETTINGS'] = settings
+        if os.getenv('SQLITE_READ_POOL', '0') == '1':
+            read_url = url.set(
+                database=url.database if url.database.startswith('file:') else 'file:' + url.database,
+                query={**url.query, 'mode': 'ro', 'uri': 'true'}
+            )
+            app.config['SQLALCHEMY_BINDS'] = {
+                'read': {'url': read_url.render_as_string(hide_password=False), **engine_options}
+            }
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options
+
+    db.init_app(app)
+
+    if sqlite:
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, 'connect', _sqlite_pragmas(app.config['SQLITE_SETTINGS']))
+
+
+def _sqlite_pragmas(settings: dict):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if settings['wal']:
+            # WAL lets readers run alongside the single writer; persistent per file
+            cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute(f"PRAGMA synchronous={settings['synchronous']}")
+        cursor.execute(f"PRAGMA busy_timeout={settings['busy_timeout_ms']}")
+        cursor.execute(f"PRAGMA cache_size=-{settings['cache_size_kb']}")
+        cursor.execute(f"PRAGMA mmap_size={settings['mmap_size']}")
+        cursor.execute('PRAGMA temp_store=MEMORY')
+        cursor.close()
+    return on_connect
+
+
+class ReadDatabase:
+    """Session for read-only endpoints.
+
+    Bound to the read-only pool when SQLITE_READ_POOL=1, otherwise it is
+    simply db.session, so callers never need to know which is active.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._session = None
+
+    def init_app(self, app):
+        if 'read' not in app.config.get('SQLALCHEMY_BINDS', {}):
+            return
+        with app.app_context():
+            engine = self.db.engines['read']
+        self._session = scoped_session(
+            sessionmaker(bind=engine, expire_on_commit=False),
+            scopefunc=lambda: id(app_ctx._get_current_object())
+        )
+
+        @app.teardown_appcontext
+        def remove_read_session(exc):
+            self._session.remove()
+
+    @property
+    def session(self):
+        return self._session if self._session is not None else self.db.session
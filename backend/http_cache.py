@@ -0,0 +1,102 @@
+"""HTTP caching and compression for JSON content endpoints.
+
+conditional() answers If-None-Match with 304 using an ETag computed before
+the view runs, so a revalidation costs at most one cheap lookup instead of
+loading and serialising the content. init_compression() gzip- or brotli-
+compresses large textual responses when the client accepts it.
+
+    COMPRESS_MIN_BYTES  smallest body worth compressing (default 1024)
+    COMPRESS_LEVEL      gzip level (default 6)
+"""
+import gzip
+import os
+from functools import wraps
+from flask import request, make_response
+
+try:
+    import brotli
+except ImportError:  # optional dependency; gzip is always available
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/plain', 'text/html', 'text/csv'}
+# A compressed body is a different representation, so its strong ETag differs
+ENCODING_SUFFIXES = {'gzip': '-gzip', 'br': '-br'}
+
+
+def _matching_tag(etag: str):
+    """The tag in If-None-Match (allowing an encoding suffix) that matches etag."""
+    if request.if_none_match.star_tag:
+        return etag
+    for suffix in ('',) + tuple(ENCODING_SUFFIXES.values()):
+        if request.if_none_match.contains(etag + suffix):
+            return etag + suffix
+    return None
+
+
+def conditional(etag_for, cache_control: str = 'private, no-cache'):
+    """Decorate a GET view with ETag validation.
+
+    etag_for receives the view's arguments and returns the current content
+    version as a string, or None when the content must not be cached (the
+    view then runs normally and the response is marked no-store).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = etag_for(*args, **kwargs)
+            if etag is None:
+                response = make_response(view(*args, **kwargs))
+                response.headers['Cache-Control'] = 'no-store'
+                return response
+
+            matched = _matching_tag(etag)
+            if matched:
+                response = make_response('', 304)
+                response.set_etag(matched)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                response.set_etag(etag)
+            response.headers['Cache-Control'] = cache_control
+            return response
+        return wrapper
+    return decorator
+
+
+def _choose_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def init_compression(app):
+    min_bytes = int(os.getenv('COMPRESS_MIN_BYTES', '1024'))
+    level = int(os.getenv('COMPRESS_LEVEL', '6'))
+
+    @app.after_request
+    def compress_response(response):
+        if (response.status_code != 200 or response.direct_passthrough
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES
+                or 'Content-Encoding' in response.headers):
+            return response
+        response.vary.add('Accept-Encoding')
+        body = response.get_data()
+        if len(body) < min_bytes:
+            return response
+        encoding = _choose_encoding()
+        if encoding is None:
+            return response
+
+        if encoding == 'br':
+            response.set_data(brotli.compress(body, quality=5))
+        else:
+            response.set_data(gzip.compress(body, compresslevel=level))
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag + ENCODING_SUFFIXES[encoding])
+        return response
@@ -0,0 +1,98 @@
+"""Request, SQL and serialisation metrics exposed at /metrics.
+
+init_metrics(app) records, per route:
+
+    http_request_duration_seconds   wall time of the request
+    http_request_sql_statements     SQL statements executed while serving it
+    http_request_sql_seconds        time spent inside those statements
+    http_json_serialize_seconds     time spent in app.json.dumps
+
+SQL timings come from SQLAlchemy cursor events on every engine in the
+process; statements outside a request only feed sql_statements_total.
+PDFService stage timings and background-job samples live in the same
+registry (services.metrics.REGISTRY). The output is the Prometheus text
+format, so no client library is needed.
+"""
+import time
+from flask import Response, g, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from services.metrics import COUNT_BUCKETS, REGISTRY
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    'http_request_duration_seconds', 'Request latency by route, method and status.')
+REQUEST_SQL_STATEMENTS = REGISTRY.histogram(
+    'http_request_sql_statements', 'SQL statements executed per request.', COUNT_BUCKETS)
+REQUEST_SQL_SECONDS = REGISTRY.histogram(
+    'http_request_sql_seconds', 'Time spent executing SQL per request.')
+JSON_SECONDS = REGISTRY.histogram(
+    'http_json_serialize_seconds', 'Time spent serialising JSON responses per request.')
+SQL_STATEMENTS = REGISTRY.counter(
+    'sql_statements_total', 'SQL statements executed, in or outside a request.')
+
+_sql_hooks_installed = False
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info['query_started'] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info.pop('query_started', time.perf_counter())
+    SQL_STATEMENTS.inc()
+    if has_request_context() and 'metrics_started' in g:
+        g.sql_statements += 1
+        g.sql_seconds += elapsed
+
+
+def _install_sql_hooks():
+    global _sql_hooks_installed
+    if not _sql_hooks_installed:
+        # Listening on the Engine class covers every engine, including binds
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        _sql_hooks_installed = True
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            if has_request_context() and 'metrics_started' in g:
+                g.json_seconds += time.perf_counter() - started
+
+
+def _route_label() -> str:
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+
+def init_metrics(app):
+    _install_sql_hooks()
+    app.json = TimedJSONProvider(app)
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_started = time.perf_counter()
+        g.sql_statements = 0
+        g.sql_seconds = 0.0
+        g.json_seconds = 0.0
+
+    @app.after_request
+    def record_request_metrics(response):
+        if 'metrics_started' not in g:
+            return response
+        route = _route_label()
+        REQUEST_SECONDS.observe(time.perf_counter() - g.metrics_started, route=route,
+                                method=request.method, status=response.status_code)
+        REQUEST_SQL_STATEMENTS.observe(g.sql_statements, route=route)
+        REQUEST_SQL_SECONDS.observe(g.sql_seconds, route=route)
+        if g.json_seconds:
+            JSON_SECONDS.observe(g.json_seconds, route=route)
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
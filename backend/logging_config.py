@@ -0,0 +1,138 @@
+"""Structured logging: JSON lines, request ids and a queue so that request
+threads never block on log I/O.
+
+Loggers under the 'quizzo' namespace are configured by configure_logging():
+
+    LOG_LEVEL              minimum level (default INFO)
+    LOG_DEBUG_SAMPLE_RATE  fraction of DEBUG records kept (default 0.1)
+
+Records are enqueued by a QueueHandler in the calling thread and written by
+a QueueListener thread. Extra fields passed with extra={...} appear as keys
+of the JSON object. A forked child (e.g. a web worker forked after the app
+was preloaded) starts a listener of its own, since the parent's thread
+does not survive the fork.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from flask import g, has_request_context, request
+
+ROOT_LOGGER = 'quizzo'
+
+# LogRecord attributes that are not user-supplied extras
+_RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'request_id'}
+
+_listener = None
+_handler = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if getattr(record, 'request_id', None):
+            entry['request_id'] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RESERVED and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class RequestIdFilter(logging.Filter):
+    """Tag records with the current request's id (runs in the request thread)."""
+
+    def filter(self, record):
+        if has_request_context() and 'request_id' in g:
+            record.request_id = g.request_id
+        return True
+
+
+class DebugSamplingFilter(logging.Filter):
+    """Keep only a fraction of DEBUG records; other levels always pass."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or random.random() < self.rate
+
+
+class _StructuredQueueHandler(QueueHandler):
+    def prepare(self, record):
+        # Unlike the default, keep extras and render the traceback separately
+        # instead of folding everything into the message string
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_logging(app=None):
+    """Install the queue handler once per process; with an app, add request ids."""
+    global _listener, _handler
+    logger = logging.getLogger(ROOT_LOGGER)
+    if _listener is None:
+        log_queue = queue.SimpleQueue()
+        _handler = _StructuredQueueHandler(log_queue)
+        _handler.addFilter(RequestIdFilter())
+        _handler.addFilter(DebugSamplingFilter(float(os.getenv('LOG_DEBUG_SAMPLE_RATE', '0.1'))))
+
+        output = logging.StreamHandler(sys.stdout)
+        output.setFormatter(JsonFormatter())
+        _listener = QueueListener(log_queue, output, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_stop_listener)
+
+        logger.addHandler(_handler)
+        logger.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+        logger.propagate = False
+
+    if app is not None:
+        @app.before_request
+        def assign_request_id():
+            g.request_id = request.headers.get('X-Request-ID', '')[:64] or uuid.uuid4().hex
+
+        @app.after_request
+        def echo_request_id(response):
+            if 'request_id' in g:
+                response.headers['X-Request-ID'] = g.request_id
+            return response
+    return logger
+
+
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop()
+
+
+def _restart_listener():
+    """In a forked child: the inherited listener has no thread, so records
+    would pile up in its queue. Drain a fresh queue with a new listener."""
+    global _listener
+    if _listener is None:
+        return
+    log_queue = queue.SimpleQueue()
+    _handler.queue = log_queue
+    _listener = QueueListener(log_queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_listener)
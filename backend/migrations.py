@@ -0,0 +1,252 @@
+"""Schema creation and versioned migrations.
+
+init_schema() creates missing tables and then applies pending migrations;
+it is the explicit schema command (`flask init-db` or `python
+migrations.py`), since the app no longer touches the schema at startup.
+db.create_all() only creates missing tables, so changes to existing tables
+(such as new indexes) are applied here. Applied versions are recorded in a
+schema_migrations table, so upgrading is idempotent and safe to run on every
+deploy. Statements are SQL strings, or callables taking the migration's
+connection for steps SQL alone cannot express (such as backfills). Index
+names match the ones declared on the models, which means a
+fresh create_all() database and an upgraded old one end up identical.
+
+Version 4 merges the quiz app's old schema (students, quizzes, questions,
+quiz_results) into the single model set: its rows are copied into the
+current tables, each old quiz becoming a one-chapter textbook with a book
+quiz over its questions. The old tables are left in place.
+
+Usage (from backend/):
+    python migrations.py                 create and upgrade the database (DATABASE_URL)
+
+tests/test_migrations.py EXPLAINs the hot queries against upgraded and
+fresh databases and fails if any of them scans a table.
+"""
+import sys
+import uuid
+from collections import namedtuple
+from datetime import datetime
+from sqlalchemy import (JSON, Column, DateTime, Float, Integer, MetaData, String, Table, Text,
+                        inspect, insert, select, text)
+from sqlalchemy.schema import CreateTable
+
+Migration = namedtuple('Migration', ['version', 'name', 'statements'])
+
+def create_analytics_tables(connection):
+    from models.models import QuizStats, StudentStats, QuestionStats, QuestionTimeBucket
+    for model in (QuizStats, StudentStats, QuestionStats, QuestionTimeBucket):
+        model.__table__.create(connection, checkfirst=True)
+
+
+def backfill_analytics(connection):
+    from services import analytics
+    analytics.rebuild(connection)
+
+
+def create_question_level_index(connection):
+    from models.models import QuestionLevel
+    from services import quiz_assembly
+    QuestionLevel.__table__.create(connection, checkfirst=True)
+    quiz_assembly.index_chapters(connection)
+
+
+def add_timed_counts(connection):
+    """Count the attempts that reported times, so time means leave out the rest."""
+    for table in ('quiz_stats', 'student_stats', 'question_stats'):
+        if 'timed' not in {column['name'] for column in inspect(connection).get_columns(table)}:
+            connection.execute(text(f'ALTER TABLE {table} ADD COLUMN timed INTEGER NOT NULL DEFAULT 0'))
+    backfill_analytics(connection)
+
+
+def add_public_student_ids(connection):
+    if 'student_id' in {column['name'] for column in inspect(connection).get_columns('student')}:
+        return
+    connection.execute(text('ALTER TABLE student ADD COLUMN student_id VARCHAR(100)'))
+    ids = connection.execute(text('SELECT id FROM student')).scalars().all()
+    if ids:
+        connection.execute(text('UPDATE student SET student_id = :student_id WHERE id = :id'),
+                           [{'id': id_, 'student_id': str(uuid.uuid4())} for id_ in ids])
+
+
+def allow_book_quizzes(connection):
+    """Make quiz.chapter_id nullable; SQLite can only do that by rebuilding the table."""
+    from models.models import Chapter, Quiz
+    columns = {column['name']: column for column in inspect(connection).get_columns('quiz')}
+    if columns['chapter_id']['nullable']:
+        return
+    if connection.dialect.name != 'sqlite':
+        connection.execute(text('ALTER TABLE quiz ALTER COLUMN chapter_id DROP NOT NULL'))
+        return
+    metadata = MetaData()
+    Chapter.__table__.to_metadata(metadata)  # target of the rebuilt table's foreign key
+    rebuilt = Quiz.__table__.to_metadata(metadata, name='quiz_rebuilt')
+    names = ', '.join(column.name for column in rebuilt.columns if column.name in columns)
+    connection.execute(CreateTable(rebuilt))
+    connection.execute(text(f'INSERT INTO quiz_rebuilt ({names}) SELECT {names} FROM quiz'))
+    connection.execute(text('DROP TABLE quiz'))
+    connection.execute(text('ALTER TABLE quiz_rebuilt RENAME TO quiz'))
+
+
+# The quiz app's tables before the single model set, as they were created
+_legacy = MetaData()
+LEGACY_STUDENTS = Table('students', _legacy, Column('id', Integer, primary_key=True), Column('name', String),
+                        Column('email', String), Column('student_id', String), Column('created_at', DateTime))
+LEGACY_QUIZZES = Table('quizzes', _legacy, Column('id', Integer, primary_key=True), Column('title', String),
+                       Column('created_at', DateTime))
+LEGACY_QUESTIONS = Table('questions', _legacy, Column('id', Integer, primary_key=True), Column('quiz_id', Integer),
+                         Column('text', Text), Column('options', JSON), Column('correct_answer', String),
+                         Column('difficulty', String))
+LEGACY_RESULTS = Table('quiz_results', _legacy, Column('id', Integer, primary_key=True), Column('quiz_id', Integer),
+                       Column('student_id', String), Column('score', Float), Column('answers', JSON),
+                       Column('question_times', JSON), Column('completed_at', DateTime))
+
+
+def _remap(mapping, question_ids):
+    if not isinstance(mapping, dict):
+        return mapping
+    return {str(question_ids.get(int(key), key)) if str(key).isdigit() else key: value
+            for key, value in mapping.items()}
+
+
+def import_legacy_quizzes(connection):
+    """Copy the old quiz app's rows into the current tables."""
+    from models.models import Chapter, Question, Quiz, QuizQuestion, QuizResult, Student, Textbook
+    from services import analytics, quiz_assembly
+    from services.ingestion_store import bulk_insert
+    if not inspect(connection).has_table('quizzes'):
+        return
+
+    students = {row.email: row.id for row in connection.execute(select(Student.email, Student.id))}
+    student_ids = {}
+    for row in connection.execute(select(LEGACY_STUDENTS).order_by(LEGACY_STUDENTS.c.id)).all():
+        if row.email not in students:
+            students[row.email] = connection.execute(insert(Student).values(
+                name=row.name, email=row.email, student_id=row.student_id, created_at=row.created_at
+            )).inserted_primary_key[0]
+        student_ids[row.student_id] = students[row.email]
+
+    quiz_ids = {}
+    question_ids = {}
+    chapter_ids = []
+    for quiz in connection.execute(select(LEGACY_QUIZZES).order_by(LEGACY_QUIZZES.c.id)).all():
+        textbook_id = connection.execute(insert(Textbook).values(
+            title=quiz.title, file_path='', created_at=quiz.created_at
+        )).inserted_primary_key[0]
+        chapter_id = connection.execute(insert(Chapter).values(
+            title=quiz.title[:200], number=1, textbook_id=textbook_id
+        )).inserted_primary_key[0]
+        chapter_ids.append(chapter_id)
+        questions = connection.execute(
+            select(LEGACY_QUESTIONS).where(LEGACY_QUESTIONS.c.quiz_id == quiz.id).order_by(LEGACY_QUESTIONS.c.id)
+        ).all()
+        new_ids = bulk_insert(connection, Question, [{
+            'text': q.text, 'options': q.options, 'correct_answer': q.correct_answer,
+            'difficulty': q.difficulty, 'chapter_id': chapter_id
+        } for q in questions])
+        question_ids.update(zip((q.id for q in questions), new_ids))
+        quiz_ids[quiz.id] = connection.execute(insert(Quiz).values(
+            title=quiz.title, created_at=quiz.created_at
+        )).inserted_primary_key[0]
+        if new_ids:
+            connection.execute(insert(QuizQuestion), [
+                {'quiz_id': quiz_ids[quiz.id], 'question_id': question_id, 'order': order}
+                for order, question_id in enumerate(new_ids, start=1)
+            ])
+
+    results = []
+    for row in connection.execute(select(LEGACY_RESULTS).order_by(LEGACY_RESULTS.c.id)):
+        # Results of students who never registered have no one to belong to
+        if row.quiz_id not in quiz_ids or row.student_id not in student_ids:
+            continue
+        times = analytics.clean_times(row.question_times)
+        results.append({
+            'quiz_id': quiz_ids[row.quiz_id],
+            'student_id': student_ids[row.student_id],
+            'score': row.score,
+            'time_taken': int(sum(times.values())) if times else None,
+            'answers': _remap(row.answers, question_ids),
+            'question_times': _remap(row.question_times, question_ids),
+            'completed_at': row.completed_at
+        })
+    for start in range(0, len(results), 1000):
+        connection.execute(insert(QuizResult), results[start:start + 1000])
+
+    if results:
+        analytics.rebuild(connection)
+    quiz_assembly.index_chapters(connection, chapter_ids)
+
+
+MIGRATIONS = [
+    Migration(1, 'index hot lookup columns', [
+        'CREATE INDEX IF NOT EXISTS ix_chapter_textbook_id ON chapter (textbook_id)',
+        'CREATE INDEX IF NOT EXISTS ix_question_chapter_id ON question (chapter_id)',
+        'CREATE INDEX IF NOT EXISTS ix_quiz_question_quiz_id_order ON quiz_question (quiz_id, "order")',
+        'CREATE INDEX IF NOT EXISTS ix_quiz_result_quiz_id ON quiz_result (quiz_id)',
+        'CREATE INDEX IF NOT EXISTS ix_quiz_result_student_id_completed_at '
+        'ON quiz_result (student_id, completed_at)',
+    ]),
+    Migration(2, 'analytics summary tables', [create_analytics_tables, backfill_analytics]),
+    Migration(3, 'question difficulty index', [
+        create_question_level_index,
+        'CREATE INDEX IF NOT EXISTS ix_question_level_chapter_id_level_sample_key '
+        'ON question_level (chapter_id, level, sample_key)',
+    ]),
+    Migration(4, 'single model set for both APIs', [
+        add_public_student_ids,
+        'CREATE UNIQUE INDEX IF NOT EXISTS ix_student_student_id ON student (student_id)',
+        allow_book_quizzes,
+        import_legacy_quizzes,
+    ]),
+    Migration(5, 'timed attempt counts', [add_timed_counts]),
+    Migration(6, 'textbook file index', [
+        'CREATE INDEX IF NOT EXISTS ix_textbook_file_path ON textbook (file_path)',
+    ]),
+]
+
+def current_version(connection) -> int:
+    connection.execute(text(
+        'CREATE TABLE IF NOT EXISTS schema_migrations ('
+        'version INTEGER PRIMARY KEY, name VARCHAR(200) NOT NULL, applied_at VARCHAR(32) NOT NULL)'
+    ))
+    return connection.execute(text('SELECT max(version) FROM schema_migrations')).scalar() or 0
+
+
+def upgrade(engine, migrations) -> list:
+    """Apply pending migrations, each in its own transaction. Returns applied versions."""
+    applied = []
+    with engine.begin() as connection:
+        version = current_version(connection)
+    for migration in sorted(migrations, key=lambda m: m.version):
+        if migration.version <= version:
+            continue
+        with engine.begin() as connection:
+            for statement in migration.statements:
+                if callable(statement):
+                    statement(connection)
+                else:
+                    connection.execute(text(statement))
+            connection.execute(
+                text('INSERT INTO schema_migrations (version, name, applied_at) VALUES (:v, :n, :t)'),
+                {'v': migration.version, 'n': migration.name, 't': datetime.utcnow().isoformat()}
+            )
+        applied.append(migration.version)
+    return applied
+
+
+def init_schema(db) -> list:
+    """Create missing tables and apply pending migrations. Needs an app context."""
+    import models.models  # noqa: F401 - registers the models
+    db.create_all()
+    return upgrade(db.engine, MIGRATIONS)
+
+
+def main(argv):
+    from app import create_app, db
+    app = create_app({'BLUEPRINTS': ()})
+    with app.app_context():
+        applied = init_schema(db)
+    print(f'applied migrations: {applied}' if applied else 'database is up to date')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -1,3 +1,4 @@
+import uuid
 from app import db
 from datetime import datetime
 
@@ -5,7 +6,7 @@ class Textbook(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     author = db.Column(db.String(100))
-    file_path = db.Column(db.String(500), nullable=False)
+    file_path = db.Column(db.String(500), nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     chapters = db.relationship('Chapter', backref='textbook', lazy=True)
 
@@ -13,7 +14,7 @@ class Chapter(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     number = db.Column(db.Integer, nullable=False)
-    textbook_id = db.Column(db.Integer, db.ForeignKey('textbook.id'), nullable=False)
+    textbook_id = db.Column(db.Integer, db.ForeignKey('textbook.id'), nullable=False, index=True)
     questions = db.relationship('Question', backref='chapter', lazy=True)
 
 class Question(db.Model):
@@ -22,18 +23,23 @@ class Question(db.Model):
     correct_answer = db.Column(db.String(500), nullable=False)
     options = db.Column(db.JSON, nullable=False)  # Store as JSON array
     difficulty = db.Column(db.String(20))  # easy, medium, hard
-    chapter_id = db.Column(db.Integer, db.ForeignKey('chapter.id'), nullable=False)
+    chapter_id = db.Column(db.Integer, db.ForeignKey('chapter.id'), nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 class Quiz(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
-    chapter_id = db.Column(db.Integer, db.ForeignKey('chapter.id'), nullable=False)
+    # NULL for a quiz over a whole uploaded book (POST /upload)
+    chapter_id = db.Column(db.Integer, db.ForeignKey('chapter.id'))
     time_limit = db.Column(db.Integer)  # in minutes
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     questions = db.relationship('QuizQuestion', backref='quiz', lazy=True)
 
 class QuizQuestion(db.Model):
+    __table_args__ = (
+        db.Index('ix_quiz_question_quiz_id_order', 'quiz_id', 'order'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), nullable=False)
     question_id = db.Column(db.Integer, db.ForeignKey('question.id'), nullable=False)
@@ -44,15 +50,74 @@ class Student(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
+    # Public id handed out by POST /register and sent back with submissions
+    student_id = db.Column(db.String(100), unique=True, index=True, nullable=False,
+                           default=lambda: str(uuid.uuid4()))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     quiz_results = db.relationship('QuizResult', backref='student', lazy=True)
 
 class QuizResult(db.Model):
+    # Also serves plain student_id lookups (leftmost column)
+    __table_args__ = (
+        db.Index('ix_quiz_result_student_id_completed_at', 'student_id', 'completed_at'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('student.id'), nullable=False)
-    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), nullable=False)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), nullable=False, index=True)
     score = db.Column(db.Float, nullable=False)
     time_taken = db.Column(db.Integer)  # in seconds
     completed_at = db.Column(db.DateTime, default=datetime.utcnow)
     question_times = db.Column(db.JSON)  # Store as JSON: {question_id: time_spent}
-    answers = db.Column(db.JSON)  # Store as JSON: {question_id: answer} 
\ No newline at end of file
+    answers = db.Column(db.JSON)  # Store as JSON: {question_id: answer} 
+
+# Running aggregates maintained by services/analytics.py on every submission,
+# so statistics cost the same however many results exist
+class QuizStats(db.Model):
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), primary_key=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Float, nullable=False, default=0)
+    score_sq_sum = db.Column(db.Float, nullable=False, default=0)
+    best_score = db.Column(db.Float)
+    timed = db.Column(db.Integer, nullable=False, default=0)  # attempts that reported times
+    time_sum = db.Column(db.Float, nullable=False, default=0)  # seconds
+    time_sq_sum = db.Column(db.Float, nullable=False, default=0)
+    last_completed_at = db.Column(db.DateTime)
+
+class StudentStats(db.Model):
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id'), primary_key=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Float, nullable=False, default=0)
+    score_sq_sum = db.Column(db.Float, nullable=False, default=0)
+    best_score = db.Column(db.Float)
+    timed = db.Column(db.Integer, nullable=False, default=0)
+    time_sum = db.Column(db.Float, nullable=False, default=0)
+    time_sq_sum = db.Column(db.Float, nullable=False, default=0)
+    last_completed_at = db.Column(db.DateTime)
+
+class QuestionStats(db.Model):
+    question_id = db.Column(db.Integer, db.ForeignKey('question.id'), primary_key=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    correct = db.Column(db.Integer, nullable=False, default=0)
+    timed = db.Column(db.Integer, nullable=False, default=0)
+    time_sum = db.Column(db.Float, nullable=False, default=0)
+    time_sq_sum = db.Column(db.Float, nullable=False, default=0)
+
+class QuestionTimeBucket(db.Model):
+    # bucket indexes services.analytics.TIME_BUCKETS
+    question_id = db.Column(db.Integer, db.ForeignKey('question.id'), primary_key=True)
+    bucket = db.Column(db.Integer, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+class QuestionLevel(db.Model):
+    # Per-chapter difficulty index kept by services/quiz_assembly.py: level
+    # is the question's label until enough attempts exist to measure it, and
+    # sample_key is a random position used to draw questions through the index
+    __table_args__ = (
+        db.Index('ix_question_level_chapter_id_level_sample_key', 'chapter_id', 'level', 'sample_key'),
+    )
+    
+    question_id = db.Column(db.Integer, db.ForeignKey('question.id'), primary_key=True)
+    chapter_id = db.Column(db.Integer, db.ForeignKey('chapter.id'), nullable=False)
+    level = db.Column(db.String(20), nullable=False)
+    sample_key = db.Column(db.Float, nullable=False)
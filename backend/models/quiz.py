@@ -1,42 +0,0 @@
-from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
-
-db = SQLAlchemy()
-
-class Student(db.Model):
-    __tablename__ = 'students'
-    
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
-    email = db.Column(db.String(100), unique=True, nullable=False)
-    student_id = db.Column(db.String(100), unique=True, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-
-class Quiz(db.Model):
-    __tablename__ = 'quizzes'
-    
-    id = db.Column(db.Integer, primary_key=True)
-    title = db.Column(db.String(200), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    questions = db.relationship('Question', backref='quiz', lazy=True)
-
-class Question(db.Model):
-    __tablename__ = 'questions'
-    
-    id = db.Column(db.Integer, primary_key=True)
-    quiz_id = db.Column(db.Integer, db.ForeignKey('quizzes.id'), nullable=False)
-    text = db.Column(db.Text, nullable=False)
-    options = db.Column(db.JSON, nullable=False)  # Store as JSON array
-    correct_answer = db.Column(db.String(200), nullable=False)
-    difficulty = db.Column(db.String(50), default='medium')
-
-class QuizResult(db.Model):
-    __tablename__ = 'quiz_results'
-    
-    id = db.Column(db.Integer, primary_key=True)
-    quiz_id = db.Column(db.Integer, db.ForeignKey('quizzes.id'), nullable=False)
-    student_id = db.Column(db.String(100), nullable=False)
-    score = db.Column(db.Float, nullable=False)
-    answers = db.Column(db.JSON, nullable=False)  # Store as JSON object
-    question_times = db.Column(db.JSON, nullable=False)  # Store as JSON object
-    completed_at = db.Column(db.DateTime, default=datetime.utcnow) 
\ No newline at end of file
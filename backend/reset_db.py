@@ -1,17 +1,21 @@
-from main import app, db, Student, Quiz, Question, QuizResult
-import os
+from app import app_services, create_app, db
+from models.models import (Textbook, Chapter, Question, Quiz, QuizQuestion, QuizResult, Student, QuizStats,
+                           StudentStats, QuestionStats, QuestionTimeBucket, QuestionLevel)
 
 def reset_database():
+    app = create_app({'BLUEPRINTS': ()})
     with app.app_context():
-        # Delete all data from tables
-        QuizResult.query.delete()
-        Question.query.delete()
-        Quiz.query.delete()
-        Student.query.delete()
+        # Delete all data from tables, children first
+        for model in (QuestionTimeBucket, QuestionStats, StudentStats, QuizStats, QuestionLevel,
+                      QuizResult, QuizQuestion, Quiz, Question, Chapter, Textbook, Student):
+            model.query.delete()
         
         # Commit the changes
         db.session.commit()
+        
+        # Running servers drop their cached question sets on their next lookup
+        app_services().quiz_cache.clear()
         print("Database has been reset successfully")
 
 if __name__ == '__main__':
-    reset_database() 
\ No newline at end of file
+    reset_database() 
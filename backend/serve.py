@@ -0,0 +1,87 @@
+"""Production serving for the quiz API: uvicorn worker processes, each
+running the app over ASGI (asgi.py), in place of the single-process
+development server that `python main.py` starts.
+
+    python serve.py [--bind HOST:PORT] [--workers N] [--threads N]
+    python serve.py --server dev     # Flask's development server, for comparison
+
+Settings come from the environment; flags override them:
+
+    WEB_BIND        address to listen on (default 0.0.0.0:8001)
+    WEB_WORKERS     worker processes (default: CPU count)
+    WEB_THREADS     request threads per worker (default 8)
+
+In each worker an event loop accepts connections and receives request
+bodies, and the synchronous Flask routes run on WEB_THREADS threads, so
+neither slow clients nor uploads in flight tie up a request thread.
+PDF ingestion goes to the job workers (INGEST_WORKERS per web worker, see
+services/job_service.py). Workers are spawned, not forked, and each one
+builds its own app.
+
+State that lives in process memory is per web worker:
+
+    /metrics        each worker reports only the requests it served (and
+                    the jobs its own pool ran); scrape every worker or sum
+                    behind the load balancer
+    /cache/stats    hit and miss counters are the answering worker's; the
+                    content and generation caches themselves are shared on disk
+    quiz questions  every worker holds its own copy (QUIZ_CACHE_MAX_ENTRIES
+                    each); clear() bumps instance/quiz_cache.generation,
+                    which all workers check, so reset_db.py reaches them all
+    job pools       each worker starts its own at startup when jobs are waiting
+                    (queued, or orphaned by a dead worker), else on its first
+                    upload; the jobs table is shared, so a job runs once
+                    whichever pool claims it
+"""
+import argparse
+import os
+import sys
+
+DEFAULT_BIND = '0.0.0.0:8001'
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def split_bind(bind):
+    host, _, port = bind.rpartition(':')
+    return host or '0.0.0.0', int(port)
+
+
+def run_asgi(args):
+    import uvicorn
+    host, port = split_bind(args.bind)
+    # Read by asgi.py in every (spawned) worker
+    os.environ['WEB_THREADS'] = str(args.threads)
+    uvicorn.run('asgi:app', host=host, port=port, workers=args.workers, app_dir=BACKEND_DIR,
+                lifespan='on', access_log=False)
+
+
+def run_dev(args):
+    from app import app_services, create_app
+    app = create_app()
+    with app.app_context():
+        app_services().job_pool.start()
+    host, port = split_bind(args.bind)
+    app.run(host=host, port=port, threaded=args.threads > 1, use_reloader=False)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Serve the quiz API')
+    parser.add_argument('--server', choices=['asgi', 'dev'], default='asgi')
+    parser.add_argument('--bind', default=os.getenv('WEB_BIND', DEFAULT_BIND))
+    parser.add_argument('--workers', type=int, default=int(os.getenv('WEB_WORKERS', str(os.cpu_count() or 1))))
+    parser.add_argument('--threads', type=int, default=int(os.getenv('WEB_THREADS', '8')))
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # The app package imports its modules relative to backend/
+    sys.path.insert(0, BACKEND_DIR)
+    if args.server == 'dev':
+        run_dev(args)
+    else:
+        run_asgi(args)
+
+
+if __name__ == '__main__':
+    main()
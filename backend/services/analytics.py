@@ -0,0 +1,313 @@
+import bisect
+import math
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Mapping, Optional
+from sqlalchemy import and_, bindparam, case, delete, insert, or_, select, update
+from models.models import (Question, QuestionStats, QuestionTimeBucket, QuizQuestion, QuizResult,
+                           QuizStats, StudentStats)
+
+# Upper bounds (seconds) of the per-question time histogram; one more
+# bucket collects anything slower
+TIME_BUCKETS = (5, 10, 20, 30, 60, 120, 300)
+
+
+def time_bucket(seconds: float) -> int:
+    return bisect.bisect_left(TIME_BUCKETS, seconds)
+
+
+def bucket_label(bucket: int) -> str:
+    return f'<={TIME_BUCKETS[bucket]}s' if bucket < len(TIME_BUCKETS) else f'>{TIME_BUCKETS[-1]}s'
+
+
+def clean_times(question_times: Optional[Mapping]) -> Dict[int, float]:
+    """Question id -> seconds, dropping entries that are not numbers."""
+    times = {}
+    for question_id, seconds in (question_times or {}).items():
+        try:
+            times[int(question_id)] = max(0.0, float(seconds))
+        except (TypeError, ValueError):
+            continue
+    return times
+
+
+def _dialect_name(bind) -> str:
+    return bind.dialect.name if hasattr(bind, 'dialect') else bind.get_bind().dialect.name
+
+
+def _upsert(bind, model, keys: List[str], rows: List[Dict], increments: List[str], latest: List[str] = ()):
+    """INSERT rows, or add their `increments` columns onto existing ones.
+
+    best_score keeps the maximum and `latest` columns take the new value.
+    One INSERT ... ON CONFLICT on SQLite and Postgres; other databases get
+    _upsert_generic.
+    """
+    if not rows:
+        return
+    dialect = _dialect_name(bind)
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        _upsert_generic(bind, model, keys, rows, increments, latest)
+        return
+    statement = dialect_insert(model).values(rows)
+    table = model.__table__.c
+    update = {column: table[column] + statement.excluded[column] for column in increments}
+    if 'best_score' in rows[0]:
+        update['best_score'] = case(
+            (table.best_score.is_(None), statement.excluded.best_score),
+            (statement.excluded.best_score > table.best_score, statement.excluded.best_score),
+            else_=table.best_score
+        )
+    for column in latest:
+        update[column] = statement.excluded[column]
+    bind.execute(statement.on_conflict_do_update(index_elements=keys, set_=update))
+
+
+def _upsert_generic(bind, model, keys: List[str], rows: List[Dict], increments: List[str], latest: List[str] = ()):
+    """_upsert without ON CONFLICT: read the existing rows, then INSERT the
+    new ones and UPDATE the rest (three statements). A concurrent writer
+    inserting the same key makes the INSERT fail and the caller roll back."""
+    table = model.__table__
+    existing = {
+        tuple(row[key] for key in keys): row
+        for row in bind.execute(select(table).where(or_(*(
+            and_(*(table.c[key] == row[key] for key in keys)) for row in rows
+        )))).mappings()
+    }
+    new, changed = [], []
+    for row in rows:
+        current = existing.get(tuple(row[key] for key in keys))
+        if current is None:
+            new.append(row)
+            continue
+        values = {column: current[column] + row[column] for column in increments}
+        if 'best_score' in row:
+            values['best_score'] = row['best_score'] if current['best_score'] is None \
+                else max(current['best_score'], row['best_score'])
+        for column in latest:
+            values[column] = row[column]
+        changed.append({**{'k_' + key: row[key] for key in keys},
+                        **{'v_' + column: value for column, value in values.items()}})
+    if new:
+        bind.execute(insert(model), new)
+    if changed:
+        columns = [name[2:] for name in changed[0] if name.startswith('v_')]
+        bind.execute(
+            update(table).where(*(table.c[key] == bindparam('k_' + key) for key in keys))
+            .values({column: bindparam('v_' + column) for column in columns}),
+            changed
+        )
+
+
+def _run_row(key_column: str, key, attempts: int, scores: List[float], times: List[float], completed_at):
+    return {
+        key_column: key,
+        "attempts": attempts,
+        "score_sum": sum(scores),
+        "score_sq_sum": sum(s * s for s in scores),
+        "best_score": max(scores),
+        "timed": len(times),
+        "time_sum": sum(times),
+        "time_sq_sum": sum(t * t for t in times),
+        "last_completed_at": completed_at
+    }
+
+
+RUN_INCREMENTS = ['attempts', 'score_sum', 'score_sq_sum', 'timed', 'time_sum', 'time_sq_sum']
+
+
+def record_result(bind, quiz_id: int, student_id: int, score: float, correct: Mapping[int, bool],
+                  question_times: Optional[Mapping], completed_at: Optional[datetime] = None):
+    """Fold one submission into the summary tables, in the caller's transaction.
+
+    correct maps each of the quiz's question ids to whether it was answered
+    correctly. Four statements, however many results already exist.
+    """
+    record_results(bind, [{
+        "quiz_id": quiz_id,
+        "student_id": student_id,
+        "score": score,
+        "correct": correct,
+        "question_times": question_times,
+        "completed_at": completed_at
+    }])
+
+
+class _Totals:
+    """Summary table rows for a set of submissions. record_results adds
+    them onto the tables and rebuild inserts them into emptied ones, so
+    both fold a submission in the same way."""
+
+    def __init__(self):
+        self.quizzes = defaultdict(lambda: ([], [], None))
+        self.students = defaultdict(lambda: ([], [], None))
+        self.questions = defaultdict(lambda: [0, 0, 0, 0.0, 0.0])
+        self.buckets = defaultdict(int)
+
+    def add(self, quiz_id: int, student_id: int, score: float, correct: Mapping[int, bool],
+            question_times: Optional[Mapping], completed_at: Optional[datetime]):
+        times = clean_times(question_times)
+        total_time = sum(times.values())
+        for runs, key in ((self.quizzes, quiz_id), (self.students, student_id)):
+            scores, durations, latest = runs[key]
+            scores.append(score)
+            # Submissions without times are left out of the time statistics
+            if times:
+                durations.append(total_time)
+            runs[key] = (scores, durations,
+                         max(latest, completed_at) if latest and completed_at else latest or completed_at)
+        for question_id, is_correct in correct.items():
+            entry = self.questions[question_id]
+            entry[0] += 1
+            entry[1] += int(bool(is_correct))
+            seconds = times.get(question_id)
+            if seconds is not None:
+                entry[2] += 1
+                entry[3] += seconds
+                entry[4] += seconds * seconds
+                self.buckets[question_id, time_bucket(seconds)] += 1
+
+    def run_rows(self, key_column: str) -> List[Dict]:
+        runs = self.quizzes if key_column == 'quiz_id' else self.students
+        return [_run_row(key_column, key, len(scores), scores, durations, latest)
+                for key, (scores, durations, latest) in runs.items()]
+
+    def question_rows(self) -> List[Dict]:
+        return [{"question_id": question_id, "attempts": attempts, "correct": correct, "timed": timed,
+                 "time_sum": time_sum, "time_sq_sum": time_sq_sum}
+                for question_id, (attempts, correct, timed, time_sum, time_sq_sum) in self.questions.items()]
+
+    def bucket_rows(self) -> List[Dict]:
+        return [{"question_id": question_id, "bucket": bucket, "count": count}
+                for (question_id, bucket), count in self.buckets.items()]
+
+
+def record_results(bind, results: List[Dict]):
+    """record_result for many submissions at once: each is a dict of
+    record_result's arguments, and they are folded in together with the
+    same four statements."""
+    totals = _Totals()
+    now = datetime.utcnow()
+    for result in results:
+        totals.add(result["quiz_id"], result["student_id"], result["score"], result["correct"],
+                   result.get("question_times"), result.get("completed_at") or now)
+
+    _upsert(bind, QuizStats, ['quiz_id'], totals.run_rows('quiz_id'), RUN_INCREMENTS, ['last_completed_at'])
+    _upsert(bind, StudentStats, ['student_id'], totals.run_rows('student_id'), RUN_INCREMENTS, ['last_completed_at'])
+    _upsert(bind, QuestionStats, ['question_id'], totals.question_rows(),
+            ['attempts', 'correct', 'timed', 'time_sum', 'time_sq_sum'])
+    _upsert(bind, QuestionTimeBucket, ['question_id', 'bucket'], totals.bucket_rows(), ['count'])
+
+
+def _moments(count: int, total: float, sq_total: float) -> Dict:
+    if not count:
+        return {"mean": None, "stddev": None}
+    mean = total / count
+    return {"mean": round(mean, 3), "stddev": round(math.sqrt(max(0.0, sq_total / count - mean * mean)), 3)}
+
+
+def histogram_median(counts: Mapping[int, int]) -> Optional[float]:
+    """Upper bound of the bucket holding the median, from bucket -> count."""
+    total = sum(counts.values())
+    if not total:
+        return None
+    seen = 0
+    for bucket in sorted(counts):
+        seen += counts[bucket]
+        if seen * 2 >= total:
+            return float(TIME_BUCKETS[bucket]) if bucket < len(TIME_BUCKETS) else float('inf')
+    return None
+
+
+def _run_summary(stats) -> Dict:
+    if stats is None:
+        return {"attempts": 0, "score": _moments(0, 0, 0), "best_score": None,
+                "time_seconds": _moments(0, 0, 0), "last_completed_at": None}
+    return {
+        "attempts": stats.attempts,
+        "score": _moments(stats.attempts, stats.score_sum, stats.score_sq_sum),
+        "best_score": stats.best_score,
+        "time_seconds": _moments(stats.timed, stats.time_sum, stats.time_sq_sum),
+        "last_completed_at": stats.last_completed_at.isoformat() if stats.last_completed_at else None
+    }
+
+
+def student_summary(session, student_id: int) -> Dict:
+    return _run_summary(session.get(StudentStats, student_id))
+
+
+def question_summaries(session, question_ids: List[int]) -> Dict[int, Dict]:
+    """Per-question correct rate and time statistics; two indexed queries.
+
+    Works on a Session or a Connection.
+    """
+    stats = {row.question_id: row for row in session.execute(
+        select(QuestionStats.question_id, QuestionStats.attempts, QuestionStats.correct,
+               QuestionStats.timed, QuestionStats.time_sum, QuestionStats.time_sq_sum)
+        .where(QuestionStats.question_id.in_(question_ids)))}
+    buckets = defaultdict(dict)
+    for row in session.execute(
+            select(QuestionTimeBucket.question_id, QuestionTimeBucket.bucket, QuestionTimeBucket.count)
+            .where(QuestionTimeBucket.question_id.in_(question_ids))):
+        buckets[row.question_id][row.bucket] = row.count
+
+    summaries = {}
+    for question_id in question_ids:
+        row = stats.get(question_id)
+        attempts = row.attempts if row else 0
+        summaries[question_id] = {
+            "attempts": attempts,
+            "correct_rate": round(row.correct / attempts, 3) if attempts else None,
+            "time_seconds": _moments(row.timed, row.time_sum, row.time_sq_sum) if row else _moments(0, 0, 0),
+            "median_time_seconds": histogram_median(buckets[question_id]),
+            "time_histogram": [{"bucket": bucket_label(b), "count": buckets[question_id].get(b, 0)}
+                               for b in range(len(TIME_BUCKETS) + 1)]
+        }
+    return summaries
+
+
+def quiz_summary(session, quiz_id: int) -> Dict:
+    summary = _run_summary(session.get(QuizStats, quiz_id))
+    question_ids = list(session.execute(
+        select(QuizQuestion.question_id).where(QuizQuestion.quiz_id == quiz_id).order_by(QuizQuestion.order)
+    ).scalars())
+    per_question = question_summaries(session, question_ids)
+    summary["questions"] = [dict(question_id=question_id, **per_question[question_id]) for question_id in question_ids]
+    return summary
+
+
+def rebuild(bind, batch_size: int = 1000):
+    """Recompute every summary table from quiz_result (backfill or repair)."""
+    for model in (QuestionTimeBucket, QuestionStats, StudentStats, QuizStats):
+        bind.execute(delete(model))
+
+    answer_keys: Dict[int, Dict[int, str]] = {}
+
+    def answer_key(quiz_id):
+        if quiz_id not in answer_keys:
+            answer_keys[quiz_id] = dict(bind.execute(
+                select(Question.id, Question.correct_answer)
+                .join(QuizQuestion, QuizQuestion.question_id == Question.id)
+                .where(QuizQuestion.quiz_id == quiz_id)
+            ).all())
+        return answer_keys[quiz_id]
+
+    totals = _Totals()
+    results = bind.execute(
+        select(QuizResult.quiz_id, QuizResult.student_id, QuizResult.score, QuizResult.answers,
+               QuizResult.question_times, QuizResult.completed_at)
+        .order_by(QuizResult.id).execution_options(yield_per=batch_size)
+    )
+    for quiz_id, student_id, score, answers, question_times, completed_at in results:
+        answers = answers or {}
+        correct = {question_id: answers.get(str(question_id)) == correct_answer
+                   for question_id, correct_answer in answer_key(quiz_id).items()}
+        totals.add(quiz_id, student_id, score, correct, question_times, completed_at)
+
+    for model, rows in ((QuizStats, totals.run_rows('quiz_id')), (StudentStats, totals.run_rows('student_id')),
+                        (QuestionStats, totals.question_rows()), (QuestionTimeBucket, totals.bucket_rows())):
+        if rows:
+            bind.execute(insert(model), rows)
@@ -0,0 +1,137 @@
+import json
+import os
+import tempfile
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional
+from services.page_store import PageStore, open_page_store, write_page_store
+from services.upload_store import HashingWriter, copy_stream
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def store_upload(file, upload_dir: str, extension: str = '.pdf', max_bytes: Optional[int] = None) -> str:
+    """Save an uploaded file under its SHA-256 and return the hex digest.
+
+    The digest is computed while the stream is copied, so identical uploads
+    map to the same file and different files can no longer overwrite each other.
+    A file part Werkzeug already spooled into a HashingWriter in upload_dir
+    (see streaming_upload.py) is published without copying it again.
+    Raises UploadError for files that are not PDFs or are over max_bytes.
+    """
+    if isinstance(file.stream, HashingWriter) and file.stream.upload_dir == os.path.abspath(upload_dir):
+        return file.stream.finish()
+    writer = HashingWriter(upload_dir, max_bytes, extension)
+    try:
+        copy_stream(file.stream, writer, CHUNK_SIZE)
+        return writer.finish()
+    finally:
+        writer.close()
+
+
+class ContentCache:
+    """Content-addressed on-disk cache of extracted pages and generated questions.
+
+    Entries are keyed by the upload's SHA-256 (plus the question generator
+    version for questions). Least recently used entries are evicted once the
+    cache grows past max_bytes; file mtimes record recency.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.cache_dir, name)
+
+    def _lookup(self, name: str) -> Optional[str]:
+        path = self._path(name)
+        with self._lock:
+            if not os.path.exists(path):
+                self.misses += 1
+                return None
+            self.hits += 1
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # evicted between the check and the touch; readers handle it
+            pass
+        return path
+
+    def _write(self, name: str, items: Iterable) -> Iterator:
+        """Write items as JSON lines to a temp file, yield each one through and
+        publish the file atomically once the items are exhausted."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.part')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as out:
+                for item in items:
+                    out.write(json.dumps(item) + '\n')
+                    yield item
+            os.replace(tmp_path, self._path(name))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self.evict()
+
+    def get_pages(self, sha256: str) -> Optional[PageStore]:
+        """Return the cached page texts as a memory-mapped PageStore, or None on a miss."""
+        path = self._lookup(f'pages-{sha256}.pages')
+        if path is None:
+            return None
+        return open_page_store(path)
+
+    def record_pages(self, sha256: str, pages: Iterable[str]) -> Iterator[str]:
+        """Pass pages through unchanged while storing them; stored once exhausted."""
+        yield from write_page_store(self._path(f'pages-{sha256}.pages'), pages)
+        self.evict()
+
+    def get_questions(self, sha256: str, generator_version: str) -> Optional[List[Dict]]:
+        """Return cached [{"title": ..., "questions": [...]}, ...] or None on a miss."""
+        path = self._lookup(f'questions-{sha256}-v{generator_version}.json')
+        if path is None:
+            return None
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def put_questions(self, sha256: str, generator_version: str, chapters: List[Dict]):
+        for _ in self._write(f'questions-{sha256}-v{generator_version}.json', [chapters]):
+            pass
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and not entry.name.endswith('.part'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def stats(self) -> Dict:
+        size = sum(
+            entry.stat().st_size for entry in os.scandir(self.cache_dir)
+            if entry.is_file() and not entry.name.endswith('.part')
+        )
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes
+        }
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import unicodedata
+from typing import Dict, List, Optional
+from services.metrics import REGISTRY
+
+CACHE_LOOKUPS = REGISTRY.counter('generation_cache_lookups_total', 'Generation cache lookups, by result.')
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_chapter_text(text: str) -> str:
+    """Text as far as the cache is concerned: re-extraction or reflowed line
+    breaks should not change a chapter's key."""
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFKC', text)).strip()
+
+
+def generation_key(chapter_text: str, generator_key: str, num_questions: int) -> str:
+    digest = hashlib.sha256()
+    digest.update(json.dumps([generator_key, num_questions]).encode())
+    digest.update(b'\0')
+    digest.update(normalize_chapter_text(chapter_text).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class GenerationCache:
+    """On-disk cache of generated questions per chapter, keyed by a hash of
+    the normalized chapter text, the generator (model and parameters) and
+    the number of questions asked for.
+
+    One small JSON file per entry; least recently used entries are evicted
+    once the cache grows past max_bytes, with file mtimes recording recency.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 256 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._size = None  # bytes on disk, counted lazily
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + '.json')
+
+    def get(self, chapter_text: str, generator_key: str, num_questions: int) -> Optional[List[Dict]]:
+        path = self._path(generation_key(chapter_text, generator_key, num_questions))
+        try:
+            with open(path, encoding='utf-8') as f:
+                questions = json.load(f)['questions']
+            os.utime(path)
+        except (FileNotFoundError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            CACHE_LOOKUPS.inc(result='miss')
+            return None
+        with self._lock:
+            self.hits += 1
+        CACHE_LOOKUPS.inc(result='hit')
+        return questions
+
+    def put(self, chapter_text: str, generator_key: str, num_questions: int, questions: List[Dict]):
+        data = json.dumps({"generator": generator_key, "questions": questions}).encode('utf-8')
+        path = self._path(generation_key(chapter_text, generator_key, num_questions))
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                out.write(data)
+            try:
+                replaced = os.path.getsize(path)
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        with self._lock:
+            if self._size is not None:
+                self._size += len(data) - replaced
+            over = self._size is None or self._size > self.max_bytes
+        if over:
+            self.evict()
+
+    def _entries(self):
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith('.json'):
+                yield entry
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        total = 0
+        for entry in self._entries():
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+        entries.sort()
+        evicted = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                evicted += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        with self._lock:
+            self._size = total
+            self.evictions += evicted
+
+    def stats(self) -> Dict:
+        entries = 0
+        size = 0
+        for entry in self._entries():
+            entries += 1
+            size += entry.stat().st_size
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "evictions": self.evictions,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes
+        }
@@ -0,0 +1,57 @@
+from sqlalchemy import insert
+from typing import Dict, List, Optional
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def bulk_insert(session, model, rows: List[Dict], chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[int]:
+    """Insert rows with multi-row INSERT ... RETURNING, chunk_size rows per
+    statement. Returns the generated ids in the same order as rows."""
+    ids = []
+    statement = insert(model).returning(model.id, sort_by_parameter_order=True)
+    for start in range(0, len(rows), chunk_size):
+        ids += session.scalars(statement, rows[start:start + chunk_size]).all()
+    return ids
+
+
+class IngestionWriter:
+    """Collects an ingestion's chapters and questions and writes them in bulk.
+
+    Rows are buffered until chunk_size of them are pending, then written with
+    a few multi-row INSERTs inside the session's transaction; the caller
+    commits once when the book is done. With a chapter_model, chapters are
+    inserted first and their ids filled into their questions' chapter_id.
+    """
+
+    def __init__(self, session, question_model, chapter_model=None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.session = session
+        self.question_model = question_model
+        self.chapter_model = chapter_model
+        self.chunk_size = chunk_size
+        self.chapter_ids: List[int] = []
+        self.question_ids: List[int] = []
+        self._pending = []
+        self._pending_rows = 0
+
+    def add_chapter(self, questions: List[Dict], chapter: Optional[Dict] = None):
+        """Queue one chapter row (when chapter_model is set) and its question rows."""
+        self._pending.append((chapter, questions))
+        self._pending_rows += len(questions) + (1 if chapter is not None else 0)
+        if self._pending_rows >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        if self.chapter_model is not None:
+            chapter_ids = bulk_insert(self.session, self.chapter_model,
+                                      [chapter for chapter, _ in self._pending], self.chunk_size)
+            for chapter_id, (_, questions) in zip(chapter_ids, self._pending):
+                for question in questions:
+                    question['chapter_id'] = chapter_id
+            self.chapter_ids += chapter_ids
+        rows = [question for _, questions in self._pending for question in questions]
+        if rows:
+            self.question_ids += bulk_insert(self.session, self.question_model, rows, self.chunk_size)
+        self._pending = []
+        self._pending_rows = 0
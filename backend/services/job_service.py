@@ -0,0 +1,261 @@
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from datetime import datetime
+from typing import Dict, List, Optional
+from services.metrics import REGISTRY
+
+logger = logging.getLogger('quizzo.jobs')
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+
+
+class JobQueue:
+    """SQLite-backed queue table shared by the web process and the job workers."""
+
+    def __init__(self, db_path: str):
+        self.db_path = os.path.abspath(db_path)
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    handler TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    progress TEXT,
+                    result TEXT,
+                    error TEXT,
+                    created_at TEXT NOT NULL,
+                    started_at TEXT,
+                    finished_at TEXT,
+                    worker_pid INTEGER
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_status ON jobs (status, created_at)")
+            # Queue files from before workers recorded their pid
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "worker_pid" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN worker_pid INTEGER")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _execute(self, sql: str, params: tuple = ()) -> int:
+        with closing(self._connect()) as conn, conn:
+            return conn.execute(sql, params).rowcount
+
+    def enqueue(self, handler: str, payload: Dict) -> str:
+        """Add a job and return its id. `handler` is a 'module:function' import path."""
+        job_id = str(uuid.uuid4())
+        self._execute(
+            "INSERT INTO jobs (id, handler, payload, status, created_at) VALUES (?, ?, ?, ?, ?)",
+            (job_id, handler, json.dumps(payload), JOB_QUEUED, _now())
+        )
+        return job_id
+
+    def claim(self, job_id: str) -> Optional[Dict]:
+        """Atomically move a queued job to running in this process; returns
+        None if someone else got it."""
+        claimed = self._execute(
+            "UPDATE jobs SET status = ?, started_at = ?, worker_pid = ? WHERE id = ? AND status = ?",
+            (JOB_RUNNING, _now(), os.getpid(), job_id, JOB_QUEUED)
+        )
+        return self.get(job_id) if claimed else None
+
+    def update_progress(self, job_id: str, progress: Dict):
+        self._execute("UPDATE jobs SET progress = ? WHERE id = ?", (json.dumps(progress), job_id))
+
+    def complete(self, job_id: str, result: Optional[Dict]):
+        self._execute(
+            "UPDATE jobs SET status = ?, result = ?, finished_at = ? WHERE id = ?",
+            (JOB_COMPLETED, json.dumps(result), _now(), job_id)
+        )
+
+    def fail(self, job_id: str, error: str):
+        self._execute(
+            "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+            (JOB_FAILED, error, _now(), job_id)
+        )
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row["id"],
+            "handler": row["handler"],
+            "status": row["status"],
+            "payload": json.loads(row["payload"]),
+            "progress": json.loads(row["progress"]) if row["progress"] else None,
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"]
+        }
+
+    def queued_ids(self) -> List[str]:
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at", (JOB_QUEUED,)
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+    def requeue_stale(self) -> List[str]:
+        """Put running jobs whose worker process is gone (a crash or a
+        restart mid-job) back in the queue; returns their ids.
+
+        Jobs of live workers, e.g. another serve.py worker's pool on this
+        host, are left alone. The handler runs again from the start; its
+        uncommitted writes died with the old worker.
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT id, worker_pid FROM jobs WHERE status = ?", (JOB_RUNNING,)
+            ).fetchall()
+        requeued = []
+        for row in rows:
+            if row["worker_pid"] is not None and _pid_alive(row["worker_pid"]):
+                continue
+            if self._execute(
+                "UPDATE jobs SET status = ?, progress = NULL, started_at = NULL, worker_pid = NULL "
+                "WHERE id = ? AND status = ? AND worker_pid IS ?",
+                (JOB_QUEUED, row["id"], JOB_RUNNING, row["worker_pid"])
+            ):
+                logger.warning("Re-queued stale job", extra={"job_id": row["id"]})
+                requeued.append(row["id"])
+        return requeued
+
+
+class JobProgress:
+    """Per-chapter progress reporter handed to job handlers."""
+
+    def __init__(self, queue: JobQueue, job_id: str):
+        self.queue = queue
+        self.job_id = job_id
+        self.state = {"chapters_total": None, "chapters_done": 0, "chapters": []}
+
+    def set_total(self, chapters_total: int):
+        self.state["chapters_total"] = chapters_total
+        self.queue.update_progress(self.job_id, self.state)
+
+    def chapter_done(self, title: str, questions: int):
+        self.state["chapters_done"] += 1
+        self.state["chapters"].append({"title": title, "questions": questions})
+        self.queue.update_progress(self.job_id, self.state)
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _load_handler(path: str):
+    module_name, func_name = path.split(':', 1)
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def run_job(db_path: str, job_id: str) -> Optional[Dict]:
+    """Worker entry point: claim the job, run its handler and record the outcome.
+
+    Returns the metrics the handler recorded in this worker, for the parent
+    process to merge into its own registry.
+    """
+    queue = JobQueue(db_path)
+    job = queue.claim(job_id)
+    if job is None:
+        return None
+    try:
+        handler = _load_handler(job["handler"])
+        result = handler(job["payload"], JobProgress(queue, job_id))
+        queue.complete(job_id, result)
+    except Exception as e:
+        logger.exception("Job failed", extra={"job_id": job_id, "handler": job["handler"]})
+        queue.fail(job_id, str(e))
+    return REGISTRY.drain()
+
+
+def _merge_worker_metrics(future):
+    if not future.cancelled() and future.exception() is None and future.result():
+        REGISTRY.merge(future.result())
+
+
+class JobWorkerPool:
+    """Local process pool that executes queued jobs; no external broker required."""
+
+    def __init__(self, queue: JobQueue, max_workers: int = 2):
+        self.queue = queue
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def start(self) -> bool:
+        """Start the pool and pick up jobs left queued by a previous run,
+        along with jobs left running by a worker that has since died.
+
+        Returns False if the pool was already running.
+        """
+        with self._lock:
+            if self._executor is not None:
+                return False
+            # spawn so workers never inherit the web process's open DB connections
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        self.queue.requeue_stale()
+        for job_id in self.queue.queued_ids():
+            self._run(job_id)
+        return True
+
+    def resume(self) -> bool:
+        """Start the pool if there are jobs waiting: queued, or left running
+        by a worker that died. Every web process may call this on startup; a
+        job submitted by several pools still runs once, in whichever claims it.
+
+        Returns True if this call started the pool.
+        """
+        if self._executor is not None:
+            return False
+        if not self.queue.requeue_stale() and not self.queue.queued_ids():
+            return False
+        return self.start()
+
+    def submit(self, job_id: str):
+        # a fresh start() already submits every queued job, this one included;
+        # a job submitted twice is harmless since only one worker can claim it
+        if not self.start():
+            self._run(job_id)
+
+    def _run(self, job_id: str):
+        future = self._executor.submit(run_job, self.queue.db_path, job_id)
+        future.add_done_callback(_merge_worker_metrics)
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
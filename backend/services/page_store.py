@@ -0,0 +1,143 @@
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from typing import Iterable, Iterator, Optional
+
+# File layout (integers little-endian):
+#   MAGIC | UTF-8 pages, each followed by '\n' | padding to 8 bytes
+#   | page_count + 1 u64 offsets of page starts into the blob (the last is its end)
+#   | footer: u64 index offset, u64 page count, MAGIC
+MAGIC = b'QZPAGES1'
+FOOTER = struct.Struct('<QQ8s')
+SEPARATOR = b'\n'
+
+
+def write_page_store(path: str, pages: Iterable[str]) -> Iterator[str]:
+    """Pass pages through unchanged while writing them to a page store at
+    path; the file is published atomically once the pages are exhausted."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            out.write(MAGIC)
+            offsets = array('Q', [0])
+            for page in pages:
+                data = page.encode('utf-8', 'surrogatepass')
+                out.write(data)
+                out.write(SEPARATOR)
+                offsets.append(offsets[-1] + len(data) + len(SEPARATOR))
+                yield page
+            index_offset = len(MAGIC) + offsets[-1]
+            padding = -index_offset % 8
+            out.write(b'\0' * padding)
+            if sys.byteorder != 'little':
+                offsets.byteswap()
+            out.write(offsets.tobytes())
+            out.write(FOOTER.pack(index_offset + padding, len(offsets) - 1, MAGIC))
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class PageStore:
+    """Read-only view of a page store file through mmap.
+
+    Pages and page ranges are sliced out of the mapping without reading the
+    rest of the book: page_bytes() and range_bytes() return zero-copy
+    memoryviews, page() and text() decode just the requested bytes. Pages
+    of a range are separated by '\\n', so text(start, stop) equals
+    '\\n'.join(pages[start:stop]). Iterating yields page texts in order,
+    which lets a store stand in for extracted pages anywhere.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if len(self._mmap) < len(MAGIC) + FOOTER.size or self._mmap[:len(MAGIC)] != MAGIC:
+                raise ValueError(f'{path} is not a page store')
+            index_offset, page_count, magic = FOOTER.unpack_from(self._mmap, len(self._mmap) - FOOTER.size)
+            index_end = index_offset + 8 * (page_count + 1)
+            if magic != MAGIC or index_end != len(self._mmap) - FOOTER.size:
+                raise ValueError(f'{path} is truncated or corrupt')
+            self._view = memoryview(self._mmap)
+            if sys.byteorder == 'little':
+                self._offsets = self._view[index_offset:index_end].cast('Q')
+            else:
+                self._offsets = array('Q', self._view[index_offset:index_end])
+                self._offsets.byteswap()
+        except Exception:
+            self._mmap.close()
+            raise
+        self._blob = self._view[len(MAGIC):len(MAGIC) + self._offsets[-1]]
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self.page(i)
+
+    def __getitem__(self, i: int) -> str:
+        if not -len(self) <= i < len(self):
+            raise IndexError('page index out of range')
+        return self.page(i % len(self))
+
+    def _check_range(self, start: int, stop: int):
+        if not 0 <= start <= stop <= len(self):
+            raise IndexError(f'page range {start}:{stop} is outside 0:{len(self)}')
+
+    def page_bytes(self, i: int) -> memoryview:
+        self._check_range(i, i + 1)
+        return self._blob[self._offsets[i]:self._offsets[i + 1] - len(SEPARATOR)]
+
+    def range_bytes(self, start: int, stop: int) -> memoryview:
+        """UTF-8 of pages [start, stop) joined by '\\n', without copying."""
+        self._check_range(start, stop)
+        if start == stop:
+            return self._blob[0:0]
+        return self._blob[self._offsets[start]:self._offsets[stop] - len(SEPARATOR)]
+
+    def page(self, i: int) -> str:
+        return str(self.page_bytes(i), 'utf-8', 'surrogatepass')
+
+    def text(self, start: int = 0, stop: Optional[int] = None) -> str:
+        return str(self.range_bytes(start, len(self) if stop is None else stop), 'utf-8', 'surrogatepass')
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._mmap)
+
+    def close(self):
+        if self._mmap.closed:
+            return
+        # Views into the mapping must be released before it can be closed
+        self._blob.release()
+        if isinstance(self._offsets, memoryview):
+            self._offsets.release()
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def page_store_path(pdf_path: str) -> str:
+    """The page store of a PDF lives next to it, as <name>.pages."""
+    return os.path.splitext(pdf_path)[0] + '.pages'
+
+
+def open_page_store(path: str) -> Optional[PageStore]:
+    """The page store at path, or None when there is none (or it is unreadable)."""
+    try:
+        return PageStore(path)
+    except (FileNotFoundError, ValueError):
+        return None
@@ -0,0 +1,31 @@
+from typing import Optional, Tuple
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+def parse_keyset_args(args) -> Tuple[Optional[int], int]:
+    """Read `after_id` and `limit` from request args for keyset pagination.
+
+    Raises ValueError for non-integer or out-of-range values.
+    """
+    after_id = args.get('after_id', type=int)
+    if 'after_id' in args and after_id is None:
+        raise ValueError("after_id must be an integer")
+    limit = args.get('limit', type=int)
+    if 'limit' not in args:
+        limit = DEFAULT_LIMIT
+    elif limit is None or not 1 <= limit <= MAX_LIMIT:
+        raise ValueError(f"limit must be an integer between 1 and {MAX_LIMIT}")
+    return after_id, limit
+
+
+def next_page_headers(rows, limit: int, key=lambda row: row.id) -> dict:
+    """Trim the look-ahead row and return the headers pointing at the next page.
+
+    Callers fetch limit + 1 rows; the extra row only signals that another page exists.
+    """
+    if len(rows) <= limit:
+        return {}
+    del rows[limit:]
+    return {'X-Next-After-Id': str(key(rows[-1]))}
@@ -1,42 +1,283 @@
+import logging
 import os
+import re
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from PyPDF2 import PdfReader
-from typing import List, Dict
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
 import json
+from services.metrics import REGISTRY
+from services.sentence_index import TermIndex, select_sentences
+from services.question_generator import QuestionGenerator, HeuristicGenerator, generator_from_env
+from services.generation_cache import GenerationCache
+from services.page_store import PageStore, open_page_store, page_store_path, write_page_store
+from services.pdf_structure import ChapterRange, heading_chapters, heading_title, outline_chapters
+
+logger = logging.getLogger('quizzo.pdf')
+
+STAGE_SECONDS = REGISTRY.histogram('pdf_stage_seconds', 'Time spent in each PDFService stage.')
+STRUCTURE_SOURCE = REGISTRY.counter('pdf_structure_source_total',
+                                    'Books whose chapter structure came from the outline or from a heading scan.')
+PAGES_EXTRACTED = REGISTRY.counter('pdf_pages_extracted_total', 'Pages extracted from uploaded PDFs.')
+CHAPTERS_DETECTED = REGISTRY.counter('pdf_chapters_detected_total', 'Chapters detected in uploaded PDFs.')
+QUESTIONS_GENERATED = REGISTRY.counter('pdf_questions_generated_total', 'Questions generated from chapter text.')
+FALLBACK_CHAPTERS = REGISTRY.counter('pdf_fallback_chapters_total',
+                                     'Chapters generated heuristically because the configured generator could not serve them.')
+
+def _extract_page_range(file_path: str, start: int, stop: int) -> List[str]:
+    """Extract pages [start, stop) with a reader private to this worker process."""
+    reader = PdfReader(file_path)
+    return [reader.pages[i].extract_text() for i in range(start, stop)]
 
 class PDFService:
-    def __init__(self):
+    # Bump whenever generate_questions changes its output, so cached
+    # question sets from older generators are not reused
+    GENERATOR_VERSION = 2
+
+    def __init__(self, extract_workers: Optional[int] = None, parallel_min_pages: Optional[int] = None,
+                 generator: Optional[QuestionGenerator] = None,
+                 generation_cache: Optional[GenerationCache] = None):
         self.upload_dir = os.path.join(os.getcwd(), 'uploads')
         os.makedirs(self.upload_dir, exist_ok=True)
+        # Page extraction is spread over a process pool for files with at least
+        # parallel_min_pages pages; smaller files are read serially.
+        self.extract_workers = extract_workers or int(os.getenv('PDF_EXTRACT_WORKERS', os.cpu_count() or 1))
+        self.parallel_min_pages = parallel_min_pages or int(os.getenv('PDF_PARALLEL_MIN_PAGES', '32'))
+        self.last_extraction_stats = None
+        self._executor = None
+        # Question backend: the sentence heuristic below, or an LLM when
+        # QUESTION_GENERATOR=llm (see question_generator.generator_from_env)
+        self.generator = generator or generator_from_env(
+            self._parse_questions_from_text,
+            HeuristicGenerator(self.generate_questions, self.GENERATOR_VERSION)
+        )
+        # Per-chapter results of cacheable (model-backed) generators, so
+        # re-uploads and new editions only pay for chapters that changed
+        self.generation_cache = generation_cache
+
+    @property
+    def generator_version(self) -> str:
+        """Cache key for questions produced by the configured generator."""
+        return self.generator.cache_key
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.extract_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
 
-    def extract_text_from_pdf(self, file_path: str) -> Dict[str, str]:
-        """Extract text from PDF and split into chapters."""
+    def iter_pages(self, file_path: str, parallel: Optional[bool] = None) -> Iterator[str]:
+        """Yield the text of every page, in page order.
+
+        With parallel=None the mode is chosen from the page count and pool size.
+        """
+        started = time.perf_counter()
         reader = PdfReader(file_path)
-        chapters = {}
-        current_chapter = "Introduction"
-        current_text = ""
+        page_count = len(reader.pages)
+        if parallel is None:
+            parallel = self.extract_workers > 1 and page_count >= self.parallel_min_pages
+
+        if parallel:
+            # Two ranges per worker: keeps the pool busy when page cost is uneven
+            # without re-opening the file in every worker too often
+            chunk_size = max(1, -(-page_count // (self.extract_workers * 2)))
+            starts = range(0, page_count, chunk_size)
+            stops = [min(start + chunk_size, page_count) for start in starts]
+            results = self._get_executor().map(
+                _extract_page_range, [file_path] * len(stops), starts, stops
+            )
+            for chunk in results:
+                yield from chunk
+        else:
+            for page in reader.pages:
+                yield page.extract_text()
 
-        for page in reader.pages:
-            text = page.extract_text()
-            # Simple chapter detection - can be improved
-            if "Chapter" in text[:100]:
-                if current_text:
-                    chapters[current_chapter] = current_text.strip()
-                current_chapter = text.split('\n')[0]
-                current_text = ""
-            current_text += text + "\n"
+        elapsed = time.perf_counter() - started
+        self.last_extraction_stats = {
+            "pages": page_count,
+            "seconds": round(elapsed, 3),
+            "pages_per_sec": round(page_count / elapsed, 1) if elapsed else None,
+            "workers": self.extract_workers if parallel else 1
+        }
+        STAGE_SECONDS.observe(elapsed, stage='extract')
+        PAGES_EXTRACTED.inc(page_count, mode='parallel' if parallel else 'serial')
+        logger.info("PDF extraction stats", extra=self.last_extraction_stats)
 
-        if current_text:
-            chapters[current_chapter] = current_text.strip()
+    def page_store_path(self, file_path: str) -> str:
+        return page_store_path(file_path)
+
+    def load_page_store(self, file_path: str, parallel: Optional[bool] = None) -> PageStore:
+        """The PDF's page store, extracting the PDF into it first if needed."""
+        path = self.page_store_path(file_path)
+        store = open_page_store(path)
+        if store is None:
+            for _ in write_page_store(path, self.iter_pages(file_path, parallel=parallel)):
+                pass
+            store = PageStore(path)
+        return store
+
+    def outline_chapters(self, file_path: str) -> List[ChapterRange]:
+        """Chapter page ranges from the PDF's outline, without extracting
+        text; [] when it has none."""
+        started = time.perf_counter()
+        chapters = outline_chapters(PdfReader(file_path))
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage='structure')
+        return chapters
 
+    def discover_chapters(self, file_path: str) -> List[ChapterRange]:
+        """The book's chapter page ranges: from the outline when there is
+        one, otherwise by scanning the page store for chapter headings."""
+        chapters = self.outline_chapters(file_path)
+        if chapters:
+            STRUCTURE_SOURCE.inc(source='outline')
+            return chapters
+        STRUCTURE_SOURCE.inc(source='headings')
+        started = time.perf_counter()
+        with self.load_page_store(file_path) as store:
+            chapters = heading_chapters(store)
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage='structure')
         return chapters
 
-    def generate_questions(self, chapter_text: str, num_questions: int = 5) -> List[Dict]:
+    def extract_chapters(self, file_path: str, chapters: Optional[List[ChapterRange]] = None,
+                         selected: Optional[Iterable[int]] = None,
+                         parallel: Optional[bool] = None) -> Iterator[Tuple[str, str]]:
+        """Yield (chapter_title, chapter_text) for the book's chapters, or
+        only those at the `selected` indexes, in order.
+
+        Text is sliced from the page store when the book has one; otherwise
+        only the chosen chapters' pages are extracted, a chapter per task
+        on the process pool when there are enough pages to be worth it.
+        """
+        chapters = chapters if chapters is not None else self.discover_chapters(file_path)
+        if selected is not None:
+            chapters = [chapters[i] for i in sorted(set(selected))]
+        store = open_page_store(self.page_store_path(file_path))
+        if store is not None:
+            with store:
+                for chapter in chapters:
+                    yield chapter.title, store.text(chapter.start, chapter.stop).strip()
+            return
+
+        started = time.perf_counter()
+        pages = sum(chapter.stop - chapter.start for chapter in chapters)
+        if parallel is None:
+            parallel = self.extract_workers > 1 and len(chapters) > 1 and pages >= self.parallel_min_pages
+        if parallel:
+            texts = self._get_executor().map(
+                _extract_page_range, [file_path] * len(chapters),
+                [chapter.start for chapter in chapters], [chapter.stop for chapter in chapters]
+            )
+        else:
+            reader = PdfReader(file_path)
+            texts = ([reader.pages[i].extract_text() for i in range(chapter.start, chapter.stop)]
+                     for chapter in chapters)
+        for chapter, page_texts in zip(chapters, texts):
+            yield chapter.title, "\n".join(page_texts).strip()
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage='extract')
+        PAGES_EXTRACTED.inc(pages, mode='parallel' if parallel else 'serial')
+
+    def split_chapters(self, pages: Iterable[str],
+                       chapters: Optional[List[ChapterRange]] = None) -> Iterator[Tuple[str, str]]:
+        """Group page texts into chapters, holding only the current chapter in memory.
+
+        Chapter starts are found by heading unless the page ranges are given
+        (e.g. from outline_chapters).
+        """
+        if isinstance(pages, PageStore):
+            yield from self._split_stored_chapters(pages, chapters)
+            return
+        starts = {chapter.start: chapter.title for chapter in chapters} if chapters else None
+        current_chapter = "Introduction"
+        current_pages = []
+        # Only this method's own work is timed, not the page extraction
+        # feeding it or the consumer of each chapter
+        busy = 0.0
+        count = 0
+
+        for number, text in enumerate(pages):
+            started = time.perf_counter()
+            title = starts.get(number) if starts is not None else heading_title(text)
+            if title is not None:
+                if current_pages:
+                    chapter = current_chapter, "\n".join(current_pages).strip()
+                    busy += time.perf_counter() - started
+                    count += 1
+                    yield chapter
+                    started = time.perf_counter()
+                current_chapter = title
+                current_pages = []
+            current_pages.append(text)
+            busy += time.perf_counter() - started
+
+        if current_pages:
+            count += 1
+            yield current_chapter, "\n".join(current_pages).strip()
+        STAGE_SECONDS.observe(busy, stage='split_chapters')
+        CHAPTERS_DETECTED.inc(count)
+
+    def _split_stored_chapters(self, store: PageStore,
+                               chapters: Optional[List[ChapterRange]] = None) -> Iterator[Tuple[str, str]]:
+        """split_chapters off a page store: pages are only decoded to look
+        for chapter starts, and each chapter's text is one slice of the store."""
+        if chapters is None:
+            started = time.perf_counter()
+            chapters = heading_chapters(store)
+            STAGE_SECONDS.observe(time.perf_counter() - started, stage='split_chapters')
+        for chapter in chapters:
+            yield chapter.title, store.text(chapter.start, min(chapter.stop, len(store))).strip()
+        CHAPTERS_DETECTED.inc(len(chapters))
+
+    def build_term_index(self, pages: Iterable[str]) -> TermIndex:
+        """Per-book term rarity for generate_questions; build once per ingestion."""
+        return TermIndex.from_documents(pages)
+
+    def generate_chapter_questions(self, chapters: Iterable[Tuple[str, str]], num_questions: int = 5,
+                                   term_index: Optional[TermIndex] = None) -> Iterator[Tuple[str, List[Dict]]]:
+        """Yield (chapter_title, questions) in chapter order using the configured
+        generator, handing it as many chapters at a time as it can batch."""
+        budget = self.generator.new_budget()
+        window = []
+        for chapter in chapters:
+            window.append(chapter)
+            if len(window) >= self.generator.window:
+                yield from self._generate_window(window, num_questions, term_index, budget)
+                window = []
+        if window:
+            yield from self._generate_window(window, num_questions, term_index, budget)
+
+    def _generate_window(self, window, num_questions, term_index, budget):
+        cache = self.generation_cache if self.generator.cacheable else None
+        key = self.generator.cache_key
+        results = [cache.get(text, key, num_questions) if cache else None for _, text in window]
+        missing = [i for i, questions in enumerate(results) if questions is None]
+        if missing:
+            generated = self.generator.generate_batch([window[i][1] for i in missing], num_questions,
+                                                      term_index=term_index, budget=budget)
+            for i, questions in zip(missing, generated):
+                text = window[i][1]
+                if questions:
+                    if cache:
+                        cache.put(text, key, num_questions, questions)
+                else:
+                    # never cached: a later run may get the real thing
+                    FALLBACK_CHAPTERS.inc()
+                    questions = self.generate_questions(text, num_questions, term_index=term_index)
+                results[i] = questions
+        for (title, _), questions in zip(window, results):
+            yield title, questions
+
+    def generate_questions(self, chapter_text: str, num_questions: int = 5,
+                           term_index: Optional[TermIndex] = None) -> List[Dict]:
         """Generate simple multiple choice questions based on the text."""
-        # Split text into sentences
-        sentences = [s.strip() for s in chapter_text.split('.') if len(s.strip()) > 50]
+        started = time.perf_counter()
+        # Best-scoring sentences from anywhere in the chapter, in reading order
+        sentences = select_sentences(chapter_text, num_questions, term_index)
         
         questions = []
-        for i, sentence in enumerate(sentences[:num_questions]):
+        for i, sentence in enumerate(sentences):
             # Create a simple question from the sentence
             question = {
                 "id": i + 1,
@@ -52,6 +293,8 @@ class PDFService:
             }
             questions.append(question)
         
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage='generate')
+        QUESTIONS_GENERATED.inc(len(questions))
         return questions
 
     def _parse_questions_from_text(self, text: str) -> List[Dict]:
@@ -65,20 +308,21 @@ class PDFService:
             if not line:
                 continue
                 
-            if line.startswith(('1.', '2.', '3.', '4.', '5.')):
-                if current_question:
+            numbered = re.match(r'(\d+)[.)]\s*(.*)', line)
+            if numbered:
+                if current_question and current_options:
                     questions.append({
                         'question': current_question,
                         'options': current_options,
                         'correct_answer': current_options[0],  # Assuming first option is correct
                         'difficulty': 'medium'
                     })
-                current_question = line[2:].strip()
+                current_question = numbered.group(2).strip()
                 current_options = []
             elif line.startswith(('a)', 'b)', 'c)', 'd)')):
                 current_options.append(line[2:].strip())
         
-        if current_question:
+        if current_question and current_options:
             questions.append({
                 'question': current_question,
                 'options': current_options,
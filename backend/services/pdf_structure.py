@@ -0,0 +1,144 @@
+import re
+from collections import namedtuple
+from typing import Callable, Iterable, List, Optional
+
+# A chapter's pages are [start, stop), 0-based; label is the printed page
+# label of its first page (e.g. "xi" or "37") when the PDF defines labels
+ChapterRange = namedtuple('ChapterRange', ['title', 'start', 'stop', 'label'])
+
+FRONT_MATTER_TITLE = "Introduction"
+# Only the top of a page is searched for a heading
+HEADING_CHARS = 300
+CHAPTER_HEADING = re.compile(
+    r'^[ \t]*(?:chapter|unit|lesson)[ \t]+(?:\d+|[ivxlcdm]+|one|two|three|four|five|six|seven|eight|nine|ten'
+    r'|eleven|twelve|thirteen|fourteen|fifteen|sixteen|seventeen|eighteen|nineteen|twenty)\b[^\n]*',
+    re.IGNORECASE | re.MULTILINE
+)
+
+
+def heading_title(text: str) -> Optional[str]:
+    """The chapter heading near the top of a page, or None."""
+    match = CHAPTER_HEADING.search(text, 0, HEADING_CHARS)
+    return match.group(0).strip() if match else None
+
+
+def _ranges(starts: List[tuple], page_count: int, label: Callable[[int], Optional[str]]) -> List[ChapterRange]:
+    """Chapters from sorted (first_page, title) starts; pages before the
+    first start become a front-matter chapter."""
+    if not starts or starts[0][0] > 0:
+        starts = [(0, FRONT_MATTER_TITLE)] + starts
+    bounds = [page for page, _ in starts[1:]] + [page_count]
+    return [ChapterRange(title, start, stop, label(start))
+            for (start, title), stop in zip(starts, bounds) if start < stop]
+
+
+def heading_chapters(pages: Iterable[str], page_count: Optional[int] = None) -> List[ChapterRange]:
+    """Fallback structure: scan page text for chapter headings."""
+    starts = []
+    count = 0
+    for number, text in enumerate(pages):
+        count += 1
+        title = heading_title(text)
+        if title is not None:
+            starts.append((number, title))
+    if not count:
+        return []
+    return _ranges(starts, page_count or count, lambda page: None)
+
+
+def _flatten(outline, depth: int = 0):
+    for item in outline:
+        if isinstance(item, list):
+            yield from _flatten(item, depth + 1)
+        else:
+            yield depth, item
+
+
+def outline_chapters(reader) -> List[ChapterRange]:
+    """Chapters from the PDF outline (bookmarks) without extracting any text.
+
+    The chapter level is the shallowest outline level with at least two
+    entries, so a single top-level entry naming the book is skipped.
+    Returns [] when the PDF has no usable outline.
+    """
+    try:
+        outline = reader.outline
+        page_count = len(reader.pages)
+    except Exception:  # malformed outlines raise all sorts of PdfReadErrors
+        return []
+    entries = []
+    for depth, item in _flatten(outline):
+        try:
+            page = reader.get_destination_page_number(item)
+        except Exception:
+            continue
+        if page is not None and 0 <= page < page_count:
+            entries.append((depth, page, str(item.title).strip() or f'Page {page + 1}'))
+    if not entries:
+        return []
+    depths = sorted({depth for depth, _, _ in entries})
+    level = next((d for d in depths if sum(1 for depth, _, _ in entries if depth == d) >= 2), depths[0])
+
+    starts = []
+    for _, page, title in sorted((e for e in entries if e[0] == level), key=lambda e: e[1]):
+        if not starts or starts[-1][0] != page:
+            starts.append((page, title))
+    return _ranges(starts, page_count, page_labeler(reader))
+
+
+def _roman(number: int) -> str:
+    numerals = [(1000, 'm'), (900, 'cm'), (500, 'd'), (400, 'cd'), (100, 'c'), (90, 'xc'),
+                (50, 'l'), (40, 'xl'), (10, 'x'), (9, 'ix'), (5, 'v'), (4, 'iv'), (1, 'i')]
+    out = []
+    for value, numeral in numerals:
+        while number >= value:
+            out.append(numeral)
+            number -= value
+    return ''.join(out)
+
+
+def _letters(number: int) -> str:
+    # a..z, then aa..zz, ... (PDF 32000-1, 12.4.2)
+    return chr(ord('a') + (number - 1) % 26) * ((number - 1) // 26 + 1)
+
+
+def _label_ranges(node, out: List):
+    node = node.get_object()
+    if '/Nums' in node:
+        nums = node['/Nums']
+        for i in range(0, len(nums) - 1, 2):
+            out.append((int(nums[i]), nums[i + 1].get_object()))
+    for kid in node.get('/Kids', []):
+        _label_ranges(kid, out)
+
+
+def page_labeler(reader) -> Callable[[int], Optional[str]]:
+    """Page index -> printed page label from the catalog's /PageLabels,
+    or None for every page when the PDF defines none."""
+    try:
+        ranges = []
+        _label_ranges(reader.trailer['/Root']['/PageLabels'], ranges)
+    except Exception:
+        return lambda page: None
+    ranges.sort(key=lambda r: r[0])
+    styles = {
+        '/D': str,
+        '/R': lambda n: _roman(n).upper(),
+        '/r': _roman,
+        '/A': lambda n: _letters(n).upper(),
+        '/a': _letters,
+    }
+
+    def label(page: int) -> Optional[str]:
+        current = None
+        for start, spec in ranges:
+            if start > page:
+                break
+            current = start, spec
+        if current is None:
+            return None
+        start, spec = current
+        number = int(spec.get('/St', 1)) + page - start
+        style = styles.get(spec.get('/S'))
+        return str(spec.get('/P', '')) + (style(number) if style else '')
+    return label
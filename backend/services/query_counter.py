@@ -0,0 +1,50 @@
+from sqlalchemy import event
+from typing import List
+
+
+class QueryCounter:
+    """Context manager that records every SQL statement an engine executes.
+
+    with QueryCounter(db.engine) as counter:
+        client.get('/api/quiz/1')
+    assert counter.count <= 2, counter.statements
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements: List[str] = []
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._before_cursor_execute)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        event.remove(self.engine, 'before_cursor_execute', self._before_cursor_execute)
+        return False
+
+
+def assert_max_queries(engine, max_queries: int):
+    """QueryCounter that raises AssertionError on exit if the budget was exceeded."""
+    return _BudgetedQueryCounter(engine, max_queries)
+
+
+class _BudgetedQueryCounter(QueryCounter):
+    def __init__(self, engine, max_queries: int):
+        super().__init__(engine)
+        self.max_queries = max_queries
+
+    def __exit__(self, exc_type, exc, tb):
+        super().__exit__(exc_type, exc, tb)
+        if exc_type is None and self.count > self.max_queries:
+            raise AssertionError(
+                f"{self.count} SQL statements executed, budget is {self.max_queries}:\n"
+                + "\n".join(self.statements)
+            )
+        return False
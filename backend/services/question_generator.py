@@ -0,0 +1,288 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import time
+import urllib.error
+import urllib.request
+from typing import Callable, Dict, List, Optional, Sequence
+from services.metrics import REGISTRY
+
+logger = logging.getLogger('quizzo.generator')
+
+LLM_REQUESTS = REGISTRY.counter('llm_requests_total', 'Generation requests sent to the LLM backend, by outcome.')
+LLM_TOKENS = REGISTRY.counter('llm_tokens_total', 'Tokens used by the LLM backend, as reported by the server.')
+LLM_SECONDS = REGISTRY.histogram('llm_request_seconds', 'LLM request latency, including retries.')
+
+RETRYABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+# Bump whenever the prompt or response handling changes
+PROMPT_VERSION = 1
+SYSTEM_PROMPT = "You write multiple-choice quiz questions for students from textbook chapters."
+CHAPTER_MARKER = re.compile(r'^#+\s*Chapter\s+(\d+)\s*$', re.MULTILINE | re.IGNORECASE)
+
+
+class LLMError(Exception):
+    pass
+
+
+class RetryableLLMError(LLMError):
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBudget:
+    """Token allowance for one book; limit 0 means unlimited."""
+
+    def __init__(self, limit: int = 0):
+        self.limit = limit
+        self.used = 0
+        self.reserved = 0
+
+    def reserve(self, tokens: int) -> bool:
+        if self.limit and self.used + self.reserved + tokens > self.limit:
+            return False
+        self.reserved += tokens
+        return True
+
+    def settle(self, reserved: int, used: int):
+        self.reserved -= reserved
+        self.used += used
+
+
+class QuestionGenerator:
+    """Turns chapter texts into question dicts (text, options, correct_answer,
+    difficulty). PDFService hands a backend up to `window` chapters at a time.
+
+    generate_batch returns one list per chapter, or None for a chapter the
+    backend could not serve; PDFService fills those in heuristically.
+    Output of a cacheable backend depends only on the chapter text and
+    cache_key, so PDFService may store it in its GenerationCache.
+    """
+
+    window = 1
+    cacheable = False
+
+    @property
+    def cache_key(self) -> str:
+        """Identifies the generator's output, for caching generated questions."""
+        raise NotImplementedError
+
+    def new_budget(self) -> Optional[TokenBudget]:
+        return None
+
+    def generate_batch(self, chapters: Sequence[str], num_questions: int, term_index=None,
+                       budget: Optional[TokenBudget] = None) -> List[Optional[List[Dict]]]:
+        raise NotImplementedError
+
+
+class HeuristicGenerator(QuestionGenerator):
+    """Sentence-selection questions from PDFService.generate_questions; no network.
+
+    Not cacheable: the choice of sentences depends on the book's term index.
+    """
+
+    def __init__(self, generate: Callable, version: int):
+        self.generate = generate
+        self.version = version
+
+    @property
+    def cache_key(self) -> str:
+        return str(self.version)
+
+    def generate_batch(self, chapters, num_questions, term_index=None, budget=None):
+        return [self.generate(text, num_questions, term_index=term_index) for text in chapters]
+
+
+class LLMGenerator(QuestionGenerator):
+    """Questions from an OpenAI-compatible /chat/completions endpoint.
+
+    Chapters are sent batch_chapters per request, with up to concurrency
+    requests in flight. Retryable failures (429, 5xx, timeouts) back off
+    exponentially, honouring Retry-After. Chapters that fail, or that
+    would exceed the book's token budget, come back as None.
+    """
+
+    cacheable = True
+
+    def __init__(self, base_url: str, model: str, parse: Callable[[str], List[Dict]],
+                 api_key: Optional[str] = None,
+                 concurrency: int = 4, batch_chapters: int = 2, max_retries: int = 3,
+                 token_budget: int = 0, timeout: float = 60, max_chapter_chars: int = 12000,
+                 temperature: float = 0.2, backoff: float = 0.5):
+        self.base_url = base_url.rstrip('/')
+        self.model = model
+        self.parse = parse
+        self.api_key = api_key
+        self.concurrency = max(1, concurrency)
+        self.batch_chapters = max(1, batch_chapters)
+        self.max_retries = max_retries
+        self.token_budget = token_budget
+        self.timeout = timeout
+        self.max_chapter_chars = max_chapter_chars
+        self.temperature = temperature
+        self.backoff = backoff
+
+    @property
+    def window(self) -> int:
+        return self.concurrency * self.batch_chapters
+
+    @property
+    def cache_key(self) -> str:
+        # Chapters are truncated and grouped into one prompt, so both settings
+        # change what the model is asked
+        model = re.sub(r'[^A-Za-z0-9.]+', '-', self.model)
+        return (f'llm{PROMPT_VERSION}-{model}-t{self.temperature}'
+                f'-c{self.max_chapter_chars}-b{self.batch_chapters}')
+
+    def new_budget(self) -> TokenBudget:
+        return TokenBudget(self.token_budget)
+
+    def generate_batch(self, chapters, num_questions, term_index=None, budget=None):
+        budget = budget or self.new_budget()
+        return asyncio.run(self._generate_all(list(chapters), num_questions, budget))
+
+    async def _generate_all(self, chapters: List[str], num_questions: int, budget: TokenBudget):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        starts = range(0, len(chapters), self.batch_chapters)
+        groups = await asyncio.gather(*(
+            self._generate_group(chapters[start:start + self.batch_chapters], num_questions, budget, semaphore)
+            for start in starts
+        ))
+        return [questions for group in groups for questions in group]
+
+    async def _generate_group(self, chapters: List[str], num_questions: int, budget: TokenBudget,
+                              semaphore: asyncio.Semaphore) -> List[Optional[List[Dict]]]:
+        prompt = self._prompt(chapters, num_questions)
+        max_tokens = 90 * num_questions * len(chapters)
+        # ~4 characters per token is close enough for budgeting
+        estimate = len(prompt) // 4 + len(SYSTEM_PROMPT) // 4 + max_tokens
+        if not budget.reserve(estimate):
+            logger.warning("LLM token budget exhausted", extra={
+                "budget": budget.limit, "used": budget.used, "chapters": len(chapters)})
+            LLM_REQUESTS.inc(outcome='over_budget')
+            return [None] * len(chapters)
+
+        used = 0
+        try:
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await self._request(prompt, max_tokens)
+                finally:
+                    LLM_SECONDS.observe(time.perf_counter() - started)
+            used = (response.get('usage') or {}).get('total_tokens', estimate)
+            LLM_TOKENS.inc(used)
+            LLM_REQUESTS.inc(outcome='ok')
+            content = response['choices'][0]['message']['content']
+            return self._split_response(content, len(chapters), num_questions)
+        except (LLMError, KeyError, IndexError, TypeError, ValueError) as e:
+            LLM_REQUESTS.inc(outcome='error')
+            logger.warning("LLM generation failed", extra={"error": str(e), "chapters": len(chapters)})
+            return [None] * len(chapters)
+        finally:
+            budget.settle(estimate, used)
+
+    def _prompt(self, chapters: List[str], num_questions: int) -> str:
+        parts = [
+            f"Write {num_questions} multiple-choice questions for each chapter below. "
+            "For each chapter write the line '### Chapter <number>' and then its questions "
+            "in exactly this format:\n"
+            "1. Question text\na) correct answer\nb) wrong answer\nc) wrong answer\nd) wrong answer\n"
+            "Always give the correct answer as option a). Do not add anything else.\n"
+        ]
+        for number, text in enumerate(chapters, start=1):
+            parts.append(f"### Chapter {number}\n{text[:self.max_chapter_chars]}\n")
+        return '\n'.join(parts)
+
+    def _split_response(self, content: str, chapters: int, num_questions: int) -> List[Optional[List[Dict]]]:
+        pieces = CHAPTER_MARKER.split(content)
+        sections = {}
+        # split() alternates text and captured chapter numbers: [pre, n1, body1, n2, body2, ...]
+        for number, body in zip(pieces[1::2], pieces[2::2]):
+            sections.setdefault(int(number), body)
+        if not sections and chapters == 1:
+            sections[1] = content
+        results = []
+        for number in range(1, chapters + 1):
+            questions = [self._normalise(q) for q in self.parse(sections.get(number, ''))]
+            results.append(questions[:num_questions] or None)
+        return results
+
+    @staticmethod
+    def _normalise(question: Dict) -> Dict:
+        # The prompt puts the answer first; shuffle deterministically so a
+        # re-generation from the same response gives the same quiz
+        options = list(question['options'])
+        random.Random(hashlib.sha1(question['question'].encode()).digest()).shuffle(options)
+        return {
+            "text": question['question'],
+            "options": options,
+            "correct_answer": question['correct_answer'],
+            "difficulty": question['difficulty']
+        }
+
+    async def _request(self, prompt: str, max_tokens: int) -> Dict:
+        body = json.dumps({
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": self.temperature,
+            "max_tokens": max_tokens
+        }).encode()
+        for attempt in range(self.max_retries + 1):
+            try:
+                # urllib blocks, so each request runs on the default thread pool;
+                # the semaphore bounds how many do at once
+                return await asyncio.to_thread(self._post, body)
+            except RetryableLLMError as e:
+                if attempt == self.max_retries:
+                    raise
+                LLM_REQUESTS.inc(outcome='retry')
+                delay = e.retry_after if e.retry_after is not None else \
+                    self.backoff * (2 ** attempt) * (0.5 + random.random())
+                await asyncio.sleep(delay)
+
+    def _post(self, body: bytes) -> Dict:
+        headers = {'Content-Type': 'application/json'}
+        if self.api_key:
+            headers['Authorization'] = f'Bearer {self.api_key}'
+        request = urllib.request.Request(f'{self.base_url}/chat/completions', data=body,
+                                         headers=headers, method='POST')
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            if e.code in RETRYABLE_STATUSES:
+                retry_after = e.headers.get('Retry-After')
+                raise RetryableLLMError(f'HTTP {e.code}',
+                                        float(retry_after) if retry_after and retry_after.isdigit() else None)
+            raise LLMError(f'HTTP {e.code}: {e.read()[:200]!r}')
+        except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+            raise RetryableLLMError(str(e))
+
+
+def generator_from_env(parse: Callable[[str], List[Dict]], default: QuestionGenerator) -> QuestionGenerator:
+    """QUESTION_GENERATOR=llm selects LLMGenerator, configured by LLM_BASE_URL,
+    LLM_MODEL, LLM_API_KEY, LLM_CONCURRENCY, LLM_BATCH_CHAPTERS, LLM_MAX_RETRIES,
+    LLM_TOKEN_BUDGET (per book, 0 = unlimited), LLM_TIMEOUT and
+    LLM_MAX_CHAPTER_CHARS. Anything else keeps the heuristic generator."""
+    if os.getenv('QUESTION_GENERATOR', 'heuristic').lower() != 'llm':
+        return default
+    return LLMGenerator(
+        base_url=os.getenv('LLM_BASE_URL', 'http://127.0.0.1:8089/v1'),
+        model=os.getenv('LLM_MODEL', 'gpt-4o-mini'),
+        parse=parse,
+        api_key=os.getenv('LLM_API_KEY') or os.getenv('OPENAI_API_KEY'),
+        concurrency=int(os.getenv('LLM_CONCURRENCY', '4')),
+        batch_chapters=int(os.getenv('LLM_BATCH_CHAPTERS', '2')),
+        max_retries=int(os.getenv('LLM_MAX_RETRIES', '3')),
+        token_budget=int(os.getenv('LLM_TOKEN_BUDGET', '0')),
+        timeout=float(os.getenv('LLM_TIMEOUT', '60')),
+        max_chapter_chars=int(os.getenv('LLM_MAX_CHAPTER_CHARS', '12000'))
+    )
@@ -0,0 +1,179 @@
+import random
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import bindparam, insert, select, update
+from models.models import Question, QuestionLevel
+from services import analytics
+
+LEVELS = ('easy', 'medium', 'hard')
+# Share of each level in a quiz, by target difficulty
+MIXES = {
+    'easy': {'easy': 0.6, 'medium': 0.3, 'hard': 0.1},
+    'medium': {'easy': 0.25, 'medium': 0.5, 'hard': 0.25},
+    'hard': {'easy': 0.1, 'medium': 0.3, 'hard': 0.6},
+}
+# A question's label is trusted until this many students have answered it
+MIN_ATTEMPTS = 10
+EASY_CORRECT_RATE = 0.8
+HARD_CORRECT_RATE = 0.5
+# Median answer time (a TIME_BUCKETS bound) at which a question counts one level harder
+SLOW_MEDIAN_SECONDS = 120
+CHUNK_SIZE = 500
+
+_CHANGE_LEVEL = update(QuestionLevel.__table__).where(
+    QuestionLevel.question_id == bindparam('b_question_id')).values(level=bindparam('b_level'))
+_CHANGE_KEY = update(QuestionLevel.__table__).where(
+    QuestionLevel.question_id == bindparam('b_question_id')).values(sample_key=bindparam('b_sample_key'))
+
+
+def _chunks(items: List, size: int = CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def question_level(labelled: Optional[str], summary: Optional[Dict] = None) -> str:
+    """The level a question is served at: measured once it has MIN_ATTEMPTS
+    answers (correct rate, then bumped a level if students are slow on it),
+    otherwise its labelled difficulty."""
+    if not summary or summary['attempts'] < MIN_ATTEMPTS:
+        return labelled if labelled in LEVELS else 'medium'
+    rate = summary['correct_rate']
+    level = 0 if rate >= EASY_CORRECT_RATE else 2 if rate < HARD_CORRECT_RATE else 1
+    median = summary['median_time_seconds']
+    if median is not None and median >= SLOW_MEDIAN_SECONDS:
+        level = min(level + 1, len(LEVELS) - 1)
+    return LEVELS[level]
+
+
+def index_chapters(bind, chapter_ids: Optional[Iterable[int]] = None, rng: Optional[random.Random] = None) -> int:
+    """Add index rows for questions of the given chapters (all chapters when
+    None) that have none yet. Works on a Session or a Connection; returns
+    the number of questions indexed."""
+    rng = rng or random.Random()
+    query = select(Question.id, Question.chapter_id, Question.difficulty).outerjoin(
+        QuestionLevel, QuestionLevel.question_id == Question.id
+    ).where(QuestionLevel.question_id.is_(None)).order_by(Question.id)
+    if chapter_ids is not None:
+        query = query.where(Question.chapter_id.in_(list(chapter_ids)))
+    missing = bind.execute(query).all()
+
+    indexed = 0
+    for chunk in _chunks(missing):
+        summaries = analytics.question_summaries(bind, [row.id for row in chunk])
+        bind.execute(insert(QuestionLevel), [{
+            "question_id": row.id,
+            "chapter_id": row.chapter_id,
+            "level": question_level(row.difficulty, summaries[row.id]),
+            "sample_key": rng.random()
+        } for row in chunk])
+        indexed += len(chunk)
+    return indexed
+
+
+def refresh_levels(bind, question_ids: List[int]) -> int:
+    """Re-measure questions whose statistics just changed; returns how many
+    moved to another level."""
+    changed = []
+    for chunk in _chunks(list(question_ids)):
+        current = bind.execute(
+            select(QuestionLevel.question_id, QuestionLevel.level, Question.difficulty)
+            .join(Question, Question.id == QuestionLevel.question_id)
+            .where(QuestionLevel.question_id.in_(chunk))
+        ).all()
+        summaries = analytics.question_summaries(bind, chunk)
+        for row in current:
+            level = question_level(row.difficulty, summaries[row.question_id])
+            if level != row.level:
+                changed.append({"b_question_id": row.question_id, "b_level": level})
+    if changed:
+        bind.execute(_CHANGE_LEVEL, changed)
+    return len(changed)
+
+
+def target_mix(difficulty: str = 'medium', mix: Optional[Dict] = None) -> Dict[str, float]:
+    """Level shares for a quiz, from a named difficulty or an explicit
+    {level: weight} mix. Raises ValueError for anything else."""
+    if mix is None:
+        if difficulty not in MIXES:
+            raise ValueError(f"difficulty must be one of {', '.join(MIXES)} or adaptive")
+        return MIXES[difficulty]
+    if not isinstance(mix, dict) or not set(mix) <= set(LEVELS):
+        raise ValueError(f"mix must map {', '.join(LEVELS)} to weights")
+    try:
+        weights = {level: float(mix.get(level, 0)) for level in LEVELS}
+    except (TypeError, ValueError):
+        raise ValueError("mix weights must be numbers")
+    total = sum(weights.values())
+    if any(w < 0 for w in weights.values()) or total <= 0:
+        raise ValueError("mix weights must be non-negative and not all zero")
+    return {level: w / total for level, w in weights.items()}
+
+
+def adaptive_difficulty(student_summary: Dict) -> str:
+    """Target difficulty from a student's record (analytics.student_summary)."""
+    mean = student_summary['score']['mean']
+    if mean is None:
+        return 'medium'
+    return 'hard' if mean >= 80 else 'easy' if mean < 50 else 'medium'
+
+
+def allocate(num_questions: int, mix: Dict[str, float]) -> Dict[str, int]:
+    """Split num_questions across levels by largest remainder."""
+    exact = {level: num_questions * mix.get(level, 0) for level in LEVELS}
+    counts = {level: int(share) for level, share in exact.items()}
+    by_remainder = sorted(LEVELS, key=lambda level: exact[level] - counts[level], reverse=True)
+    for level in by_remainder[:num_questions - sum(counts.values())]:
+        counts[level] += 1
+    return counts
+
+
+def _draw(bind, chapter_id: int, level: str, count: int, rng: random.Random) -> List[int]:
+    """Up to count questions of one level, read through the index from a
+    random sample_key onwards (wrapping around)."""
+    start = rng.random()
+    base = select(QuestionLevel.question_id).where(
+        QuestionLevel.chapter_id == chapter_id, QuestionLevel.level == level
+    ).order_by(QuestionLevel.sample_key)
+    ids = list(bind.execute(base.where(QuestionLevel.sample_key >= start).limit(count)).scalars())
+    if len(ids) < count:
+        ids += bind.execute(base.where(QuestionLevel.sample_key < start).limit(count - len(ids))).scalars()
+    return ids
+
+
+def assemble(bind, chapter_id: int, num_questions: int, mix: Dict[str, float],
+             rng: Optional[random.Random] = None) -> List[Tuple[int, str]]:
+    """Pick up to num_questions (question_id, level) pairs from a chapter,
+    easiest first, in proportions as close to mix as the chapter allows.
+
+    Each level is one or two index range reads, whatever the chapter's size.
+    Drawn questions get fresh sample keys, so questions that happened to be
+    neighbours in the index are not served together again.
+    """
+    rng = rng or random.Random()
+    wanted = allocate(num_questions, mix)
+    chosen = {level: _draw(bind, chapter_id, level, wanted[level], rng) if wanted[level] else []
+              for level in LEVELS}
+    exhausted = {level for level in LEVELS if len(chosen[level]) < wanted[level]}
+
+    # Make up a short level from the closest levels that still have questions
+    for position, level in enumerate(LEVELS):
+        need = wanted[level] - len(chosen[level])
+        for other in sorted(LEVELS, key=lambda l: abs(LEVELS.index(l) - position)):
+            if need <= 0:
+                break
+            if other in exhausted:
+                continue
+            taken = set(chosen[other])
+            extra = [qid for qid in _draw(bind, chapter_id, other, len(taken) + need, rng) if qid not in taken]
+            if len(extra) < need:
+                exhausted.add(other)
+            chosen[other] += extra[:need]
+            need -= len(extra[:need])
+
+    picked = []
+    for level in LEVELS:
+        rng.shuffle(chosen[level])
+        picked += [(question_id, level) for question_id in chosen[level]]
+    if picked:
+        bind.execute(_CHANGE_KEY, [{"b_question_id": question_id, "b_sample_key": rng.random()}
+                                   for question_id, _ in sorted(picked)])
+    return picked
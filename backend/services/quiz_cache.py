@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+
+class CachedQuestion(NamedTuple):
+    id: int
+    text: str
+    options: Tuple[str, ...]
+    correct_answer: str
+    difficulty: Optional[str]
+
+
+class QuizQuestionSet(NamedTuple):
+    """Immutable snapshot of a quiz's questions plus its answer key."""
+    questions: Tuple[CachedQuestion, ...]
+    answer_key: Mapping[str, str]  # str(question id) -> correct answer
+    version: str  # content digest, used as the HTTP ETag
+
+    @classmethod
+    def from_rows(cls, rows) -> 'QuizQuestionSet':
+        questions = tuple(
+            CachedQuestion(q.id, q.text, tuple(q.options), q.correct_answer, q.difficulty)
+            for q in rows
+        )
+        answer_key = MappingProxyType({str(q.id): q.correct_answer for q in questions})
+        version = hashlib.sha1(json.dumps(questions).encode()).hexdigest()
+        return cls(questions, answer_key, version)
+
+
+class QuizQuestionCache:
+    """Bounded read-through LRU cache of QuizQuestionSet keyed by quiz id.
+
+    Entries expire after ttl seconds. clear() also bumps a generation file
+    that every process sharing it checks (at most once per second), so a
+    reset run from another process invalidates this one too.
+    """
+
+    GENERATION_CHECK_INTERVAL = 1.0
+
+    def __init__(self, loader: Callable[[int], List], max_entries: int = 256,
+                 ttl: float = 300, generation_path: Optional[str] = None):
+        self.loader = loader
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.generation_path = generation_path
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: 'OrderedDict[int, Tuple[float, QuizQuestionSet]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = self._read_generation()
+        self._generation_checked = time.monotonic()
+
+    def get(self, quiz_id: int) -> QuizQuestionSet:
+        now = time.monotonic()
+        self._check_generation(now)
+        with self._lock:
+            entry = self._entries.get(quiz_id)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._entries.move_to_end(quiz_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        question_set = QuizQuestionSet.from_rows(self.loader(quiz_id))
+        # An empty set usually means ingestion hasn't committed yet; don't pin it
+        if question_set.questions:
+            with self._lock:
+                self._entries[quiz_id] = (now, question_set)
+                self._entries.move_to_end(quiz_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return question_set
+
+    @property
+    def generation(self) -> Optional[str]:
+        """Changes whenever clear() runs in any process sharing the generation file."""
+        self._check_generation(time.monotonic())
+        return self._generation
+
+    def invalidate(self, quiz_id: int):
+        with self._lock:
+            self._entries.pop(quiz_id, None)
+
+    def clear(self):
+        """Drop every entry here and, via the generation file, in other processes."""
+        with self._lock:
+            self._entries.clear()
+        if self.generation_path:
+            self._generation = str(time.time_ns())
+            tmp_path = self.generation_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                f.write(self._generation)
+            os.replace(tmp_path, self.generation_path)
+
+    def _read_generation(self) -> Optional[str]:
+        if not self.generation_path:
+            return None
+        try:
+            with open(self.generation_path) as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _check_generation(self, now: float):
+        if not self.generation_path or now - self._generation_checked < self.GENERATION_CHECK_INTERVAL:
+            return
+        self._generation_checked = now
+        generation = self._read_generation()
+        if generation != self._generation:
+            self._generation = generation
+            with self._lock:
+                self._entries.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None
+        }
@@ -0,0 +1,51 @@
+import numpy as np
+from typing import Dict, List, NamedTuple, Tuple
+
+UNANSWERED = -1
+
+
+class EncodedAnswerKey(NamedTuple):
+    """A quiz's answer key with every answer choice mapped to a small int."""
+    question_ids: Tuple[str, ...]
+    option_codes: Tuple[Dict[str, int], ...]  # per question: answer text -> code
+    key: np.ndarray  # code of the correct answer, one per question
+
+
+def encode_answer_key(question_set) -> EncodedAnswerKey:
+    """Encode a QuizQuestionSet; the correct answer always gets a code even if
+    it is missing from the options, so scoring matches a plain string compare."""
+    question_ids = []
+    option_codes = []
+    key = np.empty(len(question_set.questions), dtype=np.int16)
+    for j, q in enumerate(question_set.questions):
+        codes = {option: i for i, option in enumerate(dict.fromkeys(q.options))}
+        codes.setdefault(q.correct_answer, len(codes))
+        question_ids.append(str(q.id))
+        option_codes.append(codes)
+        key[j] = codes[q.correct_answer]
+    return EncodedAnswerKey(tuple(question_ids), tuple(option_codes), key)
+
+
+def encode_submissions(encoded: EncodedAnswerKey, answers_list: List[Dict]) -> np.ndarray:
+    """Build the (submissions x questions) matrix of answer codes."""
+    columns = list(zip(encoded.question_ids, encoded.option_codes))
+    rows = [
+        [codes.get(answers.get(question_id), UNANSWERED) for question_id, codes in columns]
+        for answers in answers_list
+    ]
+    return np.array(rows, dtype=np.int16).reshape(len(answers_list), len(columns))
+
+
+def correct_matrix(encoded: EncodedAnswerKey, answers_list: List[Dict]) -> np.ndarray:
+    """(submissions x questions) booleans: whether each question was answered correctly."""
+    return encode_submissions(encoded, answers_list) == encoded.key
+
+
+def score_submissions(encoded: EncodedAnswerKey, answers_list: List[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+    """Score many submissions of one quiz at once.
+
+    Returns (correct counts, percentage scores), in submission order.
+    """
+    correct = correct_matrix(encoded, answers_list).sum(axis=1)
+    scores = correct / len(encoded.question_ids) * 100
+    return correct, scores
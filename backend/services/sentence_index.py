@@ -0,0 +1,107 @@
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+MIN_SENTENCE_CHARS = 50
+# Sentences in this range make readable question stems; longer ones are
+# usually several clauses run together by PDF extraction
+IDEAL_SENTENCE_CHARS = (80, 250)
+
+_SENTENCE_RE = re.compile(r'[^.!?]+')
+_TERM_RE = re.compile(r'[a-z][a-z\-]{2,}')
+STOPWORDS = frozenset("""
+    the and for are but not you all any can had her was one our out has his how its may new now
+    see two who did get him let say she too use that with have this will your from they been
+    were said each which their there what about would these other into more some could them than
+    then also when where while such only over very most both many those after before because
+    through between being does within without upon under onto like just much must should
+""".split())
+
+
+def iter_sentences(text: str, min_chars: int = MIN_SENTENCE_CHARS) -> Iterator[Tuple[int, str]]:
+    """Yield (position, sentence) for sentences longer than min_chars, lazily."""
+    position = 0
+    for match in _SENTENCE_RE.finditer(text):
+        sentence = match.group().strip()
+        if len(sentence) > min_chars:
+            yield position, sentence
+            position += 1
+
+
+def terms(text: str) -> List[str]:
+    return [term for term in _TERM_RE.findall(text.lower()) if term not in STOPWORDS]
+
+
+class TermIndex:
+    """Document frequencies for one book, pages being the documents.
+
+    Built once per ingestion; idf() is high for terms specific to a few pages
+    and low for words that appear throughout the book.
+    """
+
+    def __init__(self):
+        self.documents = 0
+        self.document_frequency: Counter = Counter()
+        self._weights: Optional[Dict[str, float]] = None
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[str]) -> 'TermIndex':
+        index = cls()
+        for text in documents:
+            index.add_document(text)
+        return index
+
+    def add_document(self, text: str):
+        self.documents += 1
+        self.document_frequency.update(set(terms(text)))
+        self._weights = None
+
+    def idf(self, term: str) -> float:
+        return math.log((1 + self.documents) / (1 + self.document_frequency.get(term, 0))) + 1
+
+    def weights(self) -> Tuple[Dict[str, float], float]:
+        """idf of every indexed term, plus the idf of an unseen term."""
+        if self._weights is None:
+            self._weights = {term: self.idf(term) for term in self.document_frequency}
+        return self._weights, self.idf('')
+
+
+def score_sentence(sentence: str, index: Optional[TermIndex] = None) -> float:
+    """Mean TF-IDF weight of the sentence's terms, scaled down outside the
+    ideal length range. Without an index every term weighs 1."""
+    sentence_terms = terms(sentence)
+    if not sentence_terms:
+        return 0.0
+    if index is None:
+        weight = len(set(sentence_terms)) / len(sentence_terms)
+    else:
+        idf, unseen = index.weights()
+        weight = sum(idf.get(term, unseen) for term in sentence_terms) / len(sentence_terms)
+
+    low, high = IDEAL_SENTENCE_CHARS
+    length = len(sentence)
+    if length < low:
+        weight *= length / low
+    elif length > high:
+        weight *= high / length
+    return weight
+
+
+def select_sentences(text: str, count: int, index: Optional[TermIndex] = None) -> List[str]:
+    """The count best-scoring sentences of text, in their original order.
+
+    One pass over the text; only the current top count are kept, in a min-heap.
+    """
+    if count <= 0:
+        return []
+    heap: List[Tuple[float, int, str]] = []
+    for position, sentence in iter_sentences(text):
+        # earlier sentences win ties
+        entry = (score_sentence(sentence, index), -position, sentence)
+        if len(heap) < count:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+    return [sentence for _, _, sentence in sorted(heap, key=lambda entry: -entry[1])]
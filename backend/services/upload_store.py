@@ -0,0 +1,238 @@
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+import time
+import uuid
+from typing import Dict, Optional
+
+CHUNK_SIZE = 1024 * 1024
+PDF_MAGIC = b'%PDF-'
+
+
+class UploadError(Exception):
+    """A rejected upload; status is the HTTP status to answer with.
+
+    Not a ValueError: Werkzeug's form parser silently drops those, which
+    would turn a rejected file part into a missing one.
+    """
+
+    def __init__(self, message: str, status: int = 400, **details):
+        super().__init__(message)
+        self.status = status
+        self.details = details
+
+
+class HashingWriter:
+    """Writable file that lands in upload_dir under its SHA-256.
+
+    Bytes are hashed, size-checked and (for PDFs) header-checked as they are
+    written, so an upload is copied exactly once, straight to its final
+    filesystem. finish() publishes the file; close() without finish()
+    deletes it. Reads and seeks are passed through, which lets Werkzeug use
+    it as the spool for a multipart file part.
+    """
+
+    def __init__(self, upload_dir: str, max_bytes: Optional[int] = None, extension: str = '.pdf'):
+        self.upload_dir = upload_dir
+        self.max_bytes = max_bytes
+        self.extension = extension
+        self.size = 0
+        self._sha = hashlib.sha256()
+        self._head = b''
+        fd, self._tmp_path = tempfile.mkstemp(dir=upload_dir, suffix='.part')
+        self._file = os.fdopen(fd, 'w+b')
+        self._digest = None
+
+    def write(self, data: bytes) -> int:
+        try:
+            self.size += len(data)
+            if self.max_bytes is not None and self.size > self.max_bytes:
+                raise UploadError(f'File is larger than {self.max_bytes} bytes', 413)
+            if self.extension == '.pdf' and len(self._head) < len(PDF_MAGIC):
+                self._head += data[:len(PDF_MAGIC) - len(self._head)]
+                if not PDF_MAGIC.startswith(self._head):
+                    raise UploadError('File is not a PDF')
+            self._sha.update(data)
+            return self._file.write(data)
+        except UploadError:
+            self.close()
+            raise
+
+    def finish(self) -> str:
+        """Publish the file as <sha256><extension> and return the digest."""
+        if self._digest is None:
+            if self.extension == '.pdf' and self._head != PDF_MAGIC:
+                self.close()
+                raise UploadError('File is not a PDF')
+            self._file.close()
+            self._digest = self._sha.hexdigest()
+            os.replace(self._tmp_path, os.path.join(self.upload_dir, self._digest + self.extension))
+        return self._digest
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+        if self._digest is None and os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+    def read(self, *args):
+        return self._file.read(*args)
+
+    def readline(self, *args):
+        return self._file.readline(*args)
+
+    def seek(self, *args):
+        return self._file.seek(*args)
+
+    def tell(self):
+        return self._file.tell()
+
+    def flush(self):
+        self._file.flush()
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+
+def copy_stream(stream, writer, chunk_size: int = CHUNK_SIZE) -> int:
+    copied = 0
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return copied
+        writer.write(chunk)
+        copied += len(chunk)
+
+
+class ResumableUploads:
+    """Uploads sent as a series of appends, for large files over unreliable
+    connections: a client that loses its connection asks for the current
+    offset and carries on from there.
+
+    Each upload is a <id>.part file plus <id>.json metadata in state_dir,
+    which must be on the same filesystem as upload_dir so complete() can
+    move the file into place. Uploads untouched for expire_seconds are
+    removed when new ones start.
+    """
+
+    def __init__(self, state_dir: str, upload_dir: str, max_bytes: int, expire_seconds: int = 24 * 3600):
+        self.state_dir = state_dir
+        self.upload_dir = upload_dir
+        self.max_bytes = max_bytes
+        self.expire_seconds = expire_seconds
+        os.makedirs(state_dir, exist_ok=True)
+
+    def _paths(self, upload_id: str):
+        try:
+            upload_id = uuid.UUID(upload_id).hex
+        except ValueError:
+            raise UploadError('Upload not found', 404)
+        base = os.path.join(self.state_dir, upload_id)
+        return base + '.part', base + '.json'
+
+    def _metadata(self, upload_id: str) -> Dict:
+        part_path, meta_path = self._paths(upload_id)
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise UploadError('Upload not found', 404)
+
+    def init(self, filename: str, total_size: Optional[int] = None) -> Dict:
+        if total_size is not None and (not isinstance(total_size, int) or total_size < 0):
+            raise UploadError('size must be a non-negative integer')
+        if total_size is not None and total_size > self.max_bytes:
+            raise UploadError(f'File is larger than {self.max_bytes} bytes', 413)
+        self.expire()
+        upload_id = uuid.uuid4().hex
+        part_path, meta_path = self._paths(upload_id)
+        open(part_path, 'xb').close()
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump({"filename": filename, "size": total_size, "created_at": time.time()}, f)
+        return {"upload_id": upload_id, "offset": 0, "size": total_size}
+
+    def status(self, upload_id: str) -> Dict:
+        metadata = self._metadata(upload_id)
+        part_path, _ = self._paths(upload_id)
+        return {"upload_id": upload_id, "offset": os.path.getsize(part_path),
+                "size": metadata['size'], "filename": metadata['filename']}
+
+    def append(self, upload_id: str, offset: int, stream) -> int:
+        """Write stream at offset, which must be the current end of the
+        upload (409 otherwise, with the offset to resume from)."""
+        metadata = self._metadata(upload_id)
+        part_path, _ = self._paths(upload_id)
+        limit = metadata['size'] if metadata['size'] is not None else self.max_bytes
+        with open(part_path, 'r+b') as f:
+            # One append at a time per upload, across worker processes
+            fcntl.flock(f, fcntl.LOCK_EX)
+            current = f.seek(0, os.SEEK_END)
+            if offset != current:
+                raise UploadError('Offset does not match the uploaded size', 409, offset=current)
+            written = current
+            try:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    if written + len(chunk) > limit:
+                        raise UploadError(f'Upload is larger than {limit} bytes', 413)
+                    if written < len(PDF_MAGIC):
+                        head = chunk[:len(PDF_MAGIC) - written]
+                        if not PDF_MAGIC[written:].startswith(head):
+                            raise UploadError('File is not a PDF')
+                    f.write(chunk)
+                    written += len(chunk)
+            except UploadError:
+                # Keep what was there before this request, so retries line up
+                f.truncate(current)
+                raise
+            f.flush()
+            os.utime(part_path)
+            return written
+
+    def complete(self, upload_id: str) -> Dict:
+        """Move the finished upload into upload_dir under its SHA-256; returns
+        {"sha256", "filename"}."""
+        metadata = self._metadata(upload_id)
+        part_path, meta_path = self._paths(upload_id)
+        sha = hashlib.sha256()
+        try:
+            f = open(part_path, 'rb')
+        except FileNotFoundError:
+            raise UploadError('Upload not found', 404)
+        with f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            size = 0
+            head = f.read(len(PDF_MAGIC))
+            f.seek(0)
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                sha.update(chunk)
+                size += len(chunk)
+            if metadata['size'] is not None and size != metadata['size']:
+                raise UploadError(f"Upload is incomplete: {size} of {metadata['size']} bytes", 409, offset=size)
+            if head != PDF_MAGIC:
+                raise UploadError('File is not a PDF')
+            digest = sha.hexdigest()
+            os.replace(part_path, os.path.join(self.upload_dir, digest + '.pdf'))
+        os.remove(meta_path)
+        return {"sha256": digest, "filename": metadata['filename']}
+
+    def expire(self):
+        # An upload's last append is the mtime of its .part file
+        cutoff = time.time() - self.expire_seconds
+        for entry in os.scandir(self.state_dir):
+            if not entry.name.endswith('.part'):
+                continue
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    for path in self._paths(entry.name[:-len('.part')]):
+                        os.remove(path)
+            except (FileNotFoundError, UploadError):
+                pass
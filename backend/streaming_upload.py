@@ -0,0 +1,45 @@
+"""Upload size limits and streamed PDF uploads.
+
+init_uploads() caps request bodies with MAX_CONTENT_LENGTH and makes
+Werkzeug spool PDF file parts straight into the upload directory through a
+HashingWriter (services/upload_store.py), which hashes and checks the PDF
+header as the body arrives; store_upload() then only renames the file.
+It also answers UploadError and 413 with JSON, and returns the
+ResumableUploads store behind the init/append/complete endpoints.
+
+    MAX_UPLOAD_MB           largest request body, and largest resumable upload (default 100)
+    UPLOAD_EXPIRE_SECONDS   how long an idle resumable upload is kept (default 86400)
+"""
+import os
+from flask import Request, current_app, jsonify
+from werkzeug.exceptions import RequestEntityTooLarge
+from services.upload_store import HashingWriter, ResumableUploads, UploadError
+
+
+class StreamingUploadRequest(Request):
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        upload_dir = current_app.config.get('UPLOAD_FOLDER')
+        if upload_dir and filename and filename.lower().endswith('.pdf'):
+            return HashingWriter(os.path.abspath(upload_dir), current_app.config.get('MAX_CONTENT_LENGTH'))
+        return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+
+def init_uploads(app, upload_dir: str) -> ResumableUploads:
+    max_bytes = int(os.getenv('MAX_UPLOAD_MB', '100')) * 1024 * 1024
+    app.config['MAX_CONTENT_LENGTH'] = max_bytes
+    app.config['UPLOAD_FOLDER'] = upload_dir
+    app.request_class = StreamingUploadRequest
+    os.makedirs(upload_dir, exist_ok=True)
+
+    @app.errorhandler(UploadError)
+    def upload_error(e):
+        return jsonify({"error": str(e), **e.details}), e.status
+
+    @app.errorhandler(RequestEntityTooLarge)
+    def too_large(e):
+        return jsonify({"error": f"Request is larger than {max_bytes} bytes"}), 413
+
+    return ResumableUploads(
+        os.path.join(upload_dir, '.resumable'), os.path.abspath(upload_dir), max_bytes,
+        expire_seconds=int(os.getenv('UPLOAD_EXPIRE_SECONDS', str(24 * 3600)))
+    )
@@ -0,0 +1,24 @@
+import pytest
+from app import create_app, db
+from migrations import init_schema
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """The full app on a fresh, migrated SQLite database in tmp_path."""
+    monkeypatch.setenv('JOBS_DB_PATH', str(tmp_path / 'jobs.db'))
+    monkeypatch.setenv('CONTENT_CACHE_DIR', str(tmp_path / 'content_cache'))
+    monkeypatch.setenv('GENERATION_CACHE_DIR', str(tmp_path / 'generation_cache'))
+    app = create_app({
+        'DATABASE_URL': 'sqlite:///' + str(tmp_path / 'quizzes.db'),
+        'UPLOAD_FOLDER': str(tmp_path / 'uploads'),
+    })
+    with app.app_context():
+        init_schema(db)
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,48 @@
+"""The incremental summaries (record_results) match a rebuild from the
+stored results, through both the ON CONFLICT and the generic upsert."""
+import pytest
+from sqlalchemy import select
+from app import db
+from models.models import QuestionStats, QuestionTimeBucket, QuizResult, QuizStats, StudentStats
+from services import analytics
+from tests.test_query_counts import seed
+
+SUMMARY_MODELS = [QuizStats, StudentStats, QuestionStats, QuestionTimeBucket]
+
+
+def summaries():
+    tables = {}
+    for model in SUMMARY_MODELS:
+        table = model.__table__
+        columns = [column for column in table.c if column.name != 'id']
+        tables[table.name] = sorted(
+            tuple(round(value, 6) if isinstance(value, float) else value for value in row)
+            for row in db.session.execute(select(*columns))
+        )
+    return tables
+
+
+def submit(client, submission, answers):
+    response = client.post('/api/quiz/submit', json={**submission, 'answers': answers})
+    assert response.status_code == 200, response.get_json()
+
+
+@pytest.fixture(params=['on_conflict', 'generic'])
+def upsert(request, monkeypatch):
+    if request.param == 'generic':
+        monkeypatch.setattr(analytics, '_dialect_name', lambda bind: 'generic')
+    return request.param
+
+
+def test_record_results_matches_rebuild(client, upsert):
+    submission = seed(5)
+    question_ids = list(submission['answers'])
+    submit(client, submission, submission['answers'])
+    submit(client, submission, {question_id: 'a' for question_id in question_ids})
+    submit(client, {**submission, 'question_times': {}}, {question_ids[0]: 'a'})
+
+    recorded = summaries()
+    assert db.session.scalar(select(QuizStats.attempts)) == 3
+    analytics.rebuild(db.session)
+    assert summaries() == recorded
+    assert db.session.query(QuizResult).count() == 3
@@ -0,0 +1,57 @@
+"""Hot queries reach their tables through an index, both on a database
+upgraded by the migrations and on a fresh create_all() one."""
+import pytest
+from sqlalchemy import create_engine, text
+import models.models  # noqa: F401 - registers the models
+from app import db
+from migrations import MIGRATIONS, upgrade
+
+# (query, table that must be reached through an index)
+HOT_QUERIES = [
+    ("SELECT * FROM student WHERE student_id = 's'", 'student'),
+    ('SELECT quiz.id, count(quiz_question.id) FROM quiz '
+     'LEFT OUTER JOIN quiz_question ON quiz_question.quiz_id = quiz.id GROUP BY quiz.id', 'quiz_question'),
+    ("SELECT * FROM textbook WHERE file_path = 'f.pdf'", 'textbook'),
+    ('SELECT * FROM chapter WHERE textbook_id = 1', 'chapter'),
+    ('SELECT * FROM question WHERE chapter_id = 1', 'question'),
+    ('SELECT * FROM quiz_question WHERE quiz_id = 1 ORDER BY "order"', 'quiz_question'),
+    ('SELECT * FROM quiz_result WHERE quiz_id = 1', 'quiz_result'),
+    ('SELECT * FROM quiz_result WHERE student_id = 1 ORDER BY completed_at', 'quiz_result'),
+    ('SELECT * FROM question_stats WHERE question_id IN (1, 2)', 'question_stats'),
+    ('SELECT * FROM question_time_bucket WHERE question_id IN (1, 2)', 'question_time_bucket'),
+    ("SELECT question_id FROM question_level WHERE chapter_id = 1 AND level = 'easy' "
+     'AND sample_key >= 0.5 ORDER BY sample_key LIMIT 5', 'question_level'),
+]
+
+
+def upgraded_engine():
+    engine = create_engine('sqlite://')
+    # Start from the pre-index schema, as an old database would be
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        for table in db.metadata.tables.values():
+            for index in table.indexes:
+                connection.execute(text(f'DROP INDEX {index.name}'))
+    upgrade(engine, MIGRATIONS)
+    return engine
+
+
+def fresh_engine():
+    engine = create_engine('sqlite://')
+    db.metadata.create_all(engine)
+    upgrade(engine, MIGRATIONS)
+    return engine
+
+
+@pytest.fixture(scope='module', params=[upgraded_engine, fresh_engine], ids=['upgraded', 'fresh'])
+def engine(request):
+    engine = request.param()
+    yield engine
+    engine.dispose()
+
+
+@pytest.mark.parametrize('query, table', HOT_QUERIES, ids=[table for _, table in HOT_QUERIES])
+def test_hot_query_uses_an_index(engine, query, table):
+    with engine.connect() as connection:
+        plan = [row[-1] for row in connection.execute(text('EXPLAIN QUERY PLAN ' + query))]
+    assert not any(step.startswith(f'SCAN {table}') for step in plan), plan
@@ -0,0 +1,89 @@
+"""The quiz blueprint endpoints issue a fixed number of SQL statements,
+whatever the size of the quiz."""
+import pytest
+from app import db
+from models.models import Textbook, Chapter, Question, Quiz, QuizQuestion, Student
+from services import quiz_assembly
+from services.query_counter import QueryCounter
+
+QUIZ_SIZES = [1, 10, 100]
+
+# ETag lookup + quiz + questions joined to their Question rows
+GET_QUIZ = 3
+# student + quiz + joined questions + result insert + quiz, student,
+# question and time histogram summary upserts + the level refresh:
+# current levels, question stats and time buckets
+SUBMIT_QUIZ = 11
+# result + joined questions
+GET_RESULT = 2
+
+
+def seed(num_questions, difficulty='medium'):
+    textbook = Textbook(title='Query count', file_path='unused.pdf')
+    db.session.add(textbook)
+    db.session.flush()
+    chapter = Chapter(title='Chapter 1', number=1, textbook_id=textbook.id)
+    db.session.add(chapter)
+    db.session.flush()
+    quiz = Quiz(title='Quiz', chapter_id=chapter.id, time_limit=30)
+    db.session.add(quiz)
+    db.session.flush()
+    questions = [Question(text=f'Q{i}', correct_answer='a', options=['a', 'b', 'c', 'd'],
+                          difficulty=difficulty, chapter_id=chapter.id) for i in range(num_questions)]
+    db.session.add_all(questions)
+    db.session.flush()
+    db.session.add_all(QuizQuestion(quiz_id=quiz.id, question_id=question.id, order=i + 1)
+                       for i, question in enumerate(questions))
+    quiz_assembly.index_chapters(db.session, [chapter.id])
+    student = Student(name='Student', email=f'student{quiz.id}@example.com')
+    db.session.add(student)
+    db.session.commit()
+    submission = {
+        'student_id': student.id,
+        'quiz_id': quiz.id,
+        'answers': {str(question.id): 'a' if i % 2 else 'b' for i, question in enumerate(questions)},
+        'question_times': {str(question.id): 5 + i for i, question in enumerate(questions)}
+    }
+    db.session.remove()
+    return submission
+
+
+def count_statements(call):
+    with QueryCounter(db.engine) as counter:
+        response = call()
+    assert response.status_code == 200, response.get_json()
+    return counter
+
+
+@pytest.mark.parametrize('size', QUIZ_SIZES)
+def test_get_quiz(client, size):
+    submission = seed(size)
+    counter = count_statements(lambda: client.get(f"/api/quiz/{submission['quiz_id']}"))
+    assert counter.count == GET_QUIZ, counter.statements
+
+
+@pytest.mark.parametrize('size', QUIZ_SIZES)
+def test_submit_quiz(client, size):
+    submission = seed(size)
+    counter = count_statements(lambda: client.post('/api/quiz/submit', json=submission))
+    assert counter.count == SUBMIT_QUIZ, counter.statements
+
+
+@pytest.mark.parametrize('size', QUIZ_SIZES)
+def test_submit_quiz_moving_levels(client, size):
+    # Every answer wrong: once the questions reach MIN_ATTEMPTS they move
+    # from easy to hard, all in one more statement
+    submission = seed(size, difficulty='easy')
+    submission['answers'] = {question_id: 'b' for question_id in submission['answers']}
+    for _ in range(quiz_assembly.MIN_ATTEMPTS - 1):
+        count_statements(lambda: client.post('/api/quiz/submit', json=submission))
+    counter = count_statements(lambda: client.post('/api/quiz/submit', json=submission))
+    assert counter.count == SUBMIT_QUIZ + 1, counter.statements
+
+
+@pytest.mark.parametrize('size', QUIZ_SIZES)
+def test_get_result(client, size):
+    submission = seed(size)
+    result_id = client.post('/api/quiz/submit', json=submission).get_json()['result_id']
+    counter = count_statements(lambda: client.get(f'/api/quiz/results/{result_id}'))
+    assert counter.count == GET_RESULT, counter.statements
@@ -0,0 +1,31 @@
+"""Uploading a book whose questions are already in the content cache."""
+import hashlib
+import io
+from app import app_services, db
+from models.models import Quiz, Textbook
+
+BOOK = b'%PDF-1.4\n% test book\n%%EOF\n'
+
+CHAPTERS = [{'title': f'Chapter {number}', 'questions': [
+    {'text': f'Q{number}.{i}', 'options': ['a', 'b', 'c', 'd'], 'correct_answer': 'a', 'difficulty': 'medium'}
+    for i in range(3)
+]} for number in (1, 2)]
+
+
+def upload(client, name):
+    return client.post('/upload', data={'file': (io.BytesIO(BOOK), name)},
+                       content_type='multipart/form-data')
+
+
+def test_reupload_reuses_the_textbook_and_quiz(client):
+    services = app_services()
+    services.content_cache.put_questions(hashlib.sha256(BOOK).hexdigest(),
+                                         services.pdf_service.generator_version, CHAPTERS)
+
+    first = upload(client, 'book.pdf')
+    second = upload(client, 'again.pdf')
+
+    assert first.status_code == second.status_code == 201, (first.get_json(), second.get_json())
+    assert second.get_json()['quiz_id'] == first.get_json()['quiz_id']
+    assert db.session.query(Textbook).count() == 1
+    assert db.session.query(Quiz).count() == 1
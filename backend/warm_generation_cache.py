@@ -0,0 +1,127 @@
+"""Warm the generation cache with questions that already exist, so a
+model-backed generator does not pay again for chapters it has already seen.
+
+    python warm_generation_cache.py [--generator-key KEY] [--source all|textbooks|uploads] [--dry-run]
+
+Sources:
+
+    textbooks  Question rows in the database (DATABASE_URL), per Chapter.
+               The chapter text comes from the textbook's page store (the
+               PDF is extracted into one if needed), split the way ingestion does.
+    uploads    Question sets /upload ingestion recorded in the content cache for
+               each upload, with the upload's cached page text (chapters
+               follow the PDF's outline when it is still in --upload-dir).
+
+Questions are stored under --generator-key, which must name the generator
+that produced them (default: the generator configured by the environment,
+see services/question_generator.py). Upload question sets record their
+generator, so only those matching the key are imported.
+"""
+import argparse
+import os
+import sys
+from services.content_cache import ContentCache
+from services.generation_cache import GenerationCache
+from services.pdf_service import PDFService
+
+INSTANCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance')
+
+
+def question_dict(question):
+    return {
+        "text": question.text,
+        "options": question.options,
+        "correct_answer": question.correct_answer,
+        "difficulty": question.difficulty
+    }
+
+
+def warm_from_textbooks(cache, pdf_service, generator_key, num_questions, dry_run):
+    from app import create_app
+    from models.models import Textbook, Chapter, Question
+
+    app = create_app({'BLUEPRINTS': ()})
+    imported = 0
+    with app.app_context():
+        for textbook in Textbook.query.order_by(Textbook.id):
+            if not os.path.exists(textbook.file_path):
+                print(f"  textbook {textbook.id}: {textbook.file_path} is missing, skipped")
+                continue
+            chapters = Chapter.query.filter_by(textbook_id=textbook.id).all()
+            by_number = {chapter.number: chapter for chapter in chapters}
+            questions = {}
+            for question in Question.query.filter(Question.chapter_id.in_([c.id for c in chapters])).order_by(Question.id):
+                questions.setdefault(question.chapter_id, []).append(question_dict(question))
+
+            pages = pdf_service.load_page_store(textbook.file_path)
+            structure = pdf_service.outline_chapters(textbook.file_path) or None
+            for number, (title, text) in enumerate(pdf_service.split_chapters(pages, structure), start=1):
+                chapter = by_number.get(number)
+                # Chapter detection may have changed since ingestion; only
+                # trust chapters that still line up
+                if chapter is None or chapter.title != title or not questions.get(chapter.id):
+                    continue
+                if not dry_run:
+                    cache.put(text, generator_key, num_questions, questions[chapter.id][:num_questions])
+                imported += 1
+    return imported
+
+
+def warm_from_uploads(cache, content_cache, pdf_service, upload_dir, generator_key, num_questions, dry_run):
+    prefix = 'questions-'
+    suffix = f'-v{generator_key}.json'
+    imported = 0
+    for name in sorted(os.listdir(content_cache.cache_dir)):
+        if not (name.startswith(prefix) and name.endswith(suffix)):
+            continue
+        sha256 = name[len(prefix):-len(suffix)]
+        generated = content_cache.get_questions(sha256, generator_key)
+        pages = content_cache.get_pages(sha256)
+        if generated is None or pages is None:
+            continue
+        recorded = {chapter['title']: chapter['questions'] for chapter in generated}
+        file_path = os.path.join(upload_dir, sha256 + '.pdf')
+        structure = pdf_service.outline_chapters(file_path) if os.path.exists(file_path) else None
+        for title, text in pdf_service.split_chapters(pages, structure or None):
+            if recorded.get(title):
+                if not dry_run:
+                    cache.put(text, generator_key, num_questions, recorded[title][:num_questions])
+                imported += 1
+    return imported
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Warm the generation cache from existing questions')
+    parser.add_argument('--generator-key', help='generator that produced the questions')
+    parser.add_argument('--source', choices=['all', 'textbooks', 'uploads'], default='all')
+    parser.add_argument('--num-questions', type=int, default=5, help='questions per chapter at generation time')
+    parser.add_argument('--cache-dir', default=os.getenv('GENERATION_CACHE_DIR', os.path.join(INSTANCE_DIR, 'generation_cache')))
+    parser.add_argument('--content-cache-dir', default=os.getenv('CONTENT_CACHE_DIR', os.path.join(INSTANCE_DIR, 'content_cache')))
+    parser.add_argument('--upload-dir', default='uploads', help="the app's upload folder")
+    parser.add_argument('--dry-run', action='store_true', help='count matching chapters without writing')
+    args = parser.parse_args(argv)
+
+    pdf_service = PDFService()
+    generator_key = args.generator_key or pdf_service.generator_version
+    if not args.generator_key and not pdf_service.generator.cacheable:
+        sys.exit("The configured generator's output is not cached; pass --generator-key "
+                 "(e.g. the key of the model generator the questions came from)")
+    cache = GenerationCache(args.cache_dir, max_bytes=int(os.getenv('GENERATION_CACHE_MAX_BYTES', str(256 * 1024 * 1024))))
+
+    if args.source in ('all', 'uploads') and os.path.isdir(args.content_cache_dir):
+        count = warm_from_uploads(cache, ContentCache(args.content_cache_dir), pdf_service, args.upload_dir,
+                                  generator_key, args.num_questions, args.dry_run)
+        print(f"uploads: {count} chapters")
+    if args.source in ('all', 'textbooks'):
+        try:
+            count = warm_from_textbooks(cache, pdf_service, generator_key, args.num_questions, args.dry_run)
+            print(f"textbooks: {count} chapters")
+        except Exception as e:
+            if args.source == 'textbooks':
+                raise
+            print(f"textbooks: skipped ({e})")
+    print(f"Generation cache ({generator_key}): {cache.stats()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
 import React, { useState } from 'react';
 import axios from 'axios';
+import { progressMessage, waitForJob } from '../jobs';
 
 const FileUpload: React.FC = () => {
   const [file, setFile] = useState<File | null>(null);
@@ -35,8 +36,19 @@ const FileUpload: React.FC = () => {
         },
       });
       console.log('File uploaded successfully:', response.data);
-      setSuccess('File uploaded successfully! Quiz has been created.');
       setFile(null);
+      // A file processed before is answered at once (201); otherwise the
+      // quiz is built by a background job (202)
+      if (response.status === 202) {
+        setSuccess('File uploaded, processing started...');
+        const job = await waitForJob(response.data.status_url, current => setSuccess(progressMessage(current)));
+        if (job.status === 'failed') {
+          setSuccess(null);
+          setError(`Failed to process file: ${job.error}`);
+          return;
+        }
+      }
+      setSuccess('File uploaded successfully! Quiz has been created.');
     } catch (err) {
       setError('Failed to upload file. Please try again.');
       console.error('Upload error:', err);
@@ -54,7 +66,7 @@ const FileUpload: React.FC = () => {
         disabled={uploading}
       />
       <button onClick={handleUpload} disabled={!file || uploading}>
-        {uploading ? 'Uploading...' : 'Upload'}
+        {uploading ? 'Processing...' : 'Upload'}
       </button>
       {error && <p className="error">{error}</p>}
       {success && <p className="success">{success}</p>}
@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
-import axios from 'axios';
+import { fetchAllPages } from '../pagination';
 
 interface Quiz {
   id: number;
@@ -17,8 +17,7 @@ const QuizList: React.FC = () => {
   useEffect(() => {
     const fetchQuizzes = async () => {
       try {
-        const response = await axios.get('http://localhost:8001/quizzes');
-        setQuizzes(response.data);
+        setQuizzes(await fetchAllPages<Quiz>('http://localhost:8001/quizzes'));
       } catch (err) {
         setError('Failed to load quizzes');
         console.error(err);
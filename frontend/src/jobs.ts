@@ -0,0 +1,38 @@
+import axios from 'axios';
+
+export interface JobProgress {
+  chapters_total: number | null;
+  chapters_done: number;
+}
+
+export interface Job {
+  id: string;
+  status: 'queued' | 'running' | 'completed' | 'failed';
+  progress: JobProgress | null;
+  result: any;
+  error: string | null;
+}
+
+const POLL_INTERVAL_MS = 1000;
+
+// Uploaded PDFs are processed by background jobs: poll the status URL an
+// upload returned until the job completes or fails
+export async function waitForJob(statusUrl: string, onProgress?: (job: Job) => void): Promise<Job> {
+  for (;;) {
+    const response = await axios.get<Job>(`http://localhost:8001${statusUrl}`);
+    const job = response.data;
+    if (job.status === 'completed' || job.status === 'failed') {
+      return job;
+    }
+    onProgress?.(job);
+    await new Promise(resolve => setTimeout(resolve, POLL_INTERVAL_MS));
+  }
+}
+
+export function progressMessage(job: Job): string {
+  if (!job.progress) {
+    return 'Processing...';
+  }
+  const { chapters_done, chapters_total } = job.progress;
+  return `Processing... ${chapters_done} of ${chapters_total ?? '?'} chapters done.`;
+}
@@ -1,6 +1,7 @@
 import React, { useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
 import axios from 'axios';
+import { fetchAllPages } from '../pagination';
 
 interface Textbook {
   id: number;
@@ -34,8 +35,7 @@ const QuizList: React.FC = () => {
 
   const fetchTextbooks = async () => {
     try {
-      const response = await axios.get('http://localhost:8001/api/pdf/textbooks');
-      setTextbooks(response.data);
+      setTextbooks(await fetchAllPages<Textbook>('http://localhost:8001/api/pdf/textbooks'));
     } catch (err) {
       setError('Error fetching textbooks');
       console.error(err);
@@ -1,5 +1,6 @@
 import React, { useState } from 'react';
 import axios from 'axios';
+import { progressMessage, waitForJob } from '../jobs';
 
 const TextbookUpload: React.FC = () => {
   const [file, setFile] = useState<File | null>(null);
@@ -34,8 +35,15 @@ const TextbookUpload: React.FC = () => {
         },
       });
 
-      setMessage(`Textbook uploaded successfully! ${response.data.chapters} chapters processed.`);
+      setMessage('Textbook uploaded, processing started...');
       setFile(null);
+      const job = await waitForJob(response.data.status_url, current => setMessage(progressMessage(current)));
+      if (job.status === 'failed') {
+        setMessage('');
+        setError(`Error processing textbook: ${job.error}`);
+      } else {
+        setMessage(`Textbook uploaded successfully! ${job.result.chapters} chapters processed.`);
+      }
     } catch (err) {
       setError('Error uploading textbook. Please try again.');
       console.error(err);
@@ -69,7 +77,7 @@ const TextbookUpload: React.FC = () => {
             uploading || !file ? 'opacity-50 cursor-not-allowed' : 'hover:bg-blue-600'
           }`}
         >
-          {uploading ? 'Uploading...' : 'Upload Textbook'}
+          {uploading ? 'Processing...' : 'Upload Textbook'}
         </button>
       </form>
     </div>
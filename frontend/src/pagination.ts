@@ -0,0 +1,21 @@
+import axios from 'axios';
+
+// Largest page the API serves (MAX_LIMIT in backend/services/pagination.py)
+const PAGE_SIZE = 200;
+
+// List endpoints return one page of rows; while there are more, the
+// X-Next-After-Id header names the id to continue after
+export async function fetchAllPages<T>(url: string): Promise<T[]> {
+  const rows: T[] = [];
+  let afterId: string | undefined;
+  do {
+    const params: Record<string, string | number> = { limit: PAGE_SIZE };
+    if (afterId) {
+      params.after_id = afterId;
+    }
+    const response = await axios.get<T[]>(url, { params });
+    rows.push(...response.data);
+    afterId = response.headers['x-next-after-id'] as string | undefined;
+  } while (afterId);
+  return rows;
+}